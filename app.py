@@ -2,8 +2,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import time
-from streamlit_gsheets import GSheetsConnection
 import utils.auth as auth
+from utils.risco_clinico import precarregar_modelo
 
 st.set_page_config(
     page_title="AJUSTA - Data Hub",
@@ -11,6 +11,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Carrega o modelo de risco clínico em segundo plano enquanto o usuário faz login
+precarregar_modelo()
+
 auth.check_auth()
 
 # Bloco 1: Cabeçalho do usuário (saudação + ações em uma linha compacta)
@@ -0,0 +1 @@
+# Benchmarks offline do AJUSTA Data Hub (rodar da raiz: ``python -m benchmarks.<nome>``)
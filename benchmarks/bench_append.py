@@ -0,0 +1,86 @@
+"""
+Custo de anexar um cadastro na aba ``Dados``: caminho antigo (ler tudo, ``pd.concat`` e
+regravar a aba) contra ``append_sheet_rows`` (só a linha nova), no backend em memória.
+
+Antes de medir, confere que os dois caminhos deixam a aba igual (fora a coluna de versão
+que o append carimba) e que o snapshot atualizado pelo append é igual a uma releitura.
+
+    python -m benchmarks.bench_append
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("AJUSTA_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="ajusta-bench-"))
+logging.disable(logging.WARNING)
+
+import pandas as pd
+from gspread_dataframe import get_as_dataframe
+
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils import data
+from utils.fake_sheets import FakeSpreadsheet
+
+# Custo simulado de rede: ida e volta + transferência por célula.
+LATENCIA_S = 0.05
+SEGUNDOS_POR_CELULA = 2e-6
+
+
+def _planilha(n: int, **custo) -> FakeSpreadsheet:
+    sp = FakeSpreadsheet(**custo)
+    sp.add_worksheet("Dados", values=como_valores_planilha(gerar_dados(n)))
+    return sp
+
+
+def _append_antigo(sp: FakeSpreadsheet, nova: pd.DataFrame) -> None:
+    ws = sp.worksheet("Dados")
+    df = get_as_dataframe(ws, evaluate_formulas=True)
+    todo = pd.concat([df, nova], ignore_index=True)
+    ws.clear()
+    ws.update("A1", [list(map(str, todo.columns))] + data._sheet_rows(todo, list(todo.columns)))
+
+
+def verificar_equivalencia() -> None:
+    nova = gerar_dados(3, seed=99)
+    sp = _planilha(200)
+    data.use_spreadsheet(sp)
+    _append_antigo(sp, nova)
+    antigo = data.load_sheet_data("Dados", force_refresh=True)
+
+    data.use_spreadsheet(_planilha(200))
+    data.load_sheet_data("Dados", force_refresh=True)
+    data.append_sheet_rows("Dados", nova)
+    snapshot = data.load_sheet_data("Dados")
+    relido = data.load_sheet_data("Dados", force_refresh=True)
+    pd.testing.assert_frame_equal(snapshot, relido)
+    pd.testing.assert_frame_equal(relido[list(antigo.columns)], antigo, check_dtype=False)
+    print("equivalência: ok")
+
+
+def main() -> None:
+    verificar_equivalencia()
+    nova = gerar_dados(1, seed=99)
+    print(f"{'linhas':>8} {'caminho':>10} {'tempo (s)':>10} {'chamadas':>9} {'células env.':>13} {'células rec.':>13}")
+    for n in (1_000, 5_000, 20_000):
+        for nome in ("antigo", "append"):
+            sp = _planilha(n, latency_s=LATENCIA_S, seconds_per_cell=SEGUNDOS_POR_CELULA)
+            data.use_spreadsheet(sp)
+            sp.reset_stats()
+            t0 = time.perf_counter()
+            if nome == "antigo":
+                _append_antigo(sp, nova)
+            else:
+                data.append_sheet_rows("Dados", nova)
+            dt = time.perf_counter() - t0
+            print(
+                f"{n:>8} {nome:>10} {dt:>10.3f} {sum(sp.calls.values()):>9} "
+                f"{sp.cells_sent:>13} {sp.cells_received:>13}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Carga do modelo de risco clínico em um processo novo: ``joblib.load`` do pickle (com o
+import do scikit-learn, como na primeira visita a Vulnerabilidades antes da pré-carga)
+contra a exportação numpy mapeada com ``mmap_mode="r"``, com e sem a tabela de scores.
+
+Cada caminho roda em um subprocesso próprio, que mede o tempo até o primeiro score e a
+memória residente acrescentada, separando páginas anônimas (de cada processo) das de
+arquivo (do mapeamento, divididas entre os processos que leem a mesma versão).
+
+Antes de medir, confere que ``precarregar_modelo`` só inicia uma thread por processo,
+termina ``pronto`` e que o score depois da pré-carga é o do pipeline.
+
+    python -m benchmarks.bench_carga_modelo
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_modelo_numpy import _sortear
+
+# Executado em cada subprocesso; ``CAMINHO`` escolhe o que carregar.
+_FILHO = """
+import json, os, time
+import pandas as pd
+from utils import risco_clinico as rc  # importado por qualquer página: fora da medida
+from utils.memoria import memoria_processo
+
+X = pd.DataFrame([[40.0, "F", 4.0, 6.0, 3.0, 2.0, 2.0, 3.0]], columns=rc.FEATURE_COLS)
+antes = memoria_processo()
+t0 = time.perf_counter()
+if os.environ["CAMINHO"] == "pickle":
+    import joblib
+    score = joblib.load(rc._model_path()).predict_proba(X)[:, 1]
+else:
+    score = rc._prever(X)
+segundos = time.perf_counter() - t0
+depois = memoria_processo()
+print(json.dumps({
+    "segundos": segundos,
+    "score": float(score[0]),
+    **{k: depois[k] - antes[k] for k in ("rss", "anonima", "arquivos")},
+}))
+"""
+
+
+def _rodar(caminho: str, env: dict[str, str]) -> dict:
+    env = {**os.environ, **env, "CAMINHO": caminho, "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+    saida = subprocess.run(
+        [sys.executable, "-c", _FILHO], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def verificar_equivalencia() -> None:
+    from utils import risco_clinico as rc
+
+    X = _sortear(1)
+    assert rc.precarregar_modelo()
+    assert not rc.precarregar_modelo()
+    while rc.precarga_stats()["estado"] == "carregando":
+        time.sleep(0.05)
+    stats = rc.precarga_stats()
+    assert stats["estado"] == "pronto", stats["erro"]
+    assert {"versão do modelo", "modelo", "scores guardados", "primeiro score"} <= set(stats["etapas"])
+    np.testing.assert_array_equal(rc._prever(X), rc.get_clinical_risk_pipeline().predict_proba(X)[:, 1])
+    print("equivalência: ok")
+
+
+def main() -> None:
+    verificar_equivalencia()
+    with tempfile.TemporaryDirectory() as pasta:
+        env = {"AJUSTA_MODELOS_DIR": pasta, "AJUSTA_SCORES_DIR": pasta}
+        # primeiro processo de cada caminho: exporta o modelo / monta a tabela
+        _rodar("numpy", env)
+        _rodar("numpy", {**env, "AJUSTA_SCORE_TABELA": "float32"})
+        casos = {
+            "pickle (scikit-learn)": _rodar("pickle", env),
+            "numpy mmap": _rodar("numpy", env),
+            "tabela float32 mmap": _rodar("numpy", {**env, "AJUSTA_SCORE_TABELA": "float32"}),
+        }
+    print(f"{'caminho':>22} {'1º score (s)':>13} {'RSS (MB)':>9} {'anônima':>8} {'arquivo':>8}")
+    for nome, r in casos.items():
+        print(f"{nome:>22} {r['segundos']:>13.3f} {r['rss']:>9.1f} {r['anonima']:>8.1f} {r['arquivos']:>8.1f}")
+    scores = {r["score"] for nome, r in casos.items() if "tabela" not in nome}
+    assert len(scores) == 1
+
+
+if __name__ == "__main__":
+    main()
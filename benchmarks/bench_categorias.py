@@ -0,0 +1,151 @@
+"""
+Colunas categóricas do dashboard: ``normalize_categoria`` célula a célula (implementação
+anterior, texto em ``object``) contra a versão vetorizada com dtype ``category``, e a faixa
+etária por ``apply`` contra ``faixas_etarias`` (``np.searchsorted`` sobre os limites).
+
+Antes de medir, confere que os rótulos são os mesmos (casos de borda e base sintética) e
+que filtros e agregados da página Dashboard não mudam com as colunas categóricas.
+
+    python -m benchmarks.bench_categorias
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from benchmarks.bench_dashboard_duckdb import FILTROS, _conferir
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils.dashboard_data import (
+    LABEL_NULO,
+    agregados_dashboard,
+    apply_dashboard_filtros,
+    faixas_etarias,
+    filtrar_e_agregar,
+    n_projetos_distintos,
+    normalize_categoria,
+    prepare_beneficiarios_dashboard,
+    projetos_opcoes_filtro,
+)
+from utils.data import normalize_sheet_columns
+
+
+def _normalize_referencia(series: pd.Series, label_nulo: str = LABEL_NULO) -> pd.Series:
+    """Implementação anterior (uma chamada Python por célula)."""
+
+    def _one(v) -> str:
+        if pd.isna(v):
+            return label_nulo
+        s = str(v).strip()
+        if not s or s.lower() == "nan":
+            return label_nulo
+        return s
+
+    return series.map(_one)
+
+
+def _faixa_referencia(idade: float, label_nulo: str = LABEL_NULO) -> str:
+    """Implementação anterior da faixa etária (uma chamada por linha)."""
+    if pd.isna(idade):
+        return label_nulo
+    if idade <= 12:
+        return "0-12 anos"
+    if idade <= 18:
+        return "13-18 anos"
+    if idade <= 30:
+        return "19-30 anos"
+    if idade <= 50:
+        return "31-50 anos"
+    return "51+ anos"
+
+
+def _como_load_sheet_data(n: int) -> pd.DataFrame:
+    return normalize_sheet_columns(TextParser(como_valores_planilha(gerar_dados(n))).read(), "Dados")
+
+
+def _casos_de_borda() -> list[pd.Series]:
+    mista = pd.Series(
+        [" a ", "a", "", "   ", None, np.nan, pd.NA, "nan", " NaN ", "NAN", LABEL_NULO, 3.0, 7, "b"],
+        dtype=object,
+        name="bairro",
+    )
+    return [
+        mista,
+        mista.astype("string"),
+        mista.astype("category"),
+        pd.Series([None, np.nan], dtype=object),
+        pd.Series([], dtype=object),
+        pd.Series(["x", "y"], index=[10, 3]),
+    ]
+
+
+def _sem_categorias(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def verificar_equivalencia() -> None:
+    for s in _casos_de_borda():
+        nova = normalize_categoria(s)
+        assert isinstance(nova.dtype, pd.CategoricalDtype)
+        pd.testing.assert_series_equal(nova.astype(object), _normalize_referencia(s).astype(object))
+    idades = pd.Series([-1.0, 0, 12, 12.0001, 18, 18.5, 30, 30.01, 50, 50.2, 99, np.nan, None], dtype=float)
+    idades = pd.concat([idades, pd.Series(np.random.default_rng(0).uniform(0, 100, 10_000))], ignore_index=True)
+    faixas = faixas_etarias(idades)
+    assert faixas.cat.ordered
+    pd.testing.assert_series_equal(
+        faixas.astype(object), idades.apply(_faixa_referencia).astype(object), check_names=False
+    )
+    df = prepare_beneficiarios_dashboard(_como_load_sheet_data(20_000))
+    ref = _sem_categorias(df)
+    assert projetos_opcoes_filtro(df) == projetos_opcoes_filtro(ref)
+    assert n_projetos_distintos(df) == n_projetos_distintos(ref)
+    for filtros in FILTROS.values():
+        df_vis = apply_dashboard_filtros(df, **filtros)
+        ref_vis = apply_dashboard_filtros(ref, **filtros)
+        _conferir(
+            (_sem_categorias(df_vis), agregados_dashboard(df_vis)),
+            (ref_vis, agregados_dashboard(ref_vis)),
+        )
+    print("equivalência: ok")
+
+
+def _medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(
+        f"{'linhas':>9} {'map (s)':>8} {'vetorizado (s)':>15} {'memória object (MB)':>20} "
+        f"{'category (MB)':>14} {'página object (s)':>18} {'category (s)':>13}"
+    )
+    for n in (10_000, 100_000, 1_000_000):
+        bruto = _como_load_sheet_data(n)
+        colunas = ["sexo", "genero", "bairro", "tipo_residencia", "acesso_agua", "acesso_esgoto",
+                   "acesso_energia", "cor_raca_etnia", "ja_teve_hanseniase", "projeto_acao"]
+        # tempos de normalização incluem a faixa etária
+        t_ref = _medir(lambda: [_normalize_referencia(bruto[c]) for c in colunas])
+        t_vet = _medir(lambda: [normalize_categoria(bruto[c]) for c in colunas])
+        df = prepare_beneficiarios_dashboard(bruto)
+        t_ref += _medir(lambda: df["idade"].apply(_faixa_referencia))
+        t_vet += _medir(lambda: faixas_etarias(df["idade"]))
+        ref = _sem_categorias(df)
+        mb = 1024 * 1024
+        mem_ref = ref[colunas].memory_usage(deep=True, index=False).sum() / mb
+        mem_cat = df[colunas].memory_usage(deep=True, index=False).sum() / mb
+        filtros = FILTROS["todos"]
+        t_pag_ref = _medir(lambda: filtrar_e_agregar(ref, engine="pandas", **filtros))
+        t_pag_cat = _medir(lambda: filtrar_e_agregar(df, engine="pandas", **filtros))
+        print(
+            f"{n:>9} {t_ref:>8.3f} {t_vet:>15.3f} {mem_ref:>20.1f} {mem_cat:>14.1f} "
+            f"{t_pag_ref:>18.3f} {t_pag_cat:>13.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
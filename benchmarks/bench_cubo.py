@@ -0,0 +1,70 @@
+"""
+Agregados da página Dashboard: contagens sobre as linhas filtradas (motor ``pandas``)
+contra o cubo pré-agregado por grupo de filtro (motor ``cubo``, ``CuboDashboard``).
+
+Antes de medir, confere em combinações sorteadas de filtros que os dois motores devolvem
+os mesmos agregados. A montagem do cubo (uma vez por versão da aba) e o tamanho dele
+(grupos e pares grupo × valor, somados nas colunas contadas) aparecem em colunas separadas.
+
+    python -m benchmarks.bench_cubo
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from benchmarks.bench_dashboard_duckdb import FILTROS, _conferir
+from benchmarks.bench_filtros import _sortear
+from benchmarks.sintetico import gerar_dados
+from utils.dashboard_data import (
+    agregados_cubo,
+    agregados_dashboard,
+    apply_dashboard_filtros,
+    cubo_dashboard,
+    filtrar_e_agregar,
+    prepare_beneficiarios_dashboard,
+)
+
+
+def verificar_equivalencia() -> None:
+    df = prepare_beneficiarios_dashboard(gerar_dados(5_000))
+    rng = np.random.default_rng(1)
+    for filtros in [*FILTROS.values(), *(_sortear(rng) for _ in range(40))]:
+        _conferir(filtrar_e_agregar(df, engine="pandas", **filtros), filtrar_e_agregar(df, engine="cubo", **filtros))
+    print("equivalência: ok")
+
+
+def _medir(fn, repeticoes: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        fn()
+    return (time.perf_counter() - t0) / repeticoes
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(
+        f"{'linhas':>9} {'filtros':>12} {'linhas (s)':>11} {'cubo (s)':>9} {'ganho':>7} "
+        f"{'montagem (s)':>13} {'grupos':>8} {'pares':>9}"
+    )
+    for n in (10_000, 100_000, 1_000_000):
+        df = prepare_beneficiarios_dashboard(gerar_dados(n))
+        t0 = time.perf_counter()
+        cubo = cubo_dashboard(df)
+        t_montagem = time.perf_counter() - t0
+        pares = sum(len(g) for g, _, _ in cubo.contagens.values())
+        repeticoes = 5 if n <= 100_000 else 2
+        for nome, filtros in FILTROS.items():
+            df_vis = apply_dashboard_filtros(df, **filtros)
+            t_linhas = _medir(lambda: agregados_dashboard(df_vis), repeticoes)
+            t_cubo = _medir(lambda: agregados_cubo(cubo, **filtros), repeticoes)
+            print(
+                f"{n:>9} {nome:>12} {t_linhas:>11.4f} {t_cubo:>9.4f} {t_linhas / t_cubo:>6.1f}x "
+                f"{t_montagem:>13.3f} {len(cubo.n):>8} {pares:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+``load_dashboard_data`` a cada execução de página: cache por versão da aba
+(``depends_on_sheets``, implementação anterior, que devolve uma cópia a cada acesso) contra
+o cache pela impressão digital do conteúdo, com o quadro compartilhado entre páginas e sessões.
+
+Mede uma reexecução sem mudanças (clique em um filtro) e um snapshot regravado com o mesmo
+conteúdo (versão nova, dados iguais, como numa edição desfeita). Confere os acertos/faltas
+e que o quadro servido é igual ao preparado do zero.
+
+    python -m benchmarks.bench_dashboard_cache
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("AJUSTA_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="ajusta-bench-"))
+logging.disable(logging.WARNING)
+
+import pandas as pd
+
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils import carregamento, data
+from utils.dashboard_data import prepare_beneficiarios_dashboard
+from utils.fake_sheets import FakeSpreadsheet
+from utils.memoria import aplicar_plano_dtypes
+
+
+@data.depends_on_sheets("Dados")
+def _load_dashboard_por_versao():
+    """Implementação anterior de ``load_dashboard_data``."""
+    return prepare_beneficiarios_dashboard(data.load_sheet_data("Dados"))
+
+
+def _medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def _regravar_snapshot() -> None:
+    """Snapshot regravado sem mudanças: versão nova, mesmo conteúdo."""
+    time.sleep(0.01)
+    data.snapshot.write_snapshot("Dados", data.snapshot.read_snapshot("Dados"))
+
+
+def main() -> None:
+    print(
+        f"{'linhas':>8} {'cache':>11} {'1ª execução (s)':>16} {'reexecução (s)':>15} "
+        f"{'releitura igual (s)':>20}"
+    )
+    for n in (20_000, 100_000):
+        sp = FakeSpreadsheet()
+        sp.add_worksheet("Dados", values=como_valores_planilha(gerar_dados(n)))
+        data.use_spreadsheet(sp)
+        data.clear_data_cache()
+        carregamento.limpar_dashboard_cache()
+        data.load_sheet_data("Dados", force_refresh=True)
+        for nome, fn in (("versão", _load_dashboard_por_versao), ("conteúdo", carregamento.load_dashboard_data)):
+            antes = carregamento.dashboard_cache_stats()
+            t_primeira = _medir(fn)
+            t_reexec = _medir(fn)
+            _regravar_snapshot()
+            t_releitura = _medir(fn)
+            print(f"{n:>8} {nome:>11} {t_primeira:>16.3f} {t_reexec:>15.3f} {t_releitura:>20.3f}")
+        depois = carregamento.dashboard_cache_stats()
+        assert depois["misses"] - antes["misses"] == 1, depois
+        assert depois["hits"] - antes["hits"] == 2, depois
+        esperado = aplicar_plano_dtypes(prepare_beneficiarios_dashboard(data.load_sheet_data("Dados")))
+        pd.testing.assert_frame_equal(
+            carregamento.load_dashboard_data().drop(columns="idade"), esperado.drop(columns="idade")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Agregados da página Dashboard: caminho pandas (``apply_dashboard_filtros`` +
+``agregados_dashboard``) contra o motor DuckDB (``utils.dashboard_duckdb``).
+
+Para cada tamanho de base e cada combinação de filtros, confere que os dois motores
+devolvem as mesmas linhas e os mesmos agregados e mede o tempo de uma execução da página
+(sem os gráficos). O registro da tabela Arrow no DuckDB acontece uma vez por versão da
+aba e aparece em coluna separada.
+
+    python -m benchmarks.bench_dashboard_duckdb
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+import pandas as pd
+
+from benchmarks.sintetico import BAIRROS, PROJETOS, gerar_dados
+from utils import dashboard_duckdb
+from utils.dashboard_data import filtrar_e_agregar, prepare_beneficiarios_dashboard
+
+FILTROS = {
+    "sem filtro": {},
+    "bairro+sexo": {"bairros": BAIRROS[:5], "sexos": ["Feminino"]},
+    "projeto": {"projetos": PROJETOS[:2]},
+    "todos": {
+        "projetos": [PROJETOS[0]],
+        "bairros": BAIRROS[:20],
+        "tipos_residencia": ["Própria", "Alugada"],
+        "categorias_hanseniase": ["Não possui"],
+    },
+}
+
+
+def _conferir(a: tuple[pd.DataFrame, dict], b: tuple[pd.DataFrame, dict]) -> None:
+    (df_a, agg_a), (df_b, agg_b) = a, b
+    pd.testing.assert_frame_equal(df_a, df_b)
+    assert agg_a["contagens"].keys() == agg_b["contagens"].keys()
+    for col, serie in agg_a["contagens"].items():
+        pd.testing.assert_series_equal(serie, agg_b["contagens"][col])
+    pd.testing.assert_series_equal(agg_a["projetos"], agg_b["projetos"])
+    for chave in ("n_total", "n_sem_renda", "soma_membros", "n_projetos"):
+        assert agg_a[chave] == agg_b[chave], chave
+    if agg_a["renda_media"] is None:
+        assert agg_b["renda_media"] is None
+    else:
+        assert math.isclose(agg_a["renda_media"], agg_b["renda_media"], rel_tol=1e-9)
+
+
+def _medir(fn, repeticoes: int) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = fn()
+    return (time.perf_counter() - t0) / repeticoes, resultado
+
+
+def main() -> None:
+    if not dashboard_duckdb.disponivel():
+        raise SystemExit("duckdb/pyarrow não instalados")
+    print(f"{'linhas':>9} {'filtros':>12} {'pandas (s)':>11} {'duckdb (s)':>11} {'ganho':>7} {'registro (s)':>13}")
+    for n in (10_000, 100_000, 1_000_000):
+        df = prepare_beneficiarios_dashboard(gerar_dados(n))
+        repeticoes = 5 if n <= 100_000 else 1
+        t0 = time.perf_counter()
+        filtrar_e_agregar(df, engine="duckdb")
+        t_registro = time.perf_counter() - t0
+        for nome, filtros in FILTROS.items():
+            t_pd, res_pd = _medir(lambda: filtrar_e_agregar(df, engine="pandas", **filtros), repeticoes)
+            t_db, res_db = _medir(lambda: filtrar_e_agregar(df, engine="duckdb", **filtros), repeticoes)
+            _conferir(res_pd, res_db)
+            print(f"{n:>9} {nome:>12} {t_pd:>11.3f} {t_db:>11.3f} {t_pd / t_db:>6.1f}x {t_registro:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Edição de um beneficiário na aba ``Dados``: regravação completa da aba contra
+``write_sheet_diff`` (só as células alteradas), no backend em memória.
+
+Antes de medir, confere que os dois caminhos deixam a aba igual e que, se alguém
+incluir ou remover uma linha direto na planilha depois da leitura, a gravação por
+diferença é recusada sem alterar nada (um anexo no fim não muda as posições e passa).
+
+    python -m benchmarks.bench_diff_writer
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("AJUSTA_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="ajusta-bench-"))
+logging.disable(logging.WARNING)
+
+import pandas as pd
+
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils import data
+from utils.fake_sheets import FakeSpreadsheet
+
+LATENCIA_S = 0.05
+SEGUNDOS_POR_CELULA = 2e-6
+
+
+def _planilha(n: int, **custo) -> FakeSpreadsheet:
+    sp = FakeSpreadsheet(**custo)
+    sp.add_worksheet("Dados", values=como_valores_planilha(gerar_dados(n)))
+    data.use_spreadsheet(sp)
+    return sp
+
+
+def _editar(df, i):
+    df.loc[i, "nome_completo"] = "Nome Editado"
+    df.loc[i, "bairro"] = "Bairro 07"
+    df.loc[i, "numero_filhos"] = 3
+    return df
+
+
+def verificar_equivalencia() -> None:
+    n = 200
+    resultados = {}
+    for nome in ("completo", "diff"):
+        _planilha(n)
+        df = _editar(data.load_sheet_data("Dados", force_refresh=True), n // 2)
+        if nome == "completo":
+            data._rewrite_worksheet("Dados", df)
+        else:
+            data.write_sheet_diff("Dados", df)
+        resultados[nome] = data.load_sheet_data("Dados", force_refresh=True)
+    pd.testing.assert_frame_equal(resultados["diff"], resultados["completo"], check_dtype=False)
+
+    for mudanca in ("incluir", "remover"):
+        ws = _planilha(n).worksheet("Dados")
+        df = _editar(data.load_sheet_data("Dados", force_refresh=True), n // 2)
+        if mudanca == "incluir":
+            ws.insert_row(["Incluído na planilha"], index=2)
+        else:
+            ws.delete_rows(2)
+        antes = ws.get_all_values()
+        try:
+            data.write_sheet_diff("Dados", df)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError(f"gravação aceita depois de {mudanca} uma linha na planilha")
+        assert ws.get_all_values() == antes
+
+    ws = _planilha(n).worksheet("Dados")
+    df = _editar(data.load_sheet_data("Dados", force_refresh=True), n // 2)
+    ws.append_rows([["Anexado por outro processo"]])
+    data.write_sheet_diff("Dados", df)
+    depois = data.load_sheet_data("Dados", force_refresh=True)
+    assert depois.loc[n // 2, "nome_completo"] == "Nome Editado"
+    assert depois.loc[n, "nome_completo"] == "Anexado por outro processo"
+    print("equivalência: ok")
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(f"{'linhas':>8} {'caminho':>10} {'tempo (s)':>10} {'chamadas':>9} {'células env.':>13} {'células rec.':>13}")
+    for n in (1_000, 5_000, 20_000):
+        for nome in ("completo", "diff"):
+            sp = _planilha(n, latency_s=LATENCIA_S, seconds_per_cell=SEGUNDOS_POR_CELULA)
+            df = _editar(data.load_sheet_data("Dados", force_refresh=True), n // 2)
+            sp.reset_stats()
+            t0 = time.perf_counter()
+            if nome == "completo":
+                data._rewrite_worksheet("Dados", df)
+            else:
+                data.write_sheet_diff("Dados", df)
+            dt = time.perf_counter() - t0
+            print(
+                f"{n:>8} {nome:>10} {dt:>10.3f} {sum(sp.calls.values()):>9} "
+                f"{sp.cells_sent:>13} {sp.cells_received:>13}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Variáveis do modelo de risco clínico: a montagem anterior (``_norm_label`` e um ``map``
+com ``lambda`` por célula, casts coluna a coluna e ``classificar_risco`` linha a linha)
+contra a vetorizada de ``utils.risco_clinico`` (rótulos distintos normalizados com
+operações de string, códigos por ``factorize``, bloco ``float64`` e ``np.select``).
+
+Antes de medir, confere que as variáveis, a máscara de elegíveis, a matriz enviada ao
+modelo (e as chaves do cache de scores) e o quadro final são idênticos nos dois caminhos,
+na base sintética e em uma base com os casos de borda.
+
+    python -m benchmarks.bench_features_risco
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_categorias import _como_load_sheet_data
+from benchmarks.bench_score_cache import _pasta_temporaria
+from utils import risco_clinico as rc
+from utils.score_cache import chaves_features
+
+
+def _idade_referencia(s_data_nasc: pd.Series) -> pd.Series:
+    dt = pd.to_datetime(s_data_nasc, format="%d/%m/%Y", errors="coerce")
+    dias = (datetime.now() - dt).dt.days
+    return (dias / 365.25).round().astype("Int64")
+
+
+def _features_referencia(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação anterior (uma chamada Python por célula)."""
+    out = pd.DataFrame(index=df.index)
+    out["NU_IDADE_N"] = _idade_referencia(df["data_nascimento"])
+    out["CS_SEXO"] = df["sexo"].map(rc._norm_label).map(rc._MAP_SEXO)
+    for col, (origem, mapa) in rc._ORIGEM_FEATURES.items():
+        if col != "CS_SEXO":
+            out[col] = df[origem].map(rc._norm_label).map(lambda x, mapa=mapa: mapa.get(x) if x else None)
+    return out
+
+
+def _elegivel_referencia(features: pd.DataFrame) -> pd.Series:
+    ok_idade = features["NU_IDADE_N"].notna() & (features["NU_IDADE_N"] >= 0) & (features["NU_IDADE_N"] <= 120)
+    ok_rest = pd.Series(True, index=features.index)
+    for c in rc.FEATURE_COLS:
+        if c != "NU_IDADE_N":
+            ok_rest &= features[c].notna()
+    return ok_idade & ok_rest
+
+
+def _matriz_referencia(feats: pd.DataFrame, elig: pd.Series) -> pd.DataFrame:
+    X = feats.loc[elig, rc.FEATURE_COLS].copy()
+    for c in rc.FEATURE_COLS:
+        if c != "CS_SEXO":
+            X[c] = X[c].astype(float)
+    return X
+
+
+def _com_score_referencia(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    feats = _features_referencia(out)
+    elig = _elegivel_referencia(feats)
+    out["score_risco_clinico"] = np.nan
+    out["categoria_risco"] = pd.Series(pd.NA, index=out.index, dtype="string")
+    for c in rc.FEATURE_COLS:
+        out[c] = pd.Series(pd.NA, index=out.index, dtype=object) if c == "CS_SEXO" else np.nan
+    if not elig.any():
+        return out
+    proba = rc.scores_em_cache(_matriz_referencia(feats, elig), rc.versao_scores(), rc._prever)
+    out.loc[elig, "score_risco_clinico"] = proba
+    out.loc[elig, "categoria_risco"] = [rc.classificar_risco(float(s)) for s in proba]
+    for c in rc.FEATURE_COLS:
+        out.loc[elig, c] = feats.loc[elig, c].values
+    return out
+
+
+def _casos_de_borda() -> pd.DataFrame:
+    """Traços, espaços, nulos de vários tipos, números, datas inválidas e idades fora de 0–120."""
+    nasc = ["01/02/1980", " 01/02/1980", "31/02/1990", "1/2/1990", "", None, "01/01/1890",
+            "01/01/2090", "15/06/2000", "15/06/2000", np.nan, "2000-06-15"]
+    return pd.DataFrame({
+        "data_nascimento": pd.Series(nasc, dtype=object),
+        "sexo": pd.Series(["Feminino", " Masculino ", "masculino", "Intersexo", None, "Feminino",
+                           "Feminino", "Masculino", pd.NA, "Feminino", "Masculino", "Feminino"], dtype=object),
+        "cor_raca_etnia": ["Parda", "Preta ", "Indígena", "", None, "Branca", "Amarela", "Parda",
+                           "Parda", np.nan, "Preta", "Parda"],
+        "escolaridade": ["Médio completo", " Pós-graduação", "Superior completo", "Não sabe",
+                         "Fundamental incompleto", "Médio completo", None, "Médio incompleto",
+                         "Sem escolaridade / Analfabeto", "Superior incompleto", "Fundamental completo", ""],
+        "numero_lesoes": pd.Series(["1", "2–5", "6—10", " 10+ ", 1, 1.0, "2-5", None, "3",
+                                    "1", "6-10", "10+"], dtype=object),
+        "nervos_afetados": ["Nenhum", "1–2", " 3 ou mais", "1-2", "Nenhum", "", "Nenhum",
+                            "3 ou mais", "Nenhum", "1—2", np.nan, "Nenhum"],
+        "classificacao_operacional": ["Paucibacilar (PB)", "Multibacilar (MB)"] * 6,
+        "forma_clinica": ["Indeterminada", "Tuberculoide", "Dimorfa", "Virchowiana", " Dimorfa",
+                          "Não sabe", "Dimorfa", "Indeterminada", "Tuberculoide", "Dimorfa", "Dimorfa",
+                          "Virchowiana"],
+    }).set_axis(pd.RangeIndex(100, 112))
+
+
+def _conferir(df: pd.DataFrame) -> None:
+    referencia, feats = _features_referencia(df), rc._build_feature_row_series(df)
+    assert list(feats.columns) == rc.FEATURE_COLS
+    esperado = referencia.astype({"NU_IDADE_N": "float64"})
+    pd.testing.assert_frame_equal(feats, esperado[rc.FEATURE_COLS], check_exact=True, check_dtype=False)
+    elig = rc._elegivel_mask(feats)
+    pd.testing.assert_series_equal(elig, _elegivel_referencia(referencia), check_names=False, check_dtype=False)
+    X, X_ref = feats.loc[elig], _matriz_referencia(referencia, elig)
+    pd.testing.assert_frame_equal(X, X_ref, check_exact=True)
+    np.testing.assert_array_equal(chaves_features(X), chaves_features(X_ref))
+    pd.testing.assert_frame_equal(rc.beneficiarios_com_score(df)[0], _com_score_referencia(df), check_exact=True)
+    scores = np.linspace(0, 1, 101)
+    assert list(rc.classificar_riscos(scores)) == [rc.classificar_risco(s) for s in scores]
+
+
+def verificar_equivalencia() -> None:
+    with _pasta_temporaria():
+        _conferir(_casos_de_borda())
+        _conferir(_como_load_sheet_data(5_000))
+        _conferir(_como_load_sheet_data(500).astype(object))
+    print("equivalência: ok")
+
+
+def _medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(f"{'linhas':>9} {'variáveis antes (s)':>20} {'depois (s)':>11} {'quadro antes (s)':>17} {'depois (s)':>11} {'ganho':>7}")
+    for n in (10_000, 100_000, 1_000_000):
+        df = _como_load_sheet_data(n)
+        with _pasta_temporaria():
+            rc.beneficiarios_com_score(df)  # scores já em cache: mede só a montagem
+            t_feat_ref = _medir(lambda: _features_referencia(df))
+            t_feat = _medir(lambda: rc._build_feature_row_series(df))
+            t_ref = _medir(lambda: _com_score_referencia(df))
+            t_novo = _medir(lambda: rc.beneficiarios_com_score(df))
+        print(f"{n:>9} {t_feat_ref:>20.3f} {t_feat:>11.3f} {t_ref:>17.3f} {t_novo:>11.3f} {t_ref / t_novo:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
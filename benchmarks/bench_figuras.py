@@ -0,0 +1,112 @@
+"""
+Figuras da página Dashboard: montagem com ``plotly.express`` + ``apply_plotly_style`` a cada
+execução contra o cache LRU de especificações JSON (``utils.figuras``), numa reexecução
+sem mudança de filtros (troca de aba, "Limpar filtros" sem filtro ativo).
+
+Antes de medir, confere que a figura servida do cache gera a mesma especificação enviada
+ao navegador que a figura montada, que filtros equivalentes dão a mesma chave e que o
+descarte por tamanho tira primeiro as figuras usadas há mais tempo.
+
+    python -m benchmarks.bench_figuras
+"""
+
+from __future__ import annotations
+
+import json
+import time
+
+import plotly.express as px
+import plotly.io as pio
+
+from benchmarks.sintetico import gerar_dados
+from utils import figuras
+from utils.colors import apply_plotly_style, discrete_color_map
+from utils.dashboard_data import LABEL_NULO, filtrar_e_agregar, prepare_beneficiarios_dashboard
+
+
+def _construtores(df_vis, agg) -> dict:
+    """Figuras como as da página: uma pizza, uma barra por coluna contada e o histograma de renda."""
+
+    def pizza(col):
+        counts = agg["contagens"][col]
+        cmap = discrete_color_map(counts.index, label_nulo=LABEL_NULO)
+        fig = px.pie(
+            values=counts.values,
+            names=counts.index.astype(str),
+            color=counts.index.astype(str),
+            color_discrete_map={str(k): v for k, v in cmap.items()},
+        )
+        fig.update_traces(textposition="inside", textinfo="percent+label")
+        return apply_plotly_style(fig)
+
+    def barra(col):
+        counts = agg["contagens"][col]
+        return apply_plotly_style(px.bar(x=counts.index.astype(str), y=counts.values), showlegend=False)
+
+    construtores = {c: (lambda c=c: pizza(c)) for c in ("sexo", "genero", "tipo_residencia", "categoria_hanseniase")}
+    construtores.update({c: (lambda c=c: barra(c)) for c in ("faixa_etaria", "bairro", "cor_raca_etnia")})
+    construtores["projetos"] = lambda: apply_plotly_style(
+        px.bar(x=agg["projetos"].index.astype(str), y=agg["projetos"].values), showlegend=False
+    )
+    construtores["renda"] = lambda: apply_plotly_style(px.histogram(df_vis, x="renda_per_capita_num", nbins=20))
+    return construtores
+
+
+def _enviada(fig) -> dict:
+    """Especificação que ``st.plotly_chart`` envia ao navegador."""
+    return json.loads(pio.to_json(fig.to_dict(), validate=False))
+
+
+def verificar_equivalencia() -> None:
+    df = prepare_beneficiarios_dashboard(gerar_dados(2_000))
+    df_vis, agg = filtrar_e_agregar(df, sexos=["Feminino"])
+    filtros = figuras.chave_filtros(sexos=["Feminino"], bairros=[], projetos=None)
+    assert filtros == figuras.chave_filtros(projetos=[], sexos=["Feminino", "Feminino"])
+    figuras.limpar_figuras()
+    for nome, construir in _construtores(df_vis, agg).items():
+        montada = construir()
+        figuras.figura(("v", filtros, nome), construir)
+        em_cache = figuras.figura(("v", filtros, nome), construir)
+        assert _enviada(em_cache) == _enviada(montada), nome
+    # limite para duas figuras do mesmo tamanho: a usada há mais tempo sai primeiro
+    figuras.limpar_figuras()
+    construir = _construtores(df_vis, agg)["sexo"]
+    limite = 2 * len(construir().to_json().encode("utf-8")) + 100
+    antes = figuras.figuras_cache_stats()
+    for nome in ("a", "b", "a", "c"):
+        figuras.figura(("v", (), nome), construir, limite=limite)
+    depois = figuras.figuras_cache_stats()
+    assert depois["descartes"] - antes["descartes"] == 1 and depois["bytes"] <= limite, depois
+    figuras.figura(("v", (), "a"), construir, limite=limite)
+    assert figuras.figuras_cache_stats()["hits"] - depois["hits"] == 1
+    figuras.figura(("v", (), "b"), construir, limite=limite)
+    assert figuras.figuras_cache_stats()["misses"] - depois["misses"] == 1
+    figuras.limpar_figuras()
+    print("equivalência: ok")
+
+
+def _execucao(construtores, chave) -> float:
+    t0 = time.perf_counter()
+    for nome, construir in construtores.items():
+        _enviada(figuras.figura(chave and (*chave, nome), construir))
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(f"{'linhas':>9} {'sem cache (s)':>14} {'1ª execução (s)':>16} {'reexecução (s)':>15} {'ganho':>7} {'JSON (KB)':>10}")
+    for n in (10_000, 100_000):
+        df = prepare_beneficiarios_dashboard(gerar_dados(n))
+        df_vis, agg = filtrar_e_agregar(df)
+        construtores = _construtores(df_vis, agg)
+        figuras.limpar_figuras()
+        chave = (n, figuras.chave_filtros())
+        t_sem = _execucao(construtores, None)
+        t_primeira = _execucao(construtores, chave)
+        t_reexec = _execucao(construtores, chave)
+        kb = figuras.figuras_cache_stats()["bytes"] / 1024
+        print(f"{n:>9} {t_sem:>14.3f} {t_primeira:>16.3f} {t_reexec:>15.3f} {t_sem / t_reexec:>6.1f}x {kb:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Filtros da página Dashboard: implementação anterior (``isin`` coluna a coluna e ``apply``
+por linha para projetos) contra ``selecao_dashboard``, que combina bitmaps empacotados
+(OU dentro de cada dimensão, E entre dimensões).
+
+Antes de medir, confere em combinações sorteadas de filtros que as duas máscaras são iguais
+e que ``apply_dashboard_filtros`` devolve as mesmas linhas. A montagem dos bitmaps (uma vez
+por versão da aba) aparece em coluna separada.
+
+    python -m benchmarks.bench_filtros
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sintetico import BAIRROS, PROJETOS, gerar_dados
+from utils.dashboard_data import (
+    apply_dashboard_filtros,
+    bitmaps_dashboard,
+    prepare_beneficiarios_dashboard,
+    selecao_dashboard,
+    split_projetos_celula,
+)
+
+OPCOES = {
+    "projetos": PROJETOS + ["inexistente"],
+    "bairros": BAIRROS + ["Não informado"],
+    "sexos": ["Masculino", "Feminino", "Outro", "Não informado"],
+    "tipos_residencia": ["Própria", "Alugada", "Cedida", "Invadida", "Outro"],
+    "categorias_hanseniase": ["Já teve hanseníase", "Não possui", "Não informado"],
+}
+COLUNAS = {
+    "bairros": "bairro",
+    "sexos": "sexo",
+    "tipos_residencia": "tipo_residencia",
+    "categorias_hanseniase": "categoria_hanseniase",
+}
+
+
+def _mascara_referencia(df: pd.DataFrame, **filtros) -> np.ndarray:
+    """Implementação anterior de ``apply_dashboard_filtros``, como máscara."""
+    mascara = pd.Series(True, index=df.index)
+    if filtros.get("projetos"):
+        sel = set(filtros["projetos"])
+        mascara &= df.apply(lambda row: bool(set(split_projetos_celula(row.get("projeto_acao"))) & sel), axis=1)
+    for chave, col in COLUNAS.items():
+        if filtros.get(chave):
+            mascara &= df[col].isin(filtros[chave])
+    return mascara.to_numpy()
+
+
+def _sortear(rng: np.random.Generator) -> dict:
+    filtros = {}
+    for chave, opcoes in OPCOES.items():
+        if rng.random() < 0.5:
+            filtros[chave] = list(rng.choice(opcoes, rng.integers(1, 4), replace=False))
+    return filtros
+
+
+def verificar_equivalencia() -> None:
+    df = prepare_beneficiarios_dashboard(gerar_dados(5_000))
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        filtros = _sortear(rng)
+        mascara = selecao_dashboard(df, **filtros)
+        esperado = _mascara_referencia(df, **filtros)
+        np.testing.assert_array_equal(esperado if mascara is None else mascara, esperado)
+        pd.testing.assert_frame_equal(apply_dashboard_filtros(df, **filtros), df[esperado])
+    print("equivalência: ok")
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(f"{'linhas':>9} {'filtros':>12} {'isin/apply (s)':>15} {'bitmaps (ms)':>13} {'montagem (s)':>13}")
+    cenarios = {
+        "bairro+sexo": {"bairros": BAIRROS[:5], "sexos": ["Feminino"]},
+        "projeto": {"projetos": PROJETOS[:2]},
+        "todos": {
+            "projetos": [PROJETOS[0]],
+            "bairros": BAIRROS[:20],
+            "tipos_residencia": ["Própria", "Alugada"],
+            "categorias_hanseniase": ["Não possui"],
+        },
+    }
+    for n in (100_000, 1_000_000):
+        df = prepare_beneficiarios_dashboard(gerar_dados(n))
+        t0 = time.perf_counter()
+        bitmaps_dashboard(df)
+        t_montagem = time.perf_counter() - t0
+        selecao_dashboard(df, sexos=["Feminino"])  # bitmaps em cache, como na página
+        for nome, filtros in cenarios.items():
+            t0 = time.perf_counter()
+            _mascara_referencia(df, **filtros)
+            t_ref = time.perf_counter() - t0
+            repeticoes = 200
+            t0 = time.perf_counter()
+            for _ in range(repeticoes):
+                selecao_dashboard(df, **filtros)
+            t_bits = (time.perf_counter() - t0) / repeticoes
+            print(f"{n:>9} {nome:>12} {t_ref:>15.3f} {t_bits * 1e3:>13.3f} {t_montagem:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Histogramas das páginas Dashboard (renda) e Vulnerabilidades (score): ``px.histogram``
+sobre as linhas, que envia todos os valores ao navegador, contra ``histograma`` (contagem
+com numpy no servidor) desenhado por ``figura_histograma``, uma barra por faixa.
+
+Antes de medir, confere que cada valor finito cai em exatamente uma faixa, igual a
+``pd.cut`` com as mesmas bordas (fechadas à esquerda), inclusive em casos de borda.
+
+    python -m benchmarks.bench_histograma
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from utils.dashboard_data import histograma
+from utils.figuras import figura_histograma
+
+BORDA = [
+    [],
+    [np.nan, None],
+    [5.0],
+    [3.0, 3.0, 3.0],
+    [0.0, 0.05, 0.1, 1.0],
+    [-12.5, 0.0, 7.25, 1e6],
+    ["1200.50", "", "abc", 300],
+]
+
+
+def _conferir(valores, **kw) -> None:
+    hist = histograma(valores, **kw)
+    v = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce").dropna().astype(float)
+    if kw.get("intervalo"):
+        lo, hi = kw["intervalo"]
+        v = v[(v >= lo) & (v <= hi)]
+    assert hist.contagens.sum() == len(v), (valores, hist)
+    if not len(hist.contagens):
+        return
+    assert len(hist.contagens) <= kw.get("nbins", 20) + 1
+    # a última borda só é fechada à direita quando o domínio é fixo
+    esperado = pd.cut(v, hist.bordas, right=False, include_lowest=True).value_counts(sort=False)
+    if kw.get("intervalo"):
+        esperado.iloc[-1] += int((v == hist.bordas[-1]).sum())
+    np.testing.assert_array_equal(hist.contagens, esperado.to_numpy())
+
+
+def verificar_equivalencia() -> None:
+    rng = np.random.default_rng(4)
+    for valores in BORDA:
+        _conferir(valores)
+    for _ in range(30):
+        _conferir(rng.gamma(2, rng.uniform(1, 1000), rng.integers(1, 2000)), nbins=int(rng.integers(5, 40)))
+    _conferir(rng.random(5000), nbins=30, intervalo=(0.0, 1.0))
+    _conferir([0.0, 1.0, 0.5], nbins=30, intervalo=(0.0, 1.0))
+    assert np.allclose(np.diff(histograma(rng.random(100), nbins=30, intervalo=(0.0, 1.0)).bordas), 0.05)
+    print("equivalência: ok")
+
+
+def _medir(fn) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    tamanho = len(fn().to_json())
+    return time.perf_counter() - t0, tamanho
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(
+        f"{'linhas':>9} {'px.histogram (s)':>17} {'JSON (KB)':>10} {'numpy (s)':>10} {'JSON (KB)':>10}"
+    )
+    rng = np.random.default_rng(0)
+    for n in (10_000, 100_000, 1_000_000):
+        df = pd.DataFrame({"renda_per_capita_num": rng.gamma(2, 300, n)})
+        t_px, kb_px = _medir(lambda: px.histogram(df, x="renda_per_capita_num", nbins=20))
+        t_np, kb_np = _medir(
+            lambda: figura_histograma(
+                histograma(df["renda_per_capita_num"], nbins=20), title="Renda", x_label="Renda (R$)"
+            )
+        )
+        print(f"{n:>9} {t_px:>17.3f} {kb_px / 1024:>10.0f} {t_np:>10.3f} {kb_np / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
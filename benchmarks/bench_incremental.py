@@ -0,0 +1,102 @@
+"""
+Nova leitura da aba Dados no quadro do dashboard: preparação do zero
+(``prepare_beneficiarios_dashboard`` + dtypes compactos) contra a preparação incremental de
+``load_dashboard_data``, que prepara só as linhas novas ou alteradas e as junta ao quadro
+anterior; numa virada de dia, só idade e faixa etária são recalculadas.
+
+Antes de medir, confere que o quadro incremental é igual ao preparado do zero (valores,
+dtypes e ordem das categorias) em cadastros novos, edições, exclusões, categorias que
+surgem ou somem e inteiros que mudam de largura.
+
+    python -m benchmarks.bench_incremental
+"""
+
+from __future__ import annotations
+
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils import carregamento, data
+from utils.dashboard_data import prepare_beneficiarios_dashboard
+from utils.memoria import aplicar_plano_dtypes
+
+ONTEM = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+
+
+def _ler(dados: pd.DataFrame) -> pd.DataFrame:
+    """Como ``load_sheet_data`` devolveria a aba com ``dados``."""
+    return data.normalize_sheet_columns(TextParser(como_valores_planilha(dados)).read(), "Dados")
+
+
+def _base(df: pd.DataFrame, dia: str) -> carregamento._Preparado:
+    ref = datetime.datetime.combine(datetime.date.fromisoformat(dia), datetime.time(12))
+    quadro = aplicar_plano_dtypes(prepare_beneficiarios_dashboard(df, ref_date=ref))
+    hashes = carregamento._hashes_linhas(df)
+    return carregamento._Preparado(quadro, hashes, carregamento._dtypes_assinatura(df), dia)
+
+
+def _cenarios(dados: pd.DataFrame):
+    """``(nome, dados alterados)``, um de cada vez (cada cópia da base ocupa memória)."""
+    rng = np.random.default_rng(3)
+    i = int(rng.integers(len(dados)))
+    cadastro = dados.iloc[[i]].assign(nome_completo="Cadastro Novo", bairro="Bairro Novo")
+    yield "cadastro", pd.concat([dados, cadastro], ignore_index=True)
+    editado = dados.copy()
+    editado.loc[i, ["sexo", "numero_filhos", "renda_per_capita"]] = ["Intersexo", 300, 1234.56]
+    yield "edição", editado
+    del editado
+    yield "exclusão", dados.drop(index=i).reset_index(drop=True)
+    yield "virada de dia", dados
+    yield "sem bairro", dados[dados["bairro"] != dados["bairro"].iloc[i]].reset_index(drop=True)
+    yield "reordenada", dados.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def _incremental(df: pd.DataFrame, base: carregamento._Preparado) -> pd.DataFrame | None:
+    return carregamento._preparar_incremental(df, carregamento._hashes_linhas(df), base)
+
+
+def verificar_equivalencia() -> None:
+    dados = gerar_dados(3_000)
+    for dia in (ONTEM, datetime.date.today().isoformat()):
+        base = _base(_ler(dados), dia)
+        for nome, alterados in _cenarios(dados):
+            df = _ler(alterados)
+            quadro = _incremental(df, base)
+            assert quadro is not None, nome
+            pd.testing.assert_frame_equal(quadro, carregamento._preparar(df), obj=nome)
+    # mais da metade das linhas mudou: prepara do zero
+    assert _incremental(_ler(gerar_dados(3_000, seed=1)), _base(_ler(dados), ONTEM)) is None
+    print("equivalência: ok")
+
+
+def _medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(f"{'linhas':>9} {'cenário':>14} {'do zero (s)':>12} {'incremental (s)':>16} {'ganho':>7} {'hash (s)':>9}")
+    for n in (100_000, 1_000_000):
+        dados = gerar_dados(n)
+        base = _base(_ler(dados), ONTEM)
+        for nome, alterados in _cenarios(dados):
+            if nome in ("sem bairro", "reordenada"):
+                break
+            df = _ler(alterados)
+            del alterados
+            t_hash = _medir(lambda: carregamento._hashes_linhas(df))
+            hashes = carregamento._hashes_linhas(df)
+            t_zero = _medir(lambda: carregamento._preparar(df))
+            t_inc = _medir(lambda: carregamento._preparar_incremental(df, hashes, base))
+            print(f"{n:>9} {nome:>14} {t_zero:>12.3f} {t_inc:>16.3f} {t_zero / t_inc:>6.1f}x {t_hash:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Salvar um novo beneficiário (Novo Cadastro): escritas separadas por aba contra o
+``SheetMutationJournal`` (um único ``batch_update`` atômico), no backend em memória.
+
+Antes de medir, confere que editar linhas que o próprio processo anexou não acrescenta
+linhas em branco à grade da aba (o ``Worksheet`` em cache não acompanha o crescimento) e
+que o lote é recusado inteiro, sem alterar nenhuma aba, se alguém incluiu uma linha direto
+na planilha depois da leitura.
+
+    python -m benchmarks.bench_journal
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("AJUSTA_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="ajusta-bench-"))
+logging.disable(logging.WARNING)
+
+from benchmarks.sintetico import PROJETOS, como_valores_planilha, gerar_dados
+from utils import data
+from utils.fake_sheets import FakeSpreadsheet
+
+LATENCIA_S = 0.05
+SEGUNDOS_POR_CELULA = 2e-6
+
+
+def _incrementar(df_projetos, nomes):
+    for nome in nomes:
+        idx = df_projetos.index[df_projetos["projeto"] == nome]
+        df_projetos.loc[idx[0], "quantidade_beneficiados"] += 1
+    return df_projetos
+
+
+def _dados(n: int) -> list[list]:
+    # aba já com a coluna de versão, como fica depois da primeira escrita do app
+    return como_valores_planilha(gerar_dados(n).assign(**{data.SYNC_COLUMNS["Dados"]: 1_700_000_000_000}))
+
+
+def _projetos() -> list[list]:
+    return [["projeto", "esta_ativo", "quantidade_beneficiados"]] + [[p, "Sim", 0] for p in PROJETOS]
+
+
+def verificar_grade() -> None:
+    n = 50
+    sp = FakeSpreadsheet()
+    ws = sp.add_worksheet("Dados", values=_dados(n))
+    data.use_spreadsheet(sp)
+    data.load_sheet_data("Dados", force_refresh=True)
+    for seed in (1, 2):
+        journal = data.SheetMutationJournal()
+        journal.append("Dados", gerar_dados(1, seed=seed))
+        journal.commit()
+        df = data.load_sheet_data("Dados")
+        df.loc[df.index[-1], "nome_completo"] = f"Editado {seed}"
+        journal = data.SheetMutationJournal()
+        journal.overwrite("Dados", df)
+        journal.commit()
+    assert ws._last_table_row() == n + 3, ws._last_table_row()
+    assert ws._grade[0] == n + 3, f"grade com {ws._grade[0] - n - 3} linhas em branco"
+    print("grade: ok")
+
+
+def verificar_posicoes() -> None:
+    sp = FakeSpreadsheet()
+    dados = sp.add_worksheet("Dados", values=_dados(50))
+    projetos = sp.add_worksheet("Projetos", values=_projetos())
+    data.use_spreadsheet(sp)
+    df_proj = _incrementar(data.load_sheet_data("Projetos", force_refresh=True), PROJETOS[-1:])
+    projetos.insert_row(["Projeto incluído na planilha", "Sim", 0], index=2)
+    antes = (dados.get_all_values(), projetos.get_all_values())
+    journal = data.SheetMutationJournal()
+    journal.append("Dados", gerar_dados(1, seed=1))
+    journal.overwrite("Projetos", df_proj)
+    try:
+        journal.commit()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("lote aceito depois de incluir uma linha na planilha")
+    assert (dados.get_all_values(), projetos.get_all_values()) == antes
+    print("posições: ok")
+
+
+def main() -> None:
+    verificar_grade()
+    verificar_posicoes()
+    n = 20_000
+    dados = _dados(n)
+    projetos = _projetos()
+    novo = gerar_dados(1, seed=1)
+    selecionados = list(PROJETOS[:2])
+
+    print(f"{'caminho':>10} {'tempo (s)':>10} {'chamadas':>9} {'células env.':>13}")
+    for nome in ("separado", "journal"):
+        sp = FakeSpreadsheet(latency_s=LATENCIA_S, seconds_per_cell=SEGUNDOS_POR_CELULA)
+        sp.add_worksheet("Dados", values=dados)
+        sp.add_worksheet("Projetos", values=projetos)
+        data.use_spreadsheet(sp)
+        data.load_sheet_data("Dados", force_refresh=True)
+        sp.reset_stats()
+        t0 = time.perf_counter()
+        if nome == "separado":
+            data.append_sheet_rows("Dados", novo)
+            df_proj = _incrementar(data.load_sheet_data("Projetos", force_refresh=True), selecionados)
+            data.write_sheet_diff("Projetos", df_proj)
+        else:
+            journal = data.SheetMutationJournal()
+            journal.append("Dados", novo)
+            df_proj = _incrementar(data.load_sheet_data("Projetos", force_refresh=True), selecionados)
+            journal.overwrite("Projetos", df_proj)
+            journal.commit()
+        dt = time.perf_counter() - t0
+        print(f"{nome:>10} {dt:>10.3f} {sum(sp.calls.values()):>9} {sp.cells_sent:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Memória do quadro do dashboard: ``prepare_beneficiarios_dashboard`` com os dtypes da
+leitura contra o mesmo quadro após ``aplicar_plano_dtypes`` (categorias, inteiros
+anuláveis pequenos, ``float32`` e strings Arrow).
+
+Antes de medir, confere que os valores não mudam (renda até os centavos), que filtros e
+agregados da página Dashboard dão o mesmo resultado nos dois quadros e que os motores
+``pandas``, ``cubo`` e ``duckdb`` concordam no quadro compacto.
+
+    python -m benchmarks.bench_memoria
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_categorias import _como_load_sheet_data
+from benchmarks.bench_dashboard_duckdb import FILTROS, _conferir
+from benchmarks.bench_filtros import _sortear
+from utils import dashboard_duckdb
+from utils.dashboard_data import filtrar_e_agregar, prepare_beneficiarios_dashboard
+from utils.memoria import FLOAT32, INTEIRO, PLANO_DADOS, aplicar_plano_dtypes, relatorio_memoria
+
+
+def _conferir_valores(original: pd.DataFrame, compacto: pd.DataFrame) -> None:
+    assert list(original.columns) == list(compacto.columns)
+    for col in original.columns:
+        a, b = original[col], compacto[col]
+        if PLANO_DADOS.get(col) in (FLOAT32, INTEIRO) and pd.api.types.is_numeric_dtype(a):
+            np.testing.assert_allclose(
+                b.to_numpy(dtype=float, na_value=np.nan), a.to_numpy(dtype=float), rtol=0, atol=0.005,
+                equal_nan=True, err_msg=col,
+            )
+            continue
+        assert (a.isna() == b.isna()).all(), col
+        ok = a.notna().to_numpy()
+        np.testing.assert_array_equal(
+            a.astype(object).to_numpy()[ok].astype(str), b.astype(object).to_numpy()[ok].astype(str), col
+        )
+
+
+def _conferir_agregados(original: tuple, compacto: tuple) -> None:
+    """Mesmas linhas e contagens; a renda média muda no máximo pelo arredondamento do ``float32``."""
+    (df_a, agg_a), (df_b, agg_b) = original, compacto
+    pd.testing.assert_index_equal(df_a.index, df_b.index)
+    for col, serie in agg_a["contagens"].items():
+        pd.testing.assert_series_equal(serie, agg_b["contagens"][col], check_categorical=False)
+    pd.testing.assert_series_equal(agg_a["projetos"], agg_b["projetos"])
+    for chave in ("n_total", "n_sem_renda", "soma_membros", "n_projetos"):
+        assert agg_a[chave] == agg_b[chave], chave
+    if agg_a["renda_media"] is None:
+        assert agg_b["renda_media"] is None
+    else:
+        assert math.isclose(agg_a["renda_media"], agg_b["renda_media"], rel_tol=1e-6)
+
+
+def verificar_equivalencia() -> None:
+    original = prepare_beneficiarios_dashboard(_como_load_sheet_data(5_000))
+    compacto = aplicar_plano_dtypes(original)
+    _conferir_valores(original, compacto)
+    motores = ["cubo", "duckdb"] if dashboard_duckdb.disponivel() else ["cubo"]
+    rng = np.random.default_rng(2)
+    for filtros in [*FILTROS.values(), *(_sortear(rng) for _ in range(30))]:
+        referencia = filtrar_e_agregar(compacto, engine="pandas", **filtros)
+        _conferir_agregados(filtrar_e_agregar(original, engine="pandas", **filtros), referencia)
+        for engine in motores:
+            _conferir(referencia, filtrar_e_agregar(compacto, engine=engine, **filtros))
+    print("equivalência: ok")
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(
+        f"{'linhas':>9} {'leitura (MB)':>13} {'preparado (MB)':>15} {'compacto (MB)':>14} "
+        f"{'redução':>8} {'conversão (s)':>14}"
+    )
+    for n in (10_000, 100_000, 1_000_000):
+        bruto = _como_load_sheet_data(n)
+        preparado = prepare_beneficiarios_dashboard(bruto)
+        t0 = time.perf_counter()
+        compacto = aplicar_plano_dtypes(preparado)
+        t_conversao = time.perf_counter() - t0
+        total = relatorio_memoria({"leitura": bruto, "preparado": preparado, "compacto": compacto}).loc["total"]
+        print(
+            f"{n:>9} {total['leitura']:>13.1f} {total['preparado']:>15.1f} {total['compacto']:>14.1f} "
+            f"{total['preparado'] / total['compacto']:>7.1f}x {t_conversao:>14.3f}"
+        )
+        if n == 100_000:
+            por_coluna = relatorio_memoria({"preparado": preparado, "compacto": compacto}).drop(index="total")
+            maiores = por_coluna.sort_values("preparado", ascending=False).head(10)
+            print(maiores.to_string(), end="\n\n")
+
+
+if __name__ == "__main__":
+    main()
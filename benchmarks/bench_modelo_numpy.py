@@ -0,0 +1,127 @@
+"""
+Inferência do modelo de risco clínico: ``predict_proba`` do pipeline scikit-learn contra a
+exportação para arrays numpy (``utils.modelo_numpy``), em uma linha (cadastro ou edição de
+um beneficiário) e em lotes de até 100 mil linhas.
+
+Antes de medir, confere que a exportação devolve exatamente (bit a bit) as mesmas
+probabilidades do pipeline, nas linhas elegíveis da base sintética e em linhas sorteadas
+em todo o domínio das variáveis, com categorias fora do treino, células vazias (que
+passam pela imputação) e valores sobre os limiares das árvores, também depois de gravada
+e relida do disco. O mesmo vale para um pipeline retreinado com árvores de mais de 64
+folhas (máscaras de várias palavras).
+
+    python -m benchmarks.bench_modelo_numpy
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_categorias import _como_load_sheet_data
+from benchmarks.bench_score_cache import _matriz
+from utils import modelo_numpy
+from utils.risco_clinico import FEATURE_COLS, get_clinical_risk_pipeline
+
+# Códigos possíveis de cada variável, com alguns fora do treino (CS_ESCOL_N 9 e 10, raça 9)
+DOMINIO = {
+    "CS_SEXO": ["M", "F"],
+    "CS_RACA": [1.0, 2.0, 3.0, 4.0, 5.0, 9.0],
+    "CS_ESCOL_N": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0],
+    "NU_LESOES": [0.0, 1.0, 3.0, 8.0, 12.0, 40.0],
+    "NERVOSAFET": [0.0, 1.0, 2.0, 5.0, 9.0],
+    "CLASSOPERA": [1.0, 2.0],
+    "FORMACLINI": [1.0, 2.0, 3.0, 4.0, 5.0],
+}
+
+
+def _sortear(n: int, seed: int = 0, vazios: float = 0.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({"NU_IDADE_N": rng.integers(0, 121, n).astype(float)})
+    for col, valores in DOMINIO.items():
+        X[col] = np.asarray(valores, dtype=object if col == "CS_SEXO" else float)[rng.integers(len(valores), size=n)]
+    if vazios:
+        for col in FEATURE_COLS:
+            X.loc[rng.random(n) < vazios, col] = np.nan
+    return X[FEATURE_COLS]
+
+
+def _nos_limiares(modelo: modelo_numpy.ModeloNumpy) -> pd.DataFrame:
+    """Variáveis numéricas exatamente sobre cada limiar das árvores e logo abaixo/acima dele."""
+    partes = []
+    for col, limiares in zip(modelo.numericas, modelo.limiares):
+        valores = np.concatenate([limiares, np.nextafter(limiares, -np.inf), np.nextafter(limiares, np.inf)])
+        X = _sortear(len(valores), seed=len(partes))
+        X[col] = valores
+        partes.append(X)
+    return pd.concat(partes, ignore_index=True)
+
+
+def _pipeline_profundo(pipeline, max_folhas: int = 300):
+    """Cópia do pipeline retreinada com árvores de até ``max_folhas`` folhas (mais de 64)."""
+    from sklearn.base import clone
+
+    X = _sortear(20_000, seed=4, vazios=0.05)
+    rng = np.random.default_rng(4)
+    y = (pipeline.predict_proba(X)[:, 1] + rng.normal(0, 0.2, len(X)) > 0.5).astype(int)
+    nome = pipeline.steps[-1][0]
+    profundo = clone(pipeline).set_params(**{
+        f"{nome}__max_depth": None, f"{nome}__max_leaf_nodes": max_folhas,
+        f"{nome}__min_samples_leaf": 1, f"{nome}__min_samples_split": 2, f"{nome}__n_estimators": 20,
+    })
+    return profundo.fit(X, y)
+
+
+def verificar_equivalencia() -> None:
+    for pipeline in (get_clinical_risk_pipeline(), _pipeline_profundo(get_clinical_risk_pipeline())):
+        _conferir(pipeline)
+    print("equivalência: ok")
+
+
+def _conferir(pipeline) -> None:
+    modelo = modelo_numpy.exportar(pipeline)
+    casos = [
+        _matriz(_como_load_sheet_data(20_000)),
+        _sortear(20_000),
+        _sortear(5_000, seed=1, vazios=0.1),
+        _sortear(1, seed=2),
+        _sortear(modelo_numpy.BLOCO_LINHAS + 1, seed=3),
+        _nos_limiares(modelo),
+    ]
+    with tempfile.TemporaryDirectory() as pasta:
+        path = Path(pasta) / "modelo"
+        modelo_numpy.salvar(modelo, path)
+        relido = modelo_numpy.carregar(path)  # mapeado do disco
+        for X in casos:
+            esperado = pipeline.predict_proba(X)[:, 1]
+            np.testing.assert_array_equal(modelo_numpy.prever_proba(modelo, X), esperado)
+            np.testing.assert_array_equal(modelo_numpy.prever_proba(relido, X), esperado)
+        del relido
+
+
+def _medir(fn, repeticoes: int = 1) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        fn()
+    return (time.perf_counter() - t0) / repeticoes
+
+
+def main() -> None:
+    verificar_equivalencia()
+    pipeline = get_clinical_risk_pipeline()
+    modelo = modelo_numpy.exportar(pipeline)
+    print(f"{'linhas':>9} {'scikit-learn (ms)':>18} {'numpy (ms)':>11} {'ganho':>7}")
+    for n in (1, 100, 10_000, 100_000):
+        X = _sortear(n)
+        repeticoes = 50 if n <= 100 else 1
+        t_sk = _medir(lambda: pipeline.predict_proba(X), repeticoes)
+        t_np = _medir(lambda: modelo_numpy.prever_proba(modelo, X), repeticoes)
+        print(f"{n:>9} {t_sk * 1000:>18.2f} {t_np * 1000:>11.2f} {t_sk / t_np:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+``normalize_sheet_columns`` na aba ``Dados``: ``Series.map(_display_str_cell)`` célula a
+célula contra a coerção vetorizada (``_display_str_series``).
+
+Antes de medir, confere que os dois caminhos produzem exatamente o mesmo resultado, na
+base sintética e em uma coluna com os casos de borda.
+
+    python -m benchmarks.bench_normalize
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils.data import _DADOS_COERCE_TO_STRING, _display_str_cell, _display_str_series, normalize_sheet_columns
+
+
+def _normalize_referencia(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação anterior (uma chamada Python por célula)."""
+    out = df.copy()
+    for name in out.columns:
+        if str(name).lower() in _DADOS_COERCE_TO_STRING:
+            out[name] = out[name].map(_display_str_cell).astype("string")
+    return out
+
+
+def _como_get_as_dataframe(n: int) -> pd.DataFrame:
+    """Aba sintética com os dtypes que o ``TextParser`` do ``get_as_dataframe`` devolve."""
+    valores = como_valores_planilha(gerar_dados(n))
+    return TextParser(valores).read()
+
+
+def _casos_de_borda() -> list[pd.Series]:
+    mista = pd.Series(
+        ["  a ", "", "   ", None, np.nan, pd.NA, True, False, 7, np.int64(8), 3.0, -0.0, 2.5,
+         1e20, 1e-7, 12345678901.0, np.float32(0.1), "0012", " 1.0 "],
+        dtype=object,
+    )
+    return [
+        mista,
+        mista[mista.map(lambda v: isinstance(v, str))],
+        pd.Series([1, None, 3], dtype=object),
+        pd.Series([1, 2.5, None], dtype=object),
+        pd.Series([None, np.nan], dtype=object),
+        pd.Series([1.0, np.nan, 2.25, 1e17, -3.0, 2.0**53, 2.0**53 + 2]),
+        pd.Series([1.5, None], dtype="float32"),
+        pd.Series([1, None], dtype="Int64"),
+        pd.Series([True, None], dtype="boolean"),
+        pd.Series([" x ", "", None], dtype="string"),
+        pd.Series([10, 20], dtype="int64"),
+        pd.Series([True, False]),
+    ]
+
+
+def verificar_equivalencia() -> None:
+    for s in _casos_de_borda():
+        esperado = s.map(_display_str_cell).astype("string")
+        pd.testing.assert_series_equal(_display_str_series(s), esperado)
+    df = _como_get_as_dataframe(5_000)
+    pd.testing.assert_frame_equal(normalize_sheet_columns(df, "Dados"), _normalize_referencia(df))
+    print("equivalência: ok")
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(f"{'linhas':>8} {'map (s)':>9} {'vetorizado (s)':>15} {'ganho':>7}")
+    for n in (10_000, 100_000):
+        df = _como_get_as_dataframe(n)
+        t0 = time.perf_counter()
+        _normalize_referencia(df)
+        t_ref = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        normalize_sheet_columns(df, "Dados")
+        t_vet = time.perf_counter() - t0
+        print(f"{n:>8} {t_ref:>9.3f} {t_vet:>15.3f} {t_ref / t_vet:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Operações sobre ``projeto_acao`` numa execução da página Dashboard (opções do filtro,
+filtro por projetos, contagem por projeto e número de projetos): implementação anterior,
+com ``split_projetos_celula`` linha a linha, contra o índice de projetos
+(``indice_projetos``), que separa cada célula distinta uma vez.
+
+Antes de medir, confere que os dois caminhos dão o mesmo resultado, com células de borda
+e com a coluna em ``object`` ou ``category``.
+
+    python -m benchmarks.bench_projetos
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sintetico import PROJETOS, gerar_dados
+from utils.dashboard_data import (
+    LABEL_NULO,
+    contagem_ordenada,
+    contagem_projetos,
+    explode_projetos_series,
+    linhas_com_projetos,
+    n_projetos_distintos,
+    prepare_beneficiarios_dashboard,
+    projetos_opcoes_filtro,
+    split_projetos_celula,
+)
+
+BORDA = [
+    " Horta Comunitária ,\tX, , Não informado", " , ", "Não informado, Cesta Básica", "<NA>",
+    LABEL_NULO, "", None, np.nan, "A, A, B", "B,A", "X",
+]
+
+
+def _referencia(df: pd.DataFrame, projetos: list[str]) -> tuple:
+    """Implementação anterior: explode e ``apply`` por linha."""
+    s = explode_projetos_series(df)
+    opcoes = sorted({x for x in s.unique() if x != LABEL_NULO})
+    sel = set(projetos)
+    mascara = df.apply(lambda row: bool(set(split_projetos_celula(row.get("projeto_acao"))) & sel), axis=1)
+    return opcoes, mascara.to_numpy(dtype=bool), contagem_ordenada(s), len(opcoes)
+
+
+def _indice(df: pd.DataFrame, projetos: list[str]) -> tuple:
+    return (
+        projetos_opcoes_filtro(df),
+        linhas_com_projetos(df, projetos),
+        contagem_projetos(df),
+        n_projetos_distintos(df),
+    )
+
+
+def _conferir(a: tuple, b: tuple) -> None:
+    assert a[0] == b[0]
+    np.testing.assert_array_equal(a[1], b[1])
+    pd.testing.assert_series_equal(a[2], b[2])
+    assert a[3] == b[3]
+
+
+def verificar_equivalencia() -> None:
+    df = prepare_beneficiarios_dashboard(gerar_dados(3_000))
+    celulas = df["projeto_acao"].astype(object)
+    celulas.iloc[: len(BORDA) * 5] = BORDA * 5
+    for dtype in (object, "category"):
+        df["projeto_acao"] = celulas.astype(dtype)
+        for projetos in ([], ["X"], ["Cesta Básica", "A"], [LABEL_NULO], ["inexistente"]):
+            _conferir(_referencia(df, projetos), _indice(df, projetos))
+            sub = df.iloc[::7]
+            _conferir(_referencia(sub, projetos), _indice(sub, projetos))
+    print("equivalência: ok")
+
+
+def _medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print(f"{'linhas':>9} {'por linha (s)':>14} {'índice (s)':>11} {'ganho':>7}")
+    for n in (10_000, 100_000, 1_000_000):
+        df = prepare_beneficiarios_dashboard(gerar_dados(n))
+        projetos = PROJETOS[:2]
+        _indice(df, projetos)  # índice montado uma vez por versão da aba
+        t_idx = _medir(lambda: _indice(df, projetos))
+        if n > 100_000:  # o caminho por linha levaria minutos
+            print(f"{n:>9} {'-':>14} {t_idx:>11.4f} {'-':>7}")
+            continue
+        t_ref = _medir(lambda: _referencia(df, projetos))
+        print(f"{n:>9} {t_ref:>14.3f} {t_idx:>11.4f} {t_ref / t_idx:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Scores de risco clínico da página Vulnerabilidades: ``predict_proba`` sobre todos os
+beneficiários elegíveis a cada nova versão da aba ``Dados`` contra o cache persistente
+por combinação de variáveis (``utils.score_cache``), que só chama o modelo para as
+combinações novas.
+
+Antes de medir, confere que o quadro com scores é idêntico (bit a bit) ao calculado sem
+cache, com o cache frio, quente, após edições, relido do disco (novo processo) e após a
+troca do modelo, e que o modelo só recebe as combinações ainda não pontuadas.
+
+    python -m benchmarks.bench_score_cache
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_categorias import _como_load_sheet_data
+from utils import risco_clinico, score_cache
+
+
+@contextmanager
+def _sem_cache():
+    """``beneficiarios_com_score`` como antes do cache: o modelo pontua todas as linhas."""
+    original = risco_clinico.scores_em_cache
+    risco_clinico.scores_em_cache = lambda X, versao, prever: prever(X)
+    try:
+        yield
+    finally:
+        risco_clinico.scores_em_cache = original
+
+
+@contextmanager
+def _pasta_temporaria():
+    original = score_cache.SCORES_DIR
+    with tempfile.TemporaryDirectory() as pasta:
+        score_cache.SCORES_DIR = Path(pasta)
+        score_cache.limpar_scores_memoria()
+        try:
+            yield
+        finally:
+            score_cache.SCORES_DIR = original
+            score_cache.limpar_scores_memoria()
+
+
+def _referencia(df: pd.DataFrame) -> pd.DataFrame:
+    with _sem_cache():
+        return risco_clinico.beneficiarios_com_score(df)[0]
+
+
+def _com_cache(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """Quadro com scores e o que o modelo recebeu nesta chamada."""
+    antes = score_cache.score_cache_stats()
+    out = risco_clinico.beneficiarios_com_score(df)[0]
+    depois = score_cache.score_cache_stats()
+    return out, {k: depois[k] - antes[k] for k in ("acertos", "calculados", "chamadas_modelo")}
+
+
+def _editar(df: pd.DataFrame, n: int) -> pd.DataFrame:
+    editado = df.copy()
+    linhas = editado.index[editado["numero_lesoes"] == "1"][:n]
+    editado.loc[linhas, "numero_lesoes"] = "10+"
+    return editado
+
+
+def verificar_equivalencia() -> None:
+    df = _como_load_sheet_data(5_000)
+    editado = _editar(df, 50)
+    with _pasta_temporaria():
+        frio, d = _com_cache(df)
+        pd.testing.assert_frame_equal(frio, _referencia(df), check_exact=True)
+        assert d["chamadas_modelo"] == 1 and d["acertos"] == 0, d
+        quente, d = _com_cache(df)
+        pd.testing.assert_frame_equal(quente, frio, check_exact=True)
+        assert d["chamadas_modelo"] == 0, d
+        out, d = _com_cache(editado)
+        pd.testing.assert_frame_equal(out, _referencia(editado), check_exact=True)
+        assert 0 < d["calculados"] <= 50, d
+        score_cache.limpar_scores_memoria()
+        out, d = _com_cache(editado)
+        pd.testing.assert_frame_equal(out, _referencia(editado), check_exact=True)
+        assert d["chamadas_modelo"] == 0, d
+        versao = risco_clinico.versao_modelo
+        risco_clinico.versao_modelo = lambda: "outro-modelo"
+        try:
+            out, d = _com_cache(df)
+        finally:
+            risco_clinico.versao_modelo = versao
+        pd.testing.assert_frame_equal(out, frio, check_exact=True)
+        assert d["acertos"] == 0, d
+    print("equivalência: ok")
+
+
+def _matriz(df: pd.DataFrame) -> pd.DataFrame:
+    """As linhas elegíveis como o modelo as recebe."""
+    feats = risco_clinico._build_feature_row_series(df)
+    X = feats.loc[risco_clinico._elegivel_mask(feats), risco_clinico.FEATURE_COLS]
+    return X.astype({c: float for c in risco_clinico.FEATURE_COLS if c != "CS_SEXO"})
+
+
+def _medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    verificar_equivalencia()
+    print("beneficiarios_com_score (montagem das variáveis + scores):")
+    print(
+        f"{'linhas':>9} {'sem cache (s)':>14} {'frio (s)':>9} {'quente (s)':>11} "
+        f"{'100 edições (s)':>16} {'ganho':>7} {'combinações':>12}"
+    )
+    matrizes = {}
+    for n in (10_000, 100_000):
+        df = _como_load_sheet_data(n)
+        editado = _editar(df, 100)
+        with _pasta_temporaria():
+            t_sem = _medir(lambda: _referencia(df))
+            t_frio = _medir(lambda: _com_cache(df))
+            t_quente = _medir(lambda: _com_cache(df))
+            t_edicao = _medir(lambda: _com_cache(editado))
+            entradas = sum(score_cache.score_cache_stats()["entradas"].values())
+        print(
+            f"{n:>9} {t_sem:>14.3f} {t_frio:>9.3f} {t_quente:>11.3f} "
+            f"{t_edicao:>16.3f} {t_sem / t_edicao:>6.1f}x {entradas:>12}"
+        )
+        matrizes[n] = (_matriz(df), _matriz(editado))
+
+    print("\nsó os scores (matriz de variáveis já montada):")
+    print(f"{'linhas':>9} {'predict_proba (s)':>18} {'quente (s)':>11} {'100 edições (s)':>16} {'ganho':>7}")
+    versao = risco_clinico.versao_modelo()
+    for n, (X, X_editado) in matrizes.items():
+        with _pasta_temporaria():
+            t_sem = _medir(lambda: risco_clinico._prever(X))
+            score_cache.scores_em_cache(X, versao, risco_clinico._prever)
+            t_quente = _medir(lambda: score_cache.scores_em_cache(X, versao, risco_clinico._prever))
+            t_edicao = _medir(lambda: score_cache.scores_em_cache(X_editado, versao, risco_clinico._prever))
+        print(f"{n:>9} {t_sem:>18.3f} {t_quente:>11.3f} {t_edicao:>16.3f} {t_sem / t_edicao:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
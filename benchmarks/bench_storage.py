@@ -0,0 +1,86 @@
+"""
+Aba ``Dados`` no Google Sheets (backend em memória, com latência simulada) contra os
+backends locais SQLite e Parquet (``utils/storage.py``): leitura completa, leitura de
+linhas avulsas, edição de um beneficiário e cadastro de um novo.
+
+Antes de medir, confere que cada backend devolve o mesmo DataFrame que a leitura do Sheets.
+
+    python -m benchmarks.bench_storage
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("AJUSTA_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="ajusta-bench-"))
+logging.disable(logging.WARNING)
+
+import pandas as pd
+
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils import data, storage
+from utils.fake_sheets import FakeSpreadsheet
+
+LATENCIA_S = 0.05
+SEGUNDOS_POR_CELULA = 2e-6
+
+
+def _medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def _backends(pasta: Path):
+    yield "sheets", None
+    yield "sqlite", storage.SQLiteBackend(pasta / "ajusta.sqlite")
+    yield "parquet", storage.ParquetBackend(pasta / "parquet")
+
+
+def main() -> None:
+    print(
+        f"{'linhas':>8} {'backend':>8} {'leitura (s)':>12} {'20 linhas (s)':>14} "
+        f"{'edição (s)':>11} {'cadastro (s)':>13}"
+    )
+    for n in (10_000, 100_000):
+        valores = como_valores_planilha(gerar_dados(n))
+        novo = gerar_dados(1, seed=n)
+        for nome, backend in _backends(Path(tempfile.mkdtemp(prefix="ajusta-storage-"))):
+            sp = FakeSpreadsheet(latency_s=LATENCIA_S, seconds_per_cell=SEGUNDOS_POR_CELULA)
+            sp.add_worksheet("Dados", values=valores)
+            data.use_spreadsheet(sp)
+            storage.use_storage(None)
+            data.clear_data_cache()
+            referencia = data.fetch_sheet_data("Dados")
+            if backend is not None:
+                storage.use_storage(backend)
+                data.copy_sheet_to_storage("Dados")
+                pd.testing.assert_frame_equal(data.load_sheet_data("Dados"), referencia)
+
+            t_leitura = _medir(lambda: data.load_sheet_data("Dados", force_refresh=True))
+            linhas = list(range(0, n, n // 20))
+            t_linhas = _medir(lambda: data.load_sheet_rows("Dados", linhas))
+
+            df = data.load_sheet_data("Dados")
+            i = n // 2
+            df.loc[i, "nome_completo"] = "Nome Editado"
+            df.loc[i, "bairro"] = "Bairro 07"
+            t_edicao = _medir(lambda: data.overwrite_sheet_data("Dados", df))
+            t_cadastro = _medir(lambda: data.update_sheet_data("Dados", novo))
+
+            final = data.load_sheet_data("Dados", force_refresh=True)
+            assert final.loc[i, "nome_completo"] == "Nome Editado"
+            assert len(final) == n + 1
+            print(
+                f"{n:>8} {nome:>8} {t_leitura:>12.3f} {t_linhas:>14.3f} "
+                f"{t_edicao:>11.3f} {t_cadastro:>13.3f}"
+            )
+    storage.use_storage(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Releitura da aba ``Dados`` depois de um cadastro novo e uma edição: leitura completa
+contra a sincronização incremental (``atualizado_em``), no backend em memória.
+
+    python -m benchmarks.bench_sync
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("AJUSTA_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="ajusta-bench-"))
+logging.disable(logging.WARNING)
+
+from benchmarks.sintetico import como_valores_planilha, gerar_dados
+from utils import data
+from utils.fake_sheets import FakeSpreadsheet
+
+LATENCIA_S = 0.05
+SEGUNDOS_POR_CELULA = 2e-6
+
+
+def main() -> None:
+    print(f"{'linhas':>8} {'caminho':>12} {'tempo (s)':>10} {'chamadas':>9} {'células rec.':>13}")
+    for n in (20_000, 100_000):
+        sp = FakeSpreadsheet(latency_s=LATENCIA_S, seconds_per_cell=SEGUNDOS_POR_CELULA)
+        sp.add_worksheet("Dados", values=como_valores_planilha(gerar_dados(n)))
+        data.use_spreadsheet(sp)
+        data.load_sheet_data("Dados", force_refresh=True)
+        data.update_sheet_data("Dados", gerar_dados(1, seed=1))  # cria a coluna de versão
+        df = data.load_sheet_data("Dados", force_refresh=True)
+        base = data.snapshot.read_snapshot("Dados")  # snapshot de antes das mudanças
+
+        # mudanças a sincronizar: um cadastro e uma edição
+        data.update_sheet_data("Dados", gerar_dados(1, seed=2))
+        df.loc[n // 2, "bairro"] = "Bairro 01"
+        data.write_sheet_diff("Dados", df)
+
+        for nome in ("completa", "incremental"):
+            data.snapshot.write_snapshot("Dados", base)
+            if nome == "completa":
+                data._ultima_leitura_completa.clear()
+            sp.reset_stats()
+            t0 = time.perf_counter()
+            data.fetch_sheet_data("Dados")
+            dt = time.perf_counter() - t0
+            print(f"{n:>8} {nome:>12} {dt:>10.3f} {sum(sp.calls.values()):>9} {sp.cells_received:>13}")
+
+
+if __name__ == "__main__":
+    main()
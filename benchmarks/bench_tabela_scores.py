@@ -0,0 +1,108 @@
+"""
+Pontuação por tabela (``AJUSTA_SCORE_TABELA``): o score de todas as combinações do domínio
+(idade 0–120 × vocabulários do formulário) guardado em ``float32`` ou ``float16`` e lido
+por índice, contra o modelo exportado para numpy e o ``predict_proba`` do scikit-learn.
+
+Antes de medir, confere que uma tabela ``float64`` devolve exatamente os scores do modelo
+(nas linhas elegíveis da base sintética e em todo o domínio), que as tabelas compactas
+devolvem esses scores arredondados para o tipo, que linhas fora do domínio são
+reconhecidas e que a tabela gravada e relida é a mesma. Mostra ainda o erro máximo e
+quantas combinações mudariam de categoria de risco em cada tipo.
+
+    python -m benchmarks.bench_tabela_scores
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_categorias import _como_load_sheet_data
+from benchmarks.bench_modelo_numpy import _sortear
+from benchmarks.bench_score_cache import _matriz
+from utils import tabela_scores
+from utils.risco_clinico import (
+    FEATURE_COLS,
+    _prever_modelo,
+    classificar_riscos,
+    eixos_dominio,
+    get_clinical_risk_pipeline,
+)
+
+
+def verificar_equivalencia() -> None:
+    eixos = eixos_dominio()
+    exata = tabela_scores.montar(FEATURE_COLS, eixos, _prever_modelo, np.float64)
+    assert len(exata.scores) == np.prod([len(e) for e in eixos])
+    dominio = tabela_scores.combinacoes(FEATURE_COLS, eixos)
+    elegiveis = _matriz(_como_load_sheet_data(20_000))
+    for X in (elegiveis, dominio.sample(50_000, random_state=0)):
+        scores, dentro = tabela_scores.consultar(exata, X)
+        assert dentro.all()
+        np.testing.assert_array_equal(scores, _prever_modelo(X))
+    # fora do domínio: categoria fora do vocabulário, idade fora de 0–120, células vazias
+    fora = _sortear(2_000, seed=5, vazios=0.05)
+    fora.loc[fora.index[:10], "NU_IDADE_N"] = 130.0
+    scores, dentro = tabela_scores.consultar(exata, fora)
+    esperado = np.ones(len(fora), dtype=bool)
+    for col, eixo in zip(FEATURE_COLS, eixos):
+        esperado &= fora[col].isin(eixo).to_numpy()
+    np.testing.assert_array_equal(dentro, esperado)
+    assert 0 < dentro.sum() < len(fora) and np.isnan(scores[~dentro]).all()
+    np.testing.assert_array_equal(scores[dentro], _prever_modelo(fora[dentro]))
+    for tipo, dtype in tabela_scores.TIPOS.items():
+        compacta = exata._replace(scores=exata.scores.astype(dtype))
+        scores, _ = tabela_scores.consultar(compacta, elegiveis)
+        np.testing.assert_array_equal(scores, _prever_modelo(elegiveis).astype(dtype).astype(np.float64))
+        with tempfile.TemporaryDirectory() as pasta:
+            path = Path(pasta) / f"tabela-{tipo}"
+            tabela_scores.salvar(compacta, path)
+            relida = tabela_scores.carregar(path)
+            assert tabela_scores._mesmos_eixos(relida, FEATURE_COLS, eixos)
+            np.testing.assert_array_equal(relida.scores, compacta.scores)
+            del relida
+    print("equivalência: ok")
+
+
+def _medir(fn, repeticoes: int = 1) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        fn()
+    return (time.perf_counter() - t0) / repeticoes
+
+
+def main() -> None:
+    verificar_equivalencia()
+    eixos = eixos_dominio()
+    t0 = time.perf_counter()
+    exata = tabela_scores.montar(FEATURE_COLS, eixos, _prever_modelo, np.float64)
+    t_montagem = time.perf_counter() - t0
+    categorias = classificar_riscos(exata.scores)
+    print(f"domínio: {len(exata.scores):,} combinações, montado em {t_montagem:.1f} s")
+    print(f"{'tipo':>8} {'tamanho (MB)':>13} {'erro máximo':>12} {'mudam de categoria':>19}")
+    tabelas = {}
+    for tipo, dtype in tabela_scores.TIPOS.items():
+        tabelas[tipo] = exata._replace(scores=exata.scores.astype(dtype))
+        aproximado = tabelas[tipo].scores.astype(np.float64)
+        erro = np.abs(aproximado - exata.scores).max()
+        mudam = int((classificar_riscos(aproximado) != categorias).sum())
+        print(f"{tipo:>8} {tabelas[tipo].scores.nbytes / 1e6:>13.1f} {erro:>12.1e} {mudam:>19}")
+
+    pipeline = get_clinical_risk_pipeline()
+    dominio = tabela_scores.combinacoes(FEATURE_COLS, eixos)
+    print(f"\n{'linhas':>9} {'scikit-learn (ms)':>18} {'numpy (ms)':>11} {'tabela (ms)':>12}")
+    for n in (1, 100, 10_000, 100_000):
+        X: pd.DataFrame = dominio.sample(n, random_state=n).reset_index(drop=True)
+        repeticoes = 50 if n <= 100 else 1
+        t_sk = _medir(lambda: pipeline.predict_proba(X), repeticoes)
+        t_np = _medir(lambda: _prever_modelo(X), repeticoes)
+        t_tab = _medir(lambda: tabela_scores.consultar(tabelas["float32"], X), repeticoes)
+        print(f"{n:>9} {t_sk * 1000:>18.2f} {t_np * 1000:>11.2f} {t_tab * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Gerador de abas sintéticas no formato da aba ``Dados`` para os benchmarks."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+BAIRROS = [f"Bairro {i:02d}" for i in range(40)]
+PROJETOS = ["Horta Comunitária", "Reforço Escolar", "Oficina de Costura", "Grupo de Autocuidado", "Cesta Básica"]
+
+_OPCOES = {
+    "sexo": ["Masculino", "Feminino", "Outro", ""],
+    "genero": ["Cisgênero", "Transgênero", "Não-binário", "Outro", ""],
+    "cor_raca_etnia": ["Branca", "Parda", "Preta", "Amarela", "Indígena", "Não informado", ""],
+    "escolaridade": [
+        "Sem escolaridade / Analfabeto", "Fundamental incompleto", "Fundamental completo",
+        "Médio incompleto", "Médio completo", "Superior incompleto", "Superior completo",
+        "Pós-graduação", "Não informado", "",
+    ],
+    "ocupacao": ["Estudante", "Aposentado", "Do lar / Dona de casa", "Outro", ""],
+    "tipo_residencia": ["Própria", "Alugada", "Cedida", "Invadida", "Outro", ""],
+    "acesso_agua": ["Sim", "Não", "Parcial", ""],
+    "acesso_esgoto": ["Sim", "Não", "Parcial", ""],
+    "acesso_energia": ["Sim", "Não", "Parcial", ""],
+    "estado_civil": ["Solteiro(a)", "Casado(a)", "Divorciado(a)", "Viúvo(a)", "União Estável", ""],
+    "ja_teve_hanseniase": ["Sim", "Não", ""],
+    "classificacao_operacional": ["Paucibacilar (PB)", "Multibacilar (MB)", "Não sabe", ""],
+    "forma_clinica": ["Indeterminada", "Tuberculoide", "Dimorfa", "Virchowiana", "Não sabe", ""],
+    "numero_lesoes": ["1", "2–5", "6–10", "10+", "Não sabe", ""],
+    "nervos_afetados": ["Nenhum", "1–2", "3 ou mais", "Não sabe", ""],
+    "grau_incapacidade": ["Grau 0 – sem incapacidade", "Grau 1 – perda de sensibilidade", "Não avaliado", ""],
+}
+
+
+def gerar_dados(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    DataFrame com ``n`` beneficiários e os tipos mistos que o ``get_as_dataframe`` devolve
+    (CPF e telefone às vezes numéricos, vazios como NaN, números inteiros como float).
+    """
+    rng = np.random.default_rng(seed)
+    nasc = pd.Timestamp("1940-01-01") + pd.to_timedelta(rng.integers(0, 80 * 365, n), unit="D")
+    membros = rng.integers(1, 9, n)
+    renda = np.round(rng.gamma(2.0, 600.0, n), 2)
+    df = pd.DataFrame({
+        "nome_completo": [f"Beneficiário {i}" for i in range(n)],
+        "cpf": np.where(rng.random(n) < 0.5, rng.integers(10**10, 10**11, n).astype(object),
+                        [f"{i:011d}" for i in range(n)]),
+        "rg": np.where(rng.random(n) < 0.3, np.nan, rng.integers(10**6, 10**8, n).astype(float)),
+        "data_nascimento": np.where(rng.random(n) < 0.05, "", nasc.strftime("%d/%m/%Y")),
+        "endereco": np.where(rng.random(n) < 0.2, rng.integers(1, 2000, n).astype(object),
+                             [f"Rua {i % 300}, {i % 97}" for i in range(n)]),
+        "bairro": rng.choice(BAIRROS + [""], n),
+        "telefone": np.where(rng.random(n) < 0.1, np.nan, rng.integers(85_900_000_000, 85_999_999_999, n).astype(float)),
+        "anos_residencia": rng.integers(0, 60, n),
+        "numero_filhos": rng.integers(0, 8, n),
+        "numero_membros_familia": membros,
+        "renda_bruta_total": np.round(renda * membros, 2),
+        "renda_per_capita": np.where(rng.random(n) < 0.1, np.nan, renda),
+        "ano_diagnostico_hanseniase": np.where(rng.random(n) < 0.7, np.nan, rng.integers(1980, 2025, n).astype(float)),
+        "projeto_acao": [
+            ", ".join(rng.choice(PROJETOS, k, replace=False)) if k else ""
+            for k in rng.integers(0, 4, n)
+        ],
+        "situacao_hanseniase": rng.choice(["Em tratamento", "Curado", ""], n),
+        "responsavel_preenchimento": rng.choice(["Ana", "Bruno", "Carla"], n),
+        "responsavel_entrevista": rng.choice(["Ana", "Bruno", "Carla", ""], n),
+    })
+    for col, opcoes in _OPCOES.items():
+        df[col] = rng.choice(opcoes, n)
+    return df.where(df.ne(""), np.nan)
+
+
+def como_valores_planilha(df: pd.DataFrame) -> list[list]:
+    """Cabeçalho + linhas como ``get_all_values`` devolveria (vazio para NaN)."""
+    linhas = df.astype(object).where(df.notna(), "").values.tolist()
+    return [[str(c) for c in df.columns]] + linhas
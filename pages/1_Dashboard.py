@@ -11,14 +11,13 @@ from utils.colors import (
 )
 from utils.dashboard_data import (
     LABEL_NULO,
-    apply_dashboard_filtros,
-    count_projetos_explodidos,
-    n_projetos_distintos,
+    filtrar_e_agregar,
+    histograma,
     ordenar_faixas_etarias,
-    prepare_beneficiarios_dashboard,
     projetos_opcoes_filtro,
 )
-from utils.data import load_sheet_data
+from utils.carregamento import dashboard_data_version, load_dashboard_data
+from utils.figuras import chave_filtros, figura, figura_histograma
 
 auth.check_auth()
 
@@ -28,8 +27,7 @@ st.set_page_config(
     layout="wide",
 )
 
-df_raw = load_sheet_data("Dados")
-df_prep_full = prepare_beneficiarios_dashboard(df_raw)
+df_prep_full = load_dashboard_data()
 
 if "dash_filter_gen" not in st.session_state:
     st.session_state.dash_filter_gen = 0
@@ -65,7 +63,7 @@ if st.sidebar.button("Limpar filtros"):
     st.session_state.dash_filter_gen += 1
     st.rerun()
 
-df_vis = apply_dashboard_filtros(
+df_vis, agg = filtrar_e_agregar(
     df_prep_full,
     projetos=sel_proj or None,
     bairros=sel_bairro or None,
@@ -74,6 +72,16 @@ df_vis = apply_dashboard_filtros(
     categorias_hanseniase=sel_hans or None,
 )
 
+# figuras em cache por (versão dos dados, filtros, gráfico): trocar de aba não as remonta
+versao_dados = dashboard_data_version(df_prep_full)
+filtros_ativos = chave_filtros(
+    projetos=sel_proj,
+    bairros=sel_bairro,
+    sexos=sel_sexo,
+    tipos_residencia=sel_tipo,
+    categorias_hanseniase=sel_hans,
+)
+
 st.title("Dashboard — AJUSTA Data Hub")
 st.markdown("---")
 
@@ -82,28 +90,41 @@ if df_vis.empty:
     st.stop()
 
 
-def pie_chart(counts: pd.Series, title: str) -> None:
+def grafico(nome: str, construir) -> None:
+    """Mostra a figura ``nome``; ``construir`` só roda quando ela não está no cache de figuras."""
+    chave = (versao_dados, filtros_ativos, nome) if versao_dados is not None else None
+    st.plotly_chart(figura(chave, construir), use_container_width=True)
+
+
+def pie_chart(counts: pd.Series, title: str, nome: str) -> None:
     if counts.empty:
         st.info("Sem dados para este gráfico.")
         return
-    cmap = discrete_color_map(counts.index, label_nulo=LABEL_NULO)
-    fig = px.pie(
-        values=counts.values,
-        names=counts.index.astype(str),
-        title=title,
-        color=counts.index.astype(str),
-        color_discrete_map={str(k): v for k, v in cmap.items()},
-    )
-    fig.update_traces(
-        textposition="inside",
-        textinfo="percent+label",
-        marker=dict(line=dict(color="#FFFFFF", width=2)),
-    )
-    fig = apply_plotly_style(fig)
-    st.plotly_chart(fig, use_container_width=True)
+
+    def construir():
+        cmap = discrete_color_map(counts.index, label_nulo=LABEL_NULO)
+        fig = px.pie(
+            values=counts.values,
+            names=counts.index.astype(str),
+            title=title,
+            color=counts.index.astype(str),
+            color_discrete_map={str(k): v for k, v in cmap.items()},
+        )
+        fig.update_traces(
+            textposition="inside",
+            textinfo="percent+label",
+            marker=dict(line=dict(color="#FFFFFF", width=2)),
+        )
+        return apply_plotly_style(fig)
+
+    grafico(nome, construir)
 
 
-def matriz_acesso(df: pd.DataFrame) -> pd.DataFrame:
+def contagem(col: str) -> pd.Series:
+    return agg["contagens"].get(col, pd.Series(dtype=int))
+
+
+def matriz_acesso() -> pd.DataFrame:
     mapping = [
         ("Água", "acesso_agua"),
         ("Esgoto", "acesso_esgoto"),
@@ -112,9 +133,9 @@ def matriz_acesso(df: pd.DataFrame) -> pd.DataFrame:
     series_list = {}
     all_idx = set()
     for label, col in mapping:
-        if col not in df.columns:
+        if col not in agg["contagens"]:
             continue
-        vc = df[col].value_counts()
+        vc = agg["contagens"][col]
         series_list[label] = vc
         all_idx.update(vc.index.tolist())
     if not series_list:
@@ -142,54 +163,54 @@ with tab_visao:
         "Todos os indicadores refletem apenas os beneficiários que passaram pelos filtros ativos na sidebar."
     )
     c1, c2, c3, c4 = st.columns(4)
-    n_total = len(df_vis)
     with c1:
-        st.metric("Total de beneficiários", n_total)
+        st.metric("Total de beneficiários", agg["n_total"])
     with c2:
-        r = df_vis["renda_per_capita_num"]
-        if r.notna().any():
-            st.metric("Renda per capita média", f"R$ {r.mean():.2f}")
+        if agg["renda_media"] is not None:
+            st.metric("Renda per capita média", f"R$ {agg['renda_media']:.2f}")
         else:
             st.metric("Renda per capita média", "—")
     with c3:
-        memb = df_vis["numero_membros_familia_num"]
-        if memb.notna().any():
-            st.metric("Soma de membros no domicílio (registros)", f"{int(memb.sum(skipna=True))}")
+        if agg["soma_membros"] is not None:
+            st.metric("Soma de membros no domicílio (registros)", f"{agg['soma_membros']}")
         else:
             st.metric("Soma de membros no domicílio (registros)", "—")
     with c4:
-        st.metric("Projetos distintos (citados)", n_projetos_distintos(df_vis))
+        st.metric("Projetos distintos (citados)", agg["n_projetos"])
 
 with tab_demo:
     st.subheader("Demografia")
     c1, c2 = st.columns(2)
     with c1:
         st.markdown("#### Sexo")
-        s_counts = df_vis["sexo"].value_counts() if "sexo" in df_vis.columns else pd.Series()
-        pie_chart(s_counts, "Distribuição por sexo")
+        s_counts = contagem("sexo")
+        pie_chart(s_counts, "Distribuição por sexo", "sexo")
         st.caption(f"Distribuição por sexo. Cadastros sem essa informação aparecem como '{LABEL_NULO}'.")
     with c2:
         st.markdown("#### Gênero")
-        g_counts = df_vis["genero"].value_counts() if "genero" in df_vis.columns else pd.Series()
-        pie_chart(g_counts, "Distribuição por gênero")
+        g_counts = contagem("genero")
+        pie_chart(g_counts, "Distribuição por gênero", "genero")
         st.caption(f"Distribuição por identidade de gênero autodeclarada. Cadastros sem resposta aparecem como '{LABEL_NULO}'.")
 
     st.markdown("#### Faixa etária")
-    faixa_counts = df_vis["faixa_etaria"].value_counts() if "faixa_etaria" in df_vis.columns else pd.Series()
+    faixa_counts = contagem("faixa_etaria")
     order = ordenar_faixas_etarias(faixa_counts.index)
     faixa_ord = faixa_counts.reindex(order).fillna(0).astype(int)
-    cmap_faixa = discrete_color_map(faixa_ord.index, label_nulo=LABEL_NULO)
-    fig_idade = px.bar(
-        x=faixa_ord.index.astype(str),
-        y=faixa_ord.values,
-        title="Distribuição por faixa etária",
-        labels={"x": "Faixa etária", "y": "Quantidade"},
-        color=faixa_ord.index.astype(str),
-        color_discrete_map={str(k): v for k, v in cmap_faixa.items()},
-    )
-    fig_idade.update_traces(marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)))
-    fig_idade = apply_plotly_style(fig_idade, showlegend=False)
-    st.plotly_chart(fig_idade, use_container_width=True)
+
+    def fig_idade():
+        cmap_faixa = discrete_color_map(faixa_ord.index, label_nulo=LABEL_NULO)
+        fig = px.bar(
+            x=faixa_ord.index.astype(str),
+            y=faixa_ord.values,
+            title="Distribuição por faixa etária",
+            labels={"x": "Faixa etária", "y": "Quantidade"},
+            color=faixa_ord.index.astype(str),
+            color_discrete_map={str(k): v for k, v in cmap_faixa.items()},
+        )
+        fig.update_traces(marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)))
+        return apply_plotly_style(fig, showlegend=False)
+
+    grafico("faixa_etaria", fig_idade)
     st.caption(
         f"Faixa etária calculada a partir da data de nascimento. "
         f"Beneficiários sem data válida são agrupados em '{LABEL_NULO}'."
@@ -197,23 +218,26 @@ with tab_demo:
 
     st.subheader("Localização")
     st.markdown("#### Bairro")
-    b_counts = df_vis["bairro"].value_counts() if "bairro" in df_vis.columns else pd.Series()
+    b_counts = contagem("bairro")
     if b_counts.empty:
         st.info("Sem dados de bairro.")
     else:
-        fig_b = px.bar(
-            x=b_counts.values,
-            y=b_counts.index.astype(str),
-            orientation="h",
-            title="Beneficiários por bairro",
-            labels={"x": "Quantidade", "y": "Bairro"},
-        )
-        colors_b = discrete_colors_list(b_counts.index, label_nulo=LABEL_NULO)
-        fig_b.update_traces(
-            marker=dict(color=colors_b, line=dict(color=AJUSTA_COLORS["dark"], width=0.5))
-        )
-        fig_b = apply_plotly_style(fig_b, showlegend=False)
-        st.plotly_chart(fig_b, use_container_width=True)
+
+        def fig_b():
+            fig = px.bar(
+                x=b_counts.values,
+                y=b_counts.index.astype(str),
+                orientation="h",
+                title="Beneficiários por bairro",
+                labels={"x": "Quantidade", "y": "Bairro"},
+            )
+            colors_b = discrete_colors_list(b_counts.index, label_nulo=LABEL_NULO)
+            fig.update_traces(
+                marker=dict(color=colors_b, line=dict(color=AJUSTA_COLORS["dark"], width=0.5))
+            )
+            return apply_plotly_style(fig, showlegend=False)
+
+        grafico("bairro", fig_b)
         st.caption(f"Quantidade de beneficiários por bairro. Cadastros sem bairro aparecem como '{LABEL_NULO}'.")
 
 with tab_moradia:
@@ -221,27 +245,28 @@ with tab_moradia:
     c1, c2 = st.columns(2)
     with c1:
         st.markdown("#### Tipo de residência")
-        m_counts = (
-            df_vis["tipo_residencia"].value_counts() if "tipo_residencia" in df_vis.columns else pd.Series()
-        )
-        pie_chart(m_counts, "Tipo de residência")
+        m_counts = contagem("tipo_residencia")
+        pie_chart(m_counts, "Tipo de residência", "tipo_residencia")
         st.caption("Distribuição por tipo de moradia: própria, alugada, cedida, entre outras.")
 
     with c2:
         st.markdown("#### Acesso a serviços básicos")
-        acc_df = matriz_acesso(df_vis)
+        acc_df = matriz_acesso()
         if acc_df.empty:
             st.info("Sem colunas de acesso (água, esgoto, energia).")
         else:
-            fig_a = px.bar(
-                acc_df,
-                barmode="group",
-                title="Acesso a água, esgoto e energia",
-                color_discrete_sequence=discrete_colors_list(acc_df.columns, label_nulo=LABEL_NULO),
-            )
-            fig_a.update_layout(legend_title_text="Resposta")
-            fig_a = apply_plotly_style(fig_a)
-            st.plotly_chart(fig_a, use_container_width=True)
+
+            def fig_a():
+                fig = px.bar(
+                    acc_df,
+                    barmode="group",
+                    title="Acesso a água, esgoto e energia",
+                    color_discrete_sequence=discrete_colors_list(acc_df.columns, label_nulo=LABEL_NULO),
+                )
+                fig.update_layout(legend_title_text="Resposta")
+                return apply_plotly_style(fig)
+
+            grafico("acesso", fig_a)
             st.caption(
                 "Quantidade de respostas por serviço básico (água, esgoto, energia). "
                 "Compara o acesso entre os três serviços."
@@ -249,23 +274,26 @@ with tab_moradia:
 
 with tab_proj_saude:
     st.subheader("Projetos")
-    p_counts = count_projetos_explodidos(df_vis)
+    p_counts = agg["projetos"]
     if p_counts.empty:
         st.info("Sem dados de projeto/ação.")
     else:
-        fig_p = px.bar(
-            x=p_counts.index.astype(str),
-            y=p_counts.values,
-            title="Participação por projeto (linhas podem citar vários projetos)",
-            labels={"x": "Projeto", "y": "Menções"},
-            color=p_counts.index.astype(str),
-            color_discrete_map={
-                str(k): v for k, v in discrete_color_map(p_counts.index, label_nulo=LABEL_NULO).items()
-            },
-        )
-        fig_p.update_traces(marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)))
-        fig_p = apply_plotly_style(fig_p, showlegend=False, xaxis_tickangle=-45)
-        st.plotly_chart(fig_p, use_container_width=True)
+
+        def fig_p():
+            fig = px.bar(
+                x=p_counts.index.astype(str),
+                y=p_counts.values,
+                title="Participação por projeto (linhas podem citar vários projetos)",
+                labels={"x": "Projeto", "y": "Menções"},
+                color=p_counts.index.astype(str),
+                color_discrete_map={
+                    str(k): v for k, v in discrete_color_map(p_counts.index, label_nulo=LABEL_NULO).items()
+                },
+            )
+            fig.update_traces(marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)))
+            return apply_plotly_style(fig, showlegend=False, xaxis_tickangle=-45)
+
+        grafico("projetos", fig_p)
         st.caption(
             f"Um beneficiário vinculado a vários projetos é contado em cada um deles. "
             f"'{LABEL_NULO}' indica cadastros sem projeto."
@@ -275,23 +303,15 @@ with tab_proj_saude:
     h_c1, h_c2 = st.columns(2)
     with h_c1:
         st.markdown("#### Visão geral")
-        h_counts = (
-            df_vis["categoria_hanseniase"].value_counts()
-            if "categoria_hanseniase" in df_vis.columns
-            else pd.Series()
-        )
+        h_counts = contagem("categoria_hanseniase")
         if h_counts.empty:
             st.info("Nenhum dado de hanseníase disponível.")
         else:
-            pie_chart(h_counts, "Situação referente à hanseníase")
+            pie_chart(h_counts, "Situação referente à hanseníase", "categoria_hanseniase")
             st.caption("Situação de cada beneficiário em relação à hanseníase, conforme informado no cadastro.")
     with h_c2:
         st.markdown("#### Estatísticas")
-        h_tab = (
-            df_vis["categoria_hanseniase"].value_counts()
-            if "categoria_hanseniase" in df_vis.columns
-            else pd.Series(dtype=int)
-        )
+        h_tab = contagem("categoria_hanseniase")
         if h_tab.empty:
             st.info("Nenhum dado agregado de hanseníase.")
         else:
@@ -305,22 +325,20 @@ with tab_renda:
     r1, r2 = st.columns(2)
     with r1:
         st.markdown("#### Renda per capita")
-        n_sem = int(df_vis["renda_per_capita_num"].isna().sum())
-        st.metric("Cadastros sem renda informada", n_sem)
-        if df_vis["renda_per_capita_num"].notna().any():
-            fig_r = px.histogram(
-                df_vis,
-                x="renda_per_capita_num",
-                nbins=20,
-                title="Distribuição de renda per capita (R$)",
-                labels={"renda_per_capita_num": "Renda (R$)", "count": "Quantidade"},
-            )
-            fig_r.update_traces(
-                marker_color=AJUSTA_COLORS["primary"],
-                marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)),
-            )
-            fig_r = apply_plotly_style(fig_r)
-            st.plotly_chart(fig_r, use_container_width=True)
+        st.metric("Cadastros sem renda informada", agg["n_sem_renda"])
+        if agg["renda_media"] is not None:
+
+            def fig_r():
+                fig = figura_histograma(
+                    histograma(df_vis["renda_per_capita_num"], nbins=20),
+                    title="Distribuição de renda per capita (R$)",
+                    x_label="Renda (R$)",
+                    cor=AJUSTA_COLORS["primary"],
+                )
+                fig.update_traces(marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)))
+                return apply_plotly_style(fig)
+
+            grafico("renda", fig_r)
         else:
             st.info("Não há valores numéricos de renda para histograma.")
         st.caption(
@@ -329,24 +347,25 @@ with tab_renda:
         )
     with r2:
         st.markdown("#### Cor / raça / etnia")
-        raca_counts = (
-            df_vis["cor_raca_etnia"].value_counts() if "cor_raca_etnia" in df_vis.columns else pd.Series()
-        )
+        raca_counts = contagem("cor_raca_etnia")
         if raca_counts.empty:
             st.info("Sem dados de cor/raça/etnia.")
         else:
-            cmap_r = discrete_color_map(raca_counts.index, label_nulo=LABEL_NULO)
-            fig_ra = px.bar(
-                x=raca_counts.index.astype(str),
-                y=raca_counts.values,
-                title="Distribuição por cor, raça ou etnia",
-                labels={"x": "Categoria", "y": "Quantidade"},
-                color=raca_counts.index.astype(str),
-                color_discrete_map={str(k): v for k, v in cmap_r.items()},
-            )
-            fig_ra.update_traces(marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)))
-            fig_ra = apply_plotly_style(fig_ra, showlegend=False)
-            st.plotly_chart(fig_ra, use_container_width=True)
+
+            def fig_ra():
+                cmap_r = discrete_color_map(raca_counts.index, label_nulo=LABEL_NULO)
+                fig = px.bar(
+                    x=raca_counts.index.astype(str),
+                    y=raca_counts.values,
+                    title="Distribuição por cor, raça ou etnia",
+                    labels={"x": "Categoria", "y": "Quantidade"},
+                    color=raca_counts.index.astype(str),
+                    color_discrete_map={str(k): v for k, v in cmap_r.items()},
+                )
+                fig.update_traces(marker=dict(line=dict(color=AJUSTA_COLORS["dark"], width=1)))
+                return apply_plotly_style(fig, showlegend=False)
+
+            grafico("cor_raca_etnia", fig_ra)
         st.caption(f"Distribuição por cor, raça ou etnia autodeclarada. Cadastros sem resposta aparecem como '{LABEL_NULO}'.")
 
 st.markdown("---")
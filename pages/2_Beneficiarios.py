@@ -14,10 +14,15 @@ from utils.beneficiario_view import (
     rotulo_linha_select,
     valor_exibicao,
 )
-from utils.dashboard_data import prepare_beneficiarios_dashboard
-from utils.data import load_sheet_data, overwrite_sheet_data, refresh_after_sheet_mutation
+from utils.carregamento import load_dashboard_data
+from utils.data import (
+    SheetMutationJournal,
+    commit_sheet_mutations,
+    load_sheet_data,
+    refresh_after_sheet_mutation,
+)
 
-def _adjust_project_counts(old_str: str, new_str: str) -> None:
+def _adjust_project_counts(old_str: str, new_str: str, journal: SheetMutationJournal) -> None:
     def _parse(s):
         return {p.strip() for p in str(s).split(",") if p.strip() and p.strip() != "Não informado"}
 
@@ -26,7 +31,7 @@ def _adjust_project_counts(old_str: str, new_str: str) -> None:
     if not adicionados and not removidos:
         return
 
-    df_proj = load_sheet_data("Projetos")
+    df_proj = load_sheet_data("Projetos", force_refresh=True)
     if df_proj.empty or "projeto" not in df_proj.columns or "quantidade_beneficiados" not in df_proj.columns:
         return
 
@@ -41,7 +46,7 @@ def _adjust_project_counts(old_str: str, new_str: str) -> None:
             curr = 0
         df_proj.loc[idx[0], "quantidade_beneficiados"] = max(0, curr + delta)
 
-    overwrite_sheet_data("Projetos", df_proj)
+    journal.overwrite("Projetos", df_proj)
 
 
 def _get_projetos_ativos() -> list[str]:
@@ -77,8 +82,9 @@ def edit_beneficiario_dialog(row: pd.Series) -> None:
             return default
 
     def _float_val(v, default: float = 0.0) -> float:
+        # em centavos: o quadro do dashboard guarda a renda em float32
         try:
-            return float(v) if pd.notna(v) and str(v).strip() not in ("", "nan") else default
+            return round(float(v), 2) if pd.notna(v) and str(v).strip() not in ("", "nan") else default
         except (ValueError, TypeError):
             return default
 
@@ -231,7 +237,7 @@ def edit_beneficiario_dialog(row: pd.Series) -> None:
             st.error("CPF é obrigatório para identificar o registro.")
             return
 
-        df_raw = load_sheet_data("Dados")
+        df_raw = load_sheet_data("Dados", force_refresh=True)
         cpf_val = str(row.get("cpf", "")).strip()
         matches = df_raw[df_raw["cpf"].str.strip() == cpf_val]
         if matches.empty:
@@ -283,8 +289,11 @@ def edit_beneficiario_dialog(row: pd.Series) -> None:
             if col in df_raw.columns:
                 df_raw.loc[i, col] = val
 
-        if overwrite_sheet_data("Dados", df_raw):
-            _adjust_project_counts(old_proj, new_proj)
+        # Registro e contagem dos projetos são gravados juntos (tudo ou nada).
+        journal = SheetMutationJournal()
+        journal.overwrite("Dados", df_raw)
+        _adjust_project_counts(old_proj, new_proj, journal)
+        if commit_sheet_mutations(journal):
             refresh_after_sheet_mutation(toast_message=f"Beneficiário {nome_completo.strip()} atualizado com sucesso!")
         else:
             st.error("Erro ao salvar. Tente novamente.")
@@ -308,7 +317,7 @@ if df_raw is None or df_raw.empty:
     st.warning("Não há registros na planilha ou a aba **Dados** está vazia.")
     st.stop()
 
-df_prep = prepare_beneficiarios_dashboard(df_raw)
+df_prep = load_dashboard_data()
 
 busca = st.text_input(
     "Buscar por nome ou CPF",
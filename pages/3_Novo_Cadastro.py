@@ -5,7 +5,7 @@ import pandas as pd
 from datetime import date
 import utils.auth as auth
 
-from utils.data import load_sheet_data, clear_data_cache, update_sheet_data, overwrite_sheet_data
+from utils.data import load_sheet_data, SheetMutationJournal, commit_sheet_mutations
 
 auth.check_auth()
 
@@ -22,38 +22,33 @@ def get_projetos_ativos():
 def get_administradores():
     return load_sheet_data("Autenticação")
 
-def increase_beneficiados_projetos(projetos_selecionados):
-    """Incrementa quantidade_beneficiados em 1 para cada projeto selecionado"""
+def increase_beneficiados_projetos(projetos_selecionados, journal):
+    """Registra em ``journal`` o incremento de quantidade_beneficiados em 1 para cada projeto selecionado"""
     if not projetos_selecionados:
         return
     
-    try:
-        df_projetos = load_sheet_data("Projetos")
-        
-        if df_projetos.empty or "projeto" not in df_projetos.columns:
-            return
+    df_projetos = load_sheet_data("Projetos", force_refresh=True)
+    
+    if df_projetos.empty or "projeto" not in df_projetos.columns:
+        return
         
-        # Para cada projeto selecionado, incrementar quantidade_beneficiados
-        for projeto_nome in projetos_selecionados:
-            # Encontrar o índice do projeto pelo nome
-            projeto_index = df_projetos[df_projetos["projeto"].str.strip() == projeto_nome.strip()].index
-            
-            if not projeto_index.empty:
-                if "quantidade_beneficiados" in df_projetos.columns:
-                    # Converter para numérico se necessário
-                    current_value = df_projetos.loc[projeto_index[0], "quantidade_beneficiados"]
-                    try:
-                        current_value = int(current_value) if pd.notna(current_value) else 0
-                    except (ValueError, TypeError):
-                        current_value = 0
-                    
-                    df_projetos.loc[projeto_index[0], "quantidade_beneficiados"] = current_value + 1
+    # Para cada projeto selecionado, incrementar quantidade_beneficiados
+    for projeto_nome in projetos_selecionados:
+        # Encontrar o índice do projeto pelo nome
+        projeto_index = df_projetos[df_projetos["projeto"].str.strip() == projeto_nome.strip()].index
         
-        if not overwrite_sheet_data("Projetos", df_projetos):
-            return
-        clear_data_cache()
-    except Exception as e:
-        st.error(f"Erro ao atualizar quantidade de beneficiados: {str(e)}")
+        if not projeto_index.empty:
+            if "quantidade_beneficiados" in df_projetos.columns:
+                # Converter para numérico se necessário
+                current_value = df_projetos.loc[projeto_index[0], "quantidade_beneficiados"]
+                try:
+                    current_value = int(current_value) if pd.notna(current_value) else 0
+                except (ValueError, TypeError):
+                    current_value = 0
+                
+                df_projetos.loc[projeto_index[0], "quantidade_beneficiados"] = current_value + 1
+    
+    journal.overwrite("Projetos", df_projetos)
 
 @st.dialog("Beneficiário cadastrado com sucesso!")
 def dialog_after_success_save_data(nome_completo):
@@ -234,12 +229,20 @@ def save_data():
         "responsavel_entrevista": responsavel_entrevista.strip()
     }])
 
-    if not update_sheet_data("Dados", dados_beneficiario):
-        st.error("Erro ao salvar dados do beneficiário na planilha.")
+    # Cadastro e contagem dos projetos vão juntos para a planilha: ou os dois são gravados, ou nenhum.
+    journal = SheetMutationJournal()
+    journal.append("Dados", dados_beneficiario)
+
+    try:
+        if projeto_acao:
+            increase_beneficiados_projetos(projeto_acao, journal)
+    except Exception as e:
+        st.error(f"Erro ao atualizar quantidade de beneficiados: {str(e)}")
         return
 
-    if projeto_acao:
-        increase_beneficiados_projetos(projeto_acao)
+    if not commit_sheet_mutations(journal):
+        st.error("Erro ao salvar dados do beneficiário na planilha.")
+        return
 
     dialog_after_success_save_data(nome_completo)
 
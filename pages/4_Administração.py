@@ -1,10 +1,19 @@
-from streamlit_gsheets import GSheetsConnection
 import streamlit as st
 import utils.auth as auth
 import pandas as pd
 from datetime import datetime
 
-from utils.data import load_sheet_data, update_sheet_data, refresh_after_sheet_mutation
+from utils.carregamento import dashboard_cache_stats, memoria_quadros_cache
+from utils.data import (
+    load_sheet_data,
+    overwrite_sheet_data,
+    refresh_after_sheet_mutation,
+    update_sheet_data,
+)
+from utils.figuras import figuras_cache_stats
+from utils.risco_clinico import precarga_stats
+from utils.score_cache import score_cache_stats
+from utils.sheets_client import call_stats
 
 st.set_page_config(
     page_title="AJUSTA - Admin",
@@ -103,8 +112,7 @@ def add_admin_user_dialog():
 def find_user_by_email(email):
     """Busca usuário pelo email na planilha"""
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        df = conn.read(worksheet="Autenticação")
+        df = load_sheet_data("Autenticação")
         
         if "e-mail" not in df.columns:
             return None
@@ -123,8 +131,7 @@ def find_user_by_email(email):
 def delete_admin_user(email):
     """Remove usuário da planilha pelo email"""
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        df = conn.read(worksheet="Autenticação")
+        df = load_sheet_data("Autenticação", force_refresh=True)
         
         if "e-mail" not in df.columns:
             st.error("Coluna 'e-mail' não encontrada na planilha.")
@@ -141,7 +148,8 @@ def delete_admin_user(email):
         df_updated = df.drop(user_index).reset_index(drop=True)
         
         # Escrever de volta para o Google Sheets
-        conn.update(data = df_updated, worksheet="Autenticação")
+        if not overwrite_sheet_data("Autenticação", df_updated):
+            return False
         
         # Obter nome do usuário deletado para mensagem
         deleted_user = df.iloc[user_index[0]]
@@ -247,4 +255,91 @@ if st.button("Adicionar Novo Usuário Administrador", type="primary", width='str
 if st.button("Remover Usuário Administrador", width='stretch'):
     for key in ("delete_dialog_user", "delete_dialog_confirm", "delete_dialog_email"):
         st.session_state.pop(key, None)
-    remove_admin_user_dialog()
\ No newline at end of file
+    remove_admin_user_dialog()
+
+st.markdown("---")
+with st.expander("Chamadas ao Google Sheets por página"):
+    st.caption("Contagem desde o início do processo do servidor. Operações sem página (segundo plano) são releituras de snapshot.")
+    st.dataframe(call_stats(), width="stretch")
+
+with st.expander("Cache do quadro do dashboard"):
+    st.caption(
+        "Preparações da aba Dados (Dashboard e Beneficiários) desde o início do processo. "
+        "Faltas só devem ocorrer quando o conteúdo da aba muda ou o dia vira; as incrementais "
+        "preparam só as linhas alteradas (ou só a idade, na virada do dia)."
+    )
+    stats = dashboard_cache_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Acertos", stats["hits"])
+    c2.metric("Faltas", stats["misses"])
+    c3.metric("Faltas incrementais", stats["incrementais"])
+    c4.metric("Quadros em memória", stats["entradas"])
+
+with st.expander("Cache de figuras do dashboard"):
+    st.caption(
+        "Figuras Plotly da página Dashboard guardadas por versão dos dados, filtros e gráfico. "
+        "Descartes acontecem quando o total passa do limite (AJUSTA_FIGURAS_CACHE_MB)."
+    )
+    fstats = figuras_cache_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Acertos", fstats["hits"])
+    c2.metric("Faltas", fstats["misses"])
+    c3.metric("Descartes", fstats["descartes"])
+    c4.metric(
+        "Em uso",
+        f"{fstats['bytes'] / 1024 / 1024:.1f} de {fstats['limite'] / 1024 / 1024:.0f} MB",
+        help=f"{fstats['entradas']} figuras",
+    )
+
+with st.expander("Cache de scores de risco"):
+    st.caption(
+        "Scores do modelo de risco clínico guardados em disco por combinação das variáveis do "
+        "modelo e versão do pickle. O modelo só roda para combinações ainda não pontuadas."
+    )
+    sstats = score_cache_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Linhas do cache", sstats["acertos"])
+    c2.metric("Combinações calculadas", sstats["calculados"])
+    c3.metric("Chamadas ao modelo", sstats["chamadas_modelo"])
+    c4.metric("Combinações guardadas", sum(sstats["entradas"].values()))
+
+with st.expander("Carga do modelo de risco clínico"):
+    st.caption(
+        "O modelo é carregado em segundo plano quando a página inicial é aberta pela primeira vez no processo. "
+        "A exportação numpy é mapeada do disco: as páginas de arquivo são divididas entre os "
+        "processos do servidor; as anônimas são de cada processo."
+    )
+    pstats = precarga_stats()
+    antes, depois = pstats["memoria"].get("antes", {}), pstats["memoria"].get("depois", {})
+
+    def _mb(valor) -> str:
+        return "—" if valor is None else f"{valor:.0f} MB"
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Estado", pstats["estado"], help=pstats["erro"])
+    c2.metric("Tempo de carga", f"{sum(pstats['etapas'].values()):.2f} s", help=pstats["origem"])
+    c3.metric(
+        "Memória do processo",
+        _mb(depois.get("rss")),
+        delta=None if depois.get("rss") is None or antes.get("rss") is None else _mb(depois["rss"] - antes["rss"]),
+        delta_color="off",
+        help=f"Pico: {_mb(depois.get('pico'))}",
+    )
+    c4.metric("Páginas de arquivo", _mb(depois.get("arquivos")), help=f"Anônima: {_mb(depois.get('anonima'))}")
+    if pstats["etapas"]:
+        st.dataframe(
+            pd.Series(pstats["etapas"], name="segundos").round(3).rename_axis("etapa"),
+            width="stretch",
+        )
+
+with st.expander("Memória dos quadros em cache"):
+    st.caption(
+        "Memória (MB) de cada quadro da aba Dados mantido em cache, por coluna. "
+        "Os quadros do dashboard e de vulnerabilidades usam dtypes compactos; a leitura "
+        "usada para escrita mantém os tipos originais."
+    )
+    memoria = memoria_quadros_cache()
+    colunas = st.columns(len(memoria.columns))
+    for coluna, nome in zip(colunas, memoria.columns):
+        coluna.metric(nome, f"{memoria.loc['total', nome]:.1f} MB")
+    st.dataframe(memoria.drop(index="total"), width="stretch")
@@ -7,10 +7,10 @@ from datetime import datetime
 from utils.data import (
     load_sheet_data,
     update_sheet_data,
+    overwrite_sheet_data,
     refresh_after_sheet_mutation,
     get_beneficiarios_por_projeto,
 )
-from streamlit_gsheets import GSheetsConnection
 
 st.set_page_config(
     page_title="AJUSTA - Projetos",
@@ -20,8 +20,6 @@ st.set_page_config(
 
 auth.check_auth()
 
-conn = st.connection("gsheets", type=GSheetsConnection)
-
 # Funções para gerenciar os projetos
 def get_projects():
     return load_sheet_data("Projetos")
@@ -128,7 +126,7 @@ def find_project_by_id(project_id):
 def delete_project(project_id):
     """Remove projeto da planilha pelo ID"""
     try:
-        df = load_sheet_data("Projetos")
+        df = load_sheet_data("Projetos", force_refresh=True)
         
         if "id" not in df.columns:
             st.error("Coluna 'id' não encontrada na planilha.")
@@ -145,7 +143,8 @@ def delete_project(project_id):
         df_updated = df.drop(project_index).reset_index(drop=True)
         
         # Escrever de volta para o Google Sheets
-        conn.update(data = df_updated, worksheet="Projetos")
+        if not overwrite_sheet_data("Projetos", df_updated):
+            return False
         
         # Obter nome do projeto deletado para mensagem
         deleted_project = df.iloc[project_index[0]]
@@ -162,7 +161,7 @@ def delete_project(project_id):
 def update_project_status(project_id):
     """Alterna o status do projeto entre Ativo e Inativo"""
     try:
-        df = load_sheet_data("Projetos")
+        df = load_sheet_data("Projetos", force_refresh=True)
         
         if "id" not in df.columns or "esta_ativo" not in df.columns:
             st.error("Colunas necessárias não encontradas na planilha.")
@@ -185,7 +184,8 @@ def update_project_status(project_id):
         df.loc[project_index[0], "esta_ativo"] = new_status
         
         # Escrever de volta para o Google Sheets
-        conn.update(data = df, worksheet="Projetos")
+        if not overwrite_sheet_data("Projetos", df):
+            return False
         
         # Obter nome do projeto para mensagem
         project_name = df.iloc[project_index[0]].get("projeto", project_id)
@@ -5,10 +5,10 @@ import streamlit as st
 
 import utils.auth as auth
 from utils.colors import AJUSTA_PALETTE, apply_plotly_style
-from utils.data import load_sheet_data
+from utils.carregamento import load_beneficiarios_com_score, load_score_histograma
+from utils.figuras import figura_histograma
 from utils.risco_clinico import (
     FEATURE_COLS,
-    beneficiarios_com_score,
     label_classopera,
     label_cs_escol_n,
     label_cs_raca,
@@ -31,8 +31,7 @@ st.caption(
     "análises populacionais e priorização institucional."
 )
 
-df_raw = load_sheet_data("Dados")
-df_full, stats = beneficiarios_com_score(df_raw)
+df_full, stats = load_beneficiarios_com_score()
 
 total = stats["total"]
 elegiveis = stats["elegiveis"]
@@ -276,12 +275,10 @@ col_b.caption(
     "distribui probabilidades médias por grupo de escolaridade entre quem tem dados completos."
 )
 
-fig_hist = px.histogram(
-    df_rank,
-    x="score_risco_clinico",
-    nbins=30,
+fig_hist = figura_histograma(
+    load_score_histograma(),
     title="Distribuição do score de risco clínico",
-    labels={"score_risco_clinico": "Score", "count": "Quantidade"},
+    x_label="Score",
 )
 fig_hist = apply_plotly_style(fig_hist)
 st.plotly_chart(fig_hist, use_container_width=True)
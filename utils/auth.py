@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-from streamlit_gsheets import GSheetsConnection
+
+from utils import sheets_client
+from utils.data import load_sheet_data
 
 def get_allowed_emails():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet="Autenticação")
+    """E-mails autorizados, lidos direto da planilha (nunca do snapshot, que pode estar velho)"""
+    df = load_sheet_data("Autenticação", force_refresh=True)
     return df["e-mail"].dropna().tolist()
 
 def validate_login_authorization():
@@ -54,6 +56,8 @@ def show_access_denied():
 
 def check_auth():
     """Verifica autenticação e exibe mensagens apropriadas"""
+    sheets_client.record_page_run()
+
     # Verificar se o usuário está logado
     if not st.user.is_logged_in:
         show_login_page()
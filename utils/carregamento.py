@@ -0,0 +1,196 @@
+"""Quadros derivados da aba ``Dados`` que as páginas carregam (dashboard, scores de risco)."""
+
+from collections import OrderedDict
+import datetime
+import hashlib
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.dashboard_data import (
+    atualizar_idades,
+    histograma,
+    juntar_preparados,
+    prepare_beneficiarios_dashboard,
+)
+from utils.data import depends_on_sheets, load_sheet_data, sheet_version
+from utils.memoria import aplicar_plano_dtypes, relatorio_memoria
+from utils.risco_clinico import beneficiarios_com_score
+
+
+# Quadros preparados do dashboard, indexados pela impressão digital do conteúdo de
+# ``Dados`` e compartilhados por páginas e sessões do processo (o mesmo objeto, sem cópia).
+DASHBOARD_CACHE_ENTRIES = 2
+# Acima desta fração de linhas novas ou alteradas, a aba é preparada do zero
+DASHBOARD_INCREMENTAL_MAX = 0.5
+_preparados_lock = threading.Lock()
+_preparados: OrderedDict = OrderedDict()
+_preparados_stats = {"hits": 0, "misses": 0, "incrementais": 0}
+
+
+class _Preparado(NamedTuple):
+    quadro: pd.DataFrame
+    hashes: np.ndarray  # hash de cada linha da leitura, sem o índice
+    dtypes: str  # colunas e dtypes da leitura
+    data: str  # data de referência de idade e faixa etária
+
+
+def _dtypes_assinatura(df):
+    return repr([(str(c), str(t)) for c, t in df.dtypes.items()])
+
+
+def _hashes_linhas(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def frame_fingerprint(df, hashes=None):
+    """Impressão digital do conteúdo de ``df`` (``hashes``: hash por linha já calculado)."""
+    if hashes is None:
+        hashes = _hashes_linhas(df)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_dtypes_assinatura(df).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+    h.update(hashes.tobytes())
+    return h.hexdigest()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _sheet_fingerprint(worksheet, version):
+    """``frame_fingerprint`` da aba, calculada uma vez por versão."""
+    return frame_fingerprint(load_sheet_data(worksheet))
+
+
+def _preparado_em_cache(impressao):
+    with _preparados_lock:
+        preparado = _preparados.get(impressao)
+        if preparado is not None:
+            _preparados.move_to_end(impressao)
+            _preparados_stats["hits"] += 1
+            return preparado.quadro
+        return None
+
+
+def _preparar(df):
+    return aplicar_plano_dtypes(prepare_beneficiarios_dashboard(df))
+
+
+def _preparar_incremental(df, hashes, base):
+    """``_preparar(df)`` reaproveitando as linhas de ``base``; ``None`` quando não compensa."""
+    if base is None or base.dtypes != _dtypes_assinatura(df) or base.quadro.empty or df.empty:
+        return None
+    # linhas iguais têm o mesmo quadro preparado: qualquer posição com o mesmo hash serve
+    anteriores = pd.Index(base.hashes)
+    unicas = np.flatnonzero(~anteriores.duplicated())
+    pos = anteriores[unicas].get_indexer(hashes)
+    origem = np.where(pos >= 0, unicas[pos], -1)
+    novas_pos = np.flatnonzero(origem < 0)
+    if len(novas_pos) > DASHBOARD_INCREMENTAL_MAX * len(df):
+        return None
+    if (
+        not len(novas_pos)
+        and np.array_equal(origem, np.arange(len(base.quadro)))
+        and base.quadro.index.equals(df.index)
+    ):
+        quadro = base.quadro
+    else:
+        novas = _preparar(df.iloc[novas_pos]) if len(novas_pos) else base.quadro.iloc[:0]
+        quadro = juntar_preparados(base.quadro, origem, novas, df.index)
+        if quadro is None:
+            return None
+        # os inteiros compactos voltam ao menor tipo que comporta a junção
+        quadro = aplicar_plano_dtypes(quadro)
+    hoje = datetime.date.today().isoformat()
+    if base.data != hoje:
+        quadro = atualizar_idades(quadro)
+    return quadro
+
+
+def _guardar_preparado(impressao, preparado, incremental):
+    with _preparados_lock:
+        _preparados[impressao] = preparado
+        _preparados_stats["misses"] += 1
+        _preparados_stats["incrementais"] += incremental
+        while len(_preparados) > DASHBOARD_CACHE_ENTRIES:
+            _preparados.popitem(last=False)
+
+
+def load_dashboard_data():
+    """Aba ``Dados`` preparada para o dashboard, compartilhada entre sessões: não a altere."""
+    # idade e faixa etária dependem da data de hoje
+    hoje = datetime.date.today().isoformat()
+    version = sheet_version("Dados")
+    impressao = (_sheet_fingerprint("Dados", version), hoje) if version is not None else None
+    preparado = _preparado_em_cache(impressao)
+    if preparado is not None:
+        return preparado
+    if impressao is not None:
+        with _preparados_lock:
+            outro_dia = next((p for (fp, _), p in _preparados.items() if fp == impressao[0]), None)
+        if outro_dia is not None:
+            quadro = atualizar_idades(outro_dia.quadro)
+            _guardar_preparado(impressao, outro_dia._replace(quadro=quadro, data=hoje), True)
+            return quadro
+    # a leitura pode ser mais nova que ``version``: a chave sai do conteúdo preparado
+    df = load_sheet_data("Dados")
+    hashes = _hashes_linhas(df)
+    impressao = (frame_fingerprint(df, hashes), hoje)
+    preparado = _preparado_em_cache(impressao)
+    if preparado is not None:
+        return preparado
+    with _preparados_lock:
+        base = next(reversed(_preparados.values()), None)
+    preparado = _preparar_incremental(df, hashes, base)
+    incremental = preparado is not None
+    if not incremental:
+        preparado = _preparar(df)
+    _guardar_preparado(impressao, _Preparado(preparado, hashes, _dtypes_assinatura(df), hoje), incremental)
+    return preparado
+
+
+def dashboard_data_version(df):
+    """Chave do quadro devolvido por ``load_dashboard_data``; ``None`` se ele já saiu do cache."""
+    with _preparados_lock:
+        return next((k for k, p in _preparados.items() if p.quadro is df), None)
+
+
+def limpar_dashboard_cache():
+    """Esquece os quadros preparados e as impressões digitais (``utils.data.clear_data_cache`` não os toca)."""
+    _sheet_fingerprint.clear()
+    with _preparados_lock:
+        _preparados.clear()
+
+
+def dashboard_cache_stats():
+    """Acertos, faltas e preparações incrementais de ``load_dashboard_data`` no processo."""
+    with _preparados_lock:
+        return {**_preparados_stats, "entradas": len(_preparados)}
+
+
+@depends_on_sheets("Dados")
+def load_beneficiarios_com_score():
+    """``beneficiarios_com_score`` da aba ``Dados``, recalculado só quando ela muda."""
+    df, stats = beneficiarios_com_score(load_sheet_data("Dados"))
+    return aplicar_plano_dtypes(df), stats
+
+
+@depends_on_sheets("Dados")
+def load_score_histograma(nbins=30):
+    """``histograma`` dos scores de risco da aba ``Dados``, recalculado só quando ela muda."""
+    df, _ = load_beneficiarios_com_score()
+    if "score_risco_clinico" not in df.columns:
+        return histograma([], nbins, intervalo=(0.0, 1.0))
+    return histograma(df["score_risco_clinico"], nbins, intervalo=(0.0, 1.0))
+
+
+def memoria_quadros_cache():
+    """``relatorio_memoria`` dos quadros da aba ``Dados`` mantidos em cache."""
+    quadros = {"Dados (leitura)": load_sheet_data("Dados")}
+    with _preparados_lock:
+        preparados = [p.quadro for p in _preparados.values()]
+    for i, preparado in enumerate(reversed(preparados)):
+        quadros["Dashboard" if i == 0 else f"Dashboard ({i + 1})"] = preparado
+    quadros["Vulnerabilidades"] = load_beneficiarios_com_score()[0]
+    return relatorio_memoria(quadros)
@@ -2,40 +2,102 @@
 
 from __future__ import annotations
 
+import os
+import threading
 from datetime import datetime
+from typing import NamedTuple
 
 import numpy as np
 import pandas as pd
 
 LABEL_NULO = "Não informado"
 
+# Motor dos agregados da página Dashboard: "pandas", "cubo" ou "duckdb" (ver filtrar_e_agregar)
+DASHBOARD_ENGINE = os.environ.get("AJUSTA_DASHBOARD_ENGINE", "pandas")
+
+# Colunas categóricas contadas pelo dashboard (um gráfico ou indicador por coluna)
+COLUNAS_CONTAGEM = (
+    "sexo",
+    "genero",
+    "faixa_etaria",
+    "bairro",
+    "tipo_residencia",
+    "acesso_agua",
+    "acesso_esgoto",
+    "acesso_energia",
+    "categoria_hanseniase",
+    "cor_raca_etnia",
+)
+
+# Limites superiores (inclusive) das faixas etárias e a ordem lógica do eixo X
+LIMITES_FAIXA_ETARIA = (12, 18, 30, 50)
+ORDEM_FAIXA_ETARIA = [
+    "0-12 anos",
+    "13-18 anos",
+    "19-30 anos",
+    "31-50 anos",
+    "51+ anos",
+    LABEL_NULO,
+]
 
-def normalize_categoria(series: pd.Series, label_nulo: str = LABEL_NULO) -> pd.Series:
-    """Trata vazio, NA e espaços como label_nulo; demais valores com strip."""
-
-    def _one(v) -> str:
-        if pd.isna(v):
-            return label_nulo
-        s = str(v).strip()
-        if not s or s.lower() == "nan":
-            return label_nulo
-        return s
 
-    return series.map(_one)
+# Colunas padronizadas por ``normalize_categoria`` em ``prepare_beneficiarios_dashboard``
+COLUNAS_CATEGORIA = (
+    "sexo",
+    "genero",
+    "bairro",
+    "tipo_residencia",
+    "acesso_agua",
+    "acesso_esgoto",
+    "acesso_energia",
+    "cor_raca_etnia",
+    "ja_teve_hanseniase",
+    "projeto_acao",
+)
 
 
-def _faixa_etaria(idade: float, label_nulo: str) -> str:
-    if pd.isna(idade):
-        return label_nulo
-    if idade <= 12:
-        return "0-12 anos"
-    if idade <= 18:
-        return "13-18 anos"
-    if idade <= 30:
-        return "19-30 anos"
-    if idade <= 50:
-        return "31-50 anos"
-    return "51+ anos"
+def normalize_categoria(series: pd.Series, label_nulo: str = LABEL_NULO) -> pd.Series:
+    """Vazio, NA e "nan" viram label_nulo (demais com strip); devolve ``category``."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codigos = series.cat.codes.to_numpy()
+        valores = series.cat.categories
+    else:
+        codigos, valores = pd.factorize(series)
+    rotulos = pd.Index(valores, dtype=object).map(lambda v: str(v).strip())
+    nulos = (rotulos == "") | (rotulos.str.lower() == "nan") | (rotulos == label_nulo)
+    categorias = sorted(set(rotulos[~nulos]))
+    tem_nulo = bool(nulos.any()) or bool((codigos < 0).any())
+    if tem_nulo:
+        categorias.append(label_nulo)
+    posicao = {c: i for i, c in enumerate(categorias)}
+    # último elemento atende o código -1 (NA) do factorize
+    mapa = np.fromiter(
+        (len(categorias) - 1 if nulo else posicao[r] for r, nulo in zip(rotulos, nulos)),
+        dtype=np.int32,
+        count=len(rotulos),
+    )
+    mapa = np.append(mapa, len(categorias) - 1)
+    cat = pd.Categorical.from_codes(mapa[codigos], categories=pd.Index(categorias, dtype=object))
+    return pd.Series(cat, index=series.index, name=series.name)
+
+
+def faixas_etarias(
+    idade: pd.Series,
+    label_nulo: str = LABEL_NULO,
+    *,
+    limites: tuple[float, ...] = LIMITES_FAIXA_ETARIA,
+    rotulos: list[str] | None = None,
+) -> pd.Series:
+    """Faixa etária de cada idade (categórica ordenada); idade NA vira label_nulo."""
+    rotulos = list(rotulos if rotulos is not None else ORDEM_FAIXA_ETARIA[:-1])
+    if len(rotulos) != len(limites) + 1:
+        raise ValueError("rotulos precisa de uma faixa a mais que limites")
+    valores = pd.to_numeric(idade, errors="coerce").to_numpy(dtype=float)
+    # side="left": o limite entra na faixa de baixo
+    codigos = np.searchsorted(np.asarray(limites, dtype=float), valores, side="left")
+    codigos[np.isnan(valores)] = len(rotulos)
+    cat = pd.Categorical.from_codes(codigos, categories=[*rotulos, label_nulo], ordered=True)
+    return pd.Series(cat, index=idade.index, name="faixa_etaria")
 
 
 def prepare_beneficiarios_dashboard(
@@ -56,33 +118,19 @@ def prepare_beneficiarios_dashboard(
     out = df.copy()
     ref = ref_date or datetime.now()
 
-    cat_cols = [
-        "sexo",
-        "genero",
-        "bairro",
-        "tipo_residencia",
-        "acesso_agua",
-        "acesso_esgoto",
-        "acesso_energia",
-        "cor_raca_etnia",
-        "ja_teve_hanseniase",
-        "projeto_acao",
-    ]
-    for c in cat_cols:
+    for c in COLUNAS_CATEGORIA:
         if c in out.columns:
             out[c] = normalize_categoria(out[c], label_nulo)
 
     if "data_nascimento" in out.columns:
         dt = pd.to_datetime(out["data_nascimento"], dayfirst=True, errors="coerce")
         out["data_nascimento_parsed"] = dt
-        idade = (ref - dt).dt.days / 365.25
-        idade = idade.where(dt.notna(), np.nan)
-        out["idade"] = idade
+        out["idade"] = _idade_anos(dt, ref)
     else:
         out["data_nascimento_parsed"] = pd.NaT
         out["idade"] = np.nan
 
-    out["faixa_etaria"] = out["idade"].apply(lambda x: _faixa_etaria(x, label_nulo))
+    out["faixa_etaria"] = faixas_etarias(out["idade"], label_nulo)
 
     if "renda_per_capita" in out.columns:
         out["renda_per_capita_num"] = pd.to_numeric(
@@ -99,25 +147,123 @@ def prepare_beneficiarios_dashboard(
         out["numero_membros_familia_num"] = np.nan
 
     if "ja_teve_hanseniase" in out.columns:
-
-        def _cat_h(v: str) -> str:
-            if v == "Sim":
-                return "Já teve hanseníase"
-            if v == "Não":
-                return "Não possui"
-            return label_nulo
-
-        out["categoria_hanseniase"] = out["ja_teve_hanseniase"].map(_cat_h)
+        # demais respostas ficam NA e viram label_nulo
+        cat_h = out["ja_teve_hanseniase"].map({"Sim": "Já teve hanseníase", "Não": "Não possui"})
+        out["categoria_hanseniase"] = normalize_categoria(cat_h, label_nulo)
     elif "situacao_hanseniase" in out.columns:
         out["categoria_hanseniase"] = normalize_categoria(
             out["situacao_hanseniase"], label_nulo
         )
     else:
-        out["categoria_hanseniase"] = label_nulo
+        out["categoria_hanseniase"] = normalize_categoria(
+            pd.Series(label_nulo, index=out.index), label_nulo
+        )
+
+    return out
+
+
+def _idade_anos(nascimento: pd.Series, ref: datetime) -> pd.Series:
+    idade = (ref - nascimento).dt.days / 365.25
+    return idade.where(nascimento.notna(), np.nan)
 
+
+def atualizar_idades(
+    df: pd.DataFrame,
+    *,
+    ref_date: datetime | None = None,
+    label_nulo: str = LABEL_NULO,
+) -> pd.DataFrame:
+    """``idade`` e ``faixa_etaria`` de um quadro já preparado, recalculadas para ``ref_date``."""
+    if df is None or df.empty or "data_nascimento_parsed" not in df.columns:
+        return df
+    out = df.copy(deep=False)
+    out["idade"] = _idade_anos(out["data_nascimento_parsed"], ref_date or datetime.now())
+    out["faixa_etaria"] = faixas_etarias(out["idade"], label_nulo)
     return out
 
 
+def _categorias_juntas(
+    col: str, anterior: pd.Categorical, novas: pd.Categorical, usados: pd.Index, label_nulo: str
+) -> pd.Index:
+    """Categorias que o quadro preparado do zero teria para os valores em ``usados``."""
+    if anterior.ordered:
+        # faixa_etaria: lista fixa, com ou sem linhas em cada faixa
+        if not anterior.categories.equals(novas.categories):
+            raise ValueError(f"categorias ordenadas diferentes em {col!r}")
+        return anterior.categories
+    categorias = sorted(usados)
+    if col in COLUNAS_CATEGORIA or col == "categoria_hanseniase":
+        # mesma ordem de normalize_categoria: label_nulo por último
+        categorias = [c for c in categorias if c != label_nulo] + [label_nulo] * (label_nulo in usados)
+    return pd.Index(categorias, dtype=usados.dtype if len(usados) else anterior.categories.dtype)
+
+
+def _juntar_categorica(
+    col: str,
+    anterior: pd.Categorical,
+    novas: pd.Categorical,
+    linhas: np.ndarray,
+    reaproveitadas: np.ndarray,
+    novas_pos: np.ndarray,
+    label_nulo: str,
+) -> pd.Categorical:
+    cod_a, cod_n = anterior.codes[linhas], novas.codes
+    # +1: o código -1 (NA) conta na posição 0
+    usados_a = np.bincount(cod_a + 1, minlength=len(anterior.categories) + 1)[1:] > 0
+    usados_n = np.bincount(cod_n + 1, minlength=len(novas.categories) + 1)[1:] > 0
+    usados = anterior.categories[usados_a].union(novas.categories[usados_n], sort=False)
+    categorias = _categorias_juntas(col, anterior, novas, usados, label_nulo)
+    # último elemento atende o código -1 (NA)
+    mapa_a = np.append(categorias.get_indexer(anterior.categories), -1)
+    mapa_n = np.append(categorias.get_indexer(novas.categories), -1)
+    codigos = np.empty(len(reaproveitadas) + len(novas_pos), dtype=np.int64)
+    codigos[reaproveitadas] = mapa_a[cod_a]
+    codigos[novas_pos] = mapa_n[cod_n]
+    return pd.Categorical.from_codes(codigos, categories=categorias, ordered=anterior.ordered)
+
+
+def juntar_preparados(
+    anterior: pd.DataFrame,
+    origem: np.ndarray,
+    novas: pd.DataFrame,
+    index: pd.Index,
+    *,
+    label_nulo: str = LABEL_NULO,
+) -> pd.DataFrame | None:
+    """
+    Quadro preparado de uma leitura nova: ``origem[i]`` é a posição da linha ``i`` em
+    ``anterior`` (ou -1) e ``novas`` as linhas -1 já preparadas. ``None`` se as partes não
+    combinam.
+    """
+    if list(anterior.columns) != list(novas.columns):
+        return None
+    reaproveitadas = np.flatnonzero(origem >= 0)
+    novas_pos = np.flatnonzero(origem < 0)
+    if len(novas_pos) != len(novas):
+        raise ValueError("novas precisa de uma linha para cada origem -1")
+    linhas = origem[reaproveitadas]
+    # posição de cada linha em ``anterior`` seguido de ``novas``
+    posicoes = origem.copy()
+    posicoes[novas_pos] = len(anterior) + np.arange(len(novas_pos))
+    colunas = {}
+    for col in anterior.columns:
+        a, n = anterior[col], novas[col]
+        cat_a, cat_n = isinstance(a.dtype, pd.CategoricalDtype), isinstance(n.dtype, pd.CategoricalDtype)
+        if cat_a != cat_n:
+            return None
+        if cat_a:
+            colunas[col] = _juntar_categorica(
+                col, a.array, n.array, linhas, reaproveitadas, novas_pos, label_nulo
+            )
+            continue
+        inteiros = pd.api.types.is_integer_dtype(a.dtype) and pd.api.types.is_integer_dtype(n.dtype)
+        if a.dtype != n.dtype and not inteiros:
+            return None
+        # inteiros anuláveis de larguras diferentes (Int8 e Int16) ficam no mais largo
+        colunas[col] = pd.concat([a, n], ignore_index=True).array.take(posicoes)
+    return pd.DataFrame(colunas, index=index)
+
+
 def split_projetos_celula(val, label_nulo: str = LABEL_NULO) -> list[str]:
     if val is None:
         return []
@@ -143,20 +289,203 @@ def explode_projetos_series(df: pd.DataFrame, col: str = "projeto_acao") -> pd.S
     return pd.Series(parts, name="projeto")
 
 
+class IndiceProjetos(NamedTuple):
+    """Projetos de cada célula distinta de ``projeto_acao`` (última linha: células NA)."""
+
+    projetos: list[str]  # rótulo de cada coluna; a última é label_nulo (célula sem projeto)
+    ocorrencias: np.ndarray  # vezes que a célula cita o projeto, como em ``explode_projetos_series``
+    posicao: np.ndarray  # primeira posição do projeto na célula (desempate das contagens)
+    citado: np.ndarray  # a célula cita o projeto (label_nulo só quando escrito numa lista)
+
+
+_SEM_POSICAO = np.iinfo(np.int64).max
+
+# Índices das colunas categóricas, pela identidade das categorias (uma entrada por versão da aba)
+_INDICES_MAX = 4
+_indices_lock = threading.Lock()
+_indices: dict[tuple[int, str], tuple[pd.Index, IndiceProjetos]] = {}
+
+
+def indice_projetos(celulas, label_nulo: str = LABEL_NULO) -> IndiceProjetos:
+    """Separa cada célula de ``celulas`` (valores distintos de ``projeto_acao``) uma única vez."""
+    partes_por_celula = [split_projetos_celula(c, label_nulo) for c in [*celulas, None]]
+    projetos = sorted({p for partes in partes_por_celula for p in partes} - {label_nulo})
+    coluna = {p: j for j, p in enumerate(projetos)}
+    sem_projeto = len(projetos)
+    coluna[label_nulo] = sem_projeto
+    forma = (len(partes_por_celula), len(projetos) + 1)
+    ocorrencias = np.zeros(forma, dtype=np.int64)
+    posicao = np.full(forma, _SEM_POSICAO, dtype=np.int64)
+    citado = np.zeros(forma, dtype=bool)
+    for i, partes in enumerate(partes_por_celula):
+        if not partes:
+            ocorrencias[i, sem_projeto] = 1
+            posicao[i, sem_projeto] = 0
+        for pos, p in enumerate(partes):
+            j = coluna[p]
+            ocorrencias[i, j] += 1
+            posicao[i, j] = min(posicao[i, j], pos)
+            citado[i, j] = True
+    return IndiceProjetos([*projetos, label_nulo], ocorrencias, posicao, citado)
+
+
+def _indice_linhas(
+    df: pd.DataFrame, col: str = "projeto_acao", label_nulo: str = LABEL_NULO
+) -> tuple[IndiceProjetos, np.ndarray]:
+    """Índice de ``df[col]`` e, para cada linha, a linha do índice com a sua célula."""
+    serie = df[col]
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, celulas = pd.factorize(serie)
+        indice = indice_projetos(celulas, label_nulo)
+        return indice, codigos % len(indice.ocorrencias)
+    celulas = serie.cat.categories
+    chave = (id(celulas), label_nulo)
+    with _indices_lock:
+        guardado = _indices.get(chave)
+    if guardado is None or guardado[0] is not celulas:
+        guardado = (celulas, indice_projetos(celulas, label_nulo))
+        with _indices_lock:
+            _indices[chave] = guardado
+            while len(_indices) > _INDICES_MAX:
+                _indices.pop(next(iter(_indices)))
+    indice = guardado[1]
+    # código -1 (NA) cai na última linha
+    return indice, serie.cat.codes.to_numpy() % len(indice.ocorrencias)
+
+
+def _projetos_citados(df: pd.DataFrame, col: str = "projeto_acao") -> list[str]:
+    """Projetos citados em alguma linha de ``df``, em ordem alfabética."""
+    if col not in df.columns or df.empty:
+        return []
+    indice, linhas = _indice_linhas(df, col)
+    usadas = np.bincount(linhas, minlength=len(indice.ocorrencias)) > 0
+    citados = indice.citado[usadas, :-1].any(axis=0)
+    return [p for p, c in zip(indice.projetos, citados) if c]
+
+
 def projetos_opcoes_filtro(df: pd.DataFrame) -> list[str]:
-    s = explode_projetos_series(df)
-    u = sorted({x for x in s.unique() if x != LABEL_NULO})
-    return u
+    return _projetos_citados(df)
 
 
 def count_projetos_explodidos(df: pd.DataFrame) -> pd.Series:
-    return explode_projetos_series(df).value_counts()
+    return contagem_projetos(df)
 
 
 def n_projetos_distintos(df: pd.DataFrame) -> int:
-    s = explode_projetos_series(df)
-    u = {x for x in s.unique() if x != LABEL_NULO}
-    return len(u)
+    return len(_projetos_citados(df))
+
+
+def linhas_com_projetos(
+    df: pd.DataFrame, projetos, col: str = "projeto_acao", label_nulo: str = LABEL_NULO
+) -> np.ndarray:
+    """Máscara das linhas de ``df`` que citam algum de ``projetos``."""
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    indice, linhas = _indice_linhas(df, col, label_nulo)
+    sel = set(projetos)
+    colunas = [j for j, p in enumerate(indice.projetos) if p in sel]
+    return indice.citado[:, colunas].any(axis=1)[linhas]
+
+
+# argumento de ``apply_dashboard_filtros`` -> coluna filtrada (além de ``projetos``)
+FILTROS_DASHBOARD = {
+    "bairros": "bairro",
+    "sexos": "sexo",
+    "tipos_residencia": "tipo_residencia",
+    "categorias_hanseniase": "categoria_hanseniase",
+}
+
+
+class BitmapsDashboard(NamedTuple):
+    """Um bitmap (``np.packbits``) por valor de cada dimensão filtrável do dashboard."""
+
+    n_linhas: int
+    valores: dict[str, dict[str, int]]
+    bits: dict[str, np.ndarray]
+
+
+# Estruturas derivadas dos últimos quadros (bitmaps, cubo), pela identidade do DataFrame: o
+# quadro preparado de ``load_dashboard_data`` é o mesmo objeto enquanto a aba não muda.
+_QUADROS_MAX = 2
+_quadros_lock = threading.Lock()
+_quadros: dict[str, list[tuple[pd.DataFrame, str, object]]] = {}
+
+
+def _do_quadro(tipo: str, df: pd.DataFrame, label_nulo: str, construir):
+    with _quadros_lock:
+        for quadro, rotulo, valor in _quadros.get(tipo, []):
+            if quadro is df and rotulo == label_nulo:
+                return valor
+    valor = construir(df, label_nulo)
+    with _quadros_lock:
+        entradas = _quadros.setdefault(tipo, [])
+        entradas.append((df, label_nulo, valor))
+        del entradas[:-_QUADROS_MAX]
+    return valor
+
+
+def _codigos(serie: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Código de cada linha (-1 para NA) e os valores distintos: da categoria ou de ``factorize``."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    codigos, valores = pd.factorize(serie)
+    return codigos, pd.Index(valores, dtype=object)
+
+
+def bitmaps_dashboard(df: pd.DataFrame, label_nulo: str = LABEL_NULO) -> BitmapsDashboard:
+    """Monta os bitmaps das dimensões de ``FILTROS_DASHBOARD`` e dos projetos presentes em ``df``."""
+    valores: dict[str, dict[str, int]] = {}
+    bits: dict[str, np.ndarray] = {}
+    for chave, col in FILTROS_DASHBOARD.items():
+        if col not in df.columns:
+            continue
+        codigos, rotulos = _codigos(df[col])
+        valores[chave] = {v: k for k, v in enumerate(rotulos)}
+        bits[chave] = np.packbits(codigos == np.arange(len(rotulos))[:, None], axis=1)
+    if "projeto_acao" in df.columns:
+        indice, linhas = _indice_linhas(df, "projeto_acao", label_nulo)
+        valores["projetos"] = {p: j for j, p in enumerate(indice.projetos)}
+        bits["projetos"] = np.packbits(indice.citado[linhas].T, axis=1)
+    return BitmapsDashboard(len(df), valores, bits)
+
+
+def selecao_dashboard(
+    df: pd.DataFrame,
+    *,
+    projetos: list[str] | None = None,
+    bairros: list[str] | None = None,
+    sexos: list[str] | None = None,
+    tipos_residencia: list[str] | None = None,
+    categorias_hanseniase: list[str] | None = None,
+    label_nulo: str = LABEL_NULO,
+) -> np.ndarray | None:
+    """Máscara das linhas que passam nos filtros do dashboard, ou ``None`` sem filtro ativo."""
+    filtros = {
+        "projetos": projetos,
+        "bairros": bairros,
+        "sexos": sexos,
+        "tipos_residencia": tipos_residencia,
+        "categorias_hanseniase": categorias_hanseniase,
+    }
+    filtros = {k: v for k, v in filtros.items() if v}
+    if not filtros:
+        return None
+    bitmaps = _do_quadro("bitmaps", df, label_nulo, bitmaps_dashboard)
+    vazio = np.zeros((len(df) + 7) // 8, dtype=np.uint8)
+    selecao = None
+    for chave, escolhidos in filtros.items():
+        if chave not in bitmaps.bits:
+            if chave != "projetos":
+                continue  # coluna ausente: o critério não se aplica
+            dim = vazio  # sem ``projeto_acao`` nenhuma linha cita projeto
+        else:
+            posicoes = bitmaps.valores[chave]
+            linhas = [posicoes[v] for v in set(escolhidos) if v in posicoes]
+            dim = np.bitwise_or.reduce(bitmaps.bits[chave][linhas], axis=0) if linhas else vazio
+        selecao = dim if selecao is None else selecao & dim
+    if selecao is None:
+        return None
+    return np.unpackbits(selecao, count=len(df)).view(bool)
 
 
 def apply_dashboard_filtros(
@@ -169,44 +498,304 @@ def apply_dashboard_filtros(
     categorias_hanseniase: list[str] | None = None,
     label_nulo: str = LABEL_NULO,
 ) -> pd.DataFrame:
-    """Filtra o DataFrame; listas vazias ou None não aplicam aquele critério."""
+    """Filtra o DataFrame; listas vazias ou None não aplicam aquele critério (ver ``selecao_dashboard``)."""
     if df is None or df.empty:
         return df.copy() if df is not None else pd.DataFrame()
 
-    out = df
+    mascara = selecao_dashboard(
+        df,
+        projetos=projetos,
+        bairros=bairros,
+        sexos=sexos,
+        tipos_residencia=tipos_residencia,
+        categorias_hanseniase=categorias_hanseniase,
+        label_nulo=label_nulo,
+    )
+    return df if mascara is None else df[mascara]
+
+
+def _ordenar_contagens(valores: list, contagens: np.ndarray, primeira: np.ndarray, nome) -> pd.Series:
+    ordem = np.lexsort((primeira, -contagens))
+    indice = pd.Index([valores[i] for i in ordem], dtype=object, name=nome)
+    return pd.Series(contagens[ordem].astype(np.int64), index=indice, name="count")
+
+
+def contagem_ordenada(series: pd.Series) -> pd.Series:
+    """``value_counts`` decrescente; empates ficam na ordem da primeira ocorrência."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts(sort=False).sort_values(ascending=False, kind="stable")
+    # colunas category: conta os códigos; categorias sem ocorrência ficam de fora
+    codigos = series.cat.codes.to_numpy()
+    codigos = codigos[codigos >= 0]
+    presentes, primeira = np.unique(codigos, return_index=True)
+    contagens = np.bincount(codigos, minlength=len(series.cat.categories))[presentes]
+    categorias = series.cat.categories
+    return _ordenar_contagens([categorias[c] for c in presentes], contagens, primeira, series.name)
+
+
+def _contagem_celulas(
+    indice: IndiceProjetos, presentes: np.ndarray, por_celula: np.ndarray, primeira: np.ndarray
+) -> pd.Series:
+    """Contagem por projeto a partir das linhas de cada célula (``presentes``) e da primeira linha de cada uma."""
+    ocorrencias = indice.ocorrencias[presentes]
+    contagens = por_celula @ ocorrencias
+    # ordem da Series explodida: linha, depois posição na célula
+    chaves = np.where(
+        ocorrencias > 0, primeira[:, None].astype(np.int64) * 4294967296 + indice.posicao[presentes], _SEM_POSICAO
+    ).min(axis=0)
+    usados = np.flatnonzero(contagens)
+    return _ordenar_contagens(
+        [indice.projetos[j] for j in usados], contagens[usados], chaves[usados], "projeto"
+    )
+
+
+def contagem_projetos(df: pd.DataFrame, col: str = "projeto_acao") -> pd.Series:
+    """``contagem_ordenada(explode_projetos_series(df))`` pelo índice de projetos."""
+    if col not in df.columns or df.empty:
+        return contagem_ordenada(explode_projetos_series(df, col))
+    indice, linhas = _indice_linhas(df, col)
+    presentes, primeira = np.unique(linhas, return_index=True)
+    return _contagem_celulas(indice, presentes, np.bincount(linhas)[presentes], primeira)
 
-    if projetos:
-        sel = set(projetos)
 
-        def _match_proj(row) -> bool:
-            ps = set(split_projetos_celula(row.get("projeto_acao"), label_nulo))
-            return bool(ps & sel)
+class Histograma(NamedTuple):
+    """Contagem por faixa: ``contagens[i]`` valores em ``[bordas[i], bordas[i + 1])``."""
 
-        out = out[out.apply(_match_proj, axis=1)]
+    contagens: np.ndarray
+    bordas: np.ndarray
 
-    if bairros and "bairro" in out.columns:
-        out = out[out["bairro"].isin(bairros)]
-    if sexos and "sexo" in out.columns:
-        out = out[out["sexo"].isin(sexos)]
-    if tipos_residencia and "tipo_residencia" in out.columns:
-        out = out[out["tipo_residencia"].isin(tipos_residencia)]
-    if categorias_hanseniase and "categoria_hanseniase" in out.columns:
-        out = out[out["categoria_hanseniase"].isin(categorias_hanseniase)]
 
-    return out
+def _largura_redonda(bruta: float) -> float:
+    """Menor largura 1, 2, 2,5 ou 5 × 10^k que não é menor que ``bruta``."""
+    escala = 10.0 ** np.floor(np.log10(bruta))
+    for m in (1.0, 2.0, 2.5, 5.0, 10.0):
+        if m * escala >= bruta * (1 - 1e-9):
+            return m * escala
+    return 10.0 * escala
 
 
-# Ordem lógica para eixo X em faixa etária
-ORDEM_FAIXA_ETARIA = [
-    "0-12 anos",
-    "13-18 anos",
-    "19-30 anos",
-    "31-50 anos",
-    "51+ anos",
-    LABEL_NULO,
-]
+def histograma(
+    valores,
+    nbins: int = 20,
+    *,
+    intervalo: tuple[float, float] | None = None,
+) -> Histograma:
+    """Histograma no servidor com no máximo ``nbins`` faixas de largura redonda; ignora NA."""
+    v = pd.to_numeric(pd.Series(valores), errors="coerce").to_numpy(dtype=float)
+    v = v[np.isfinite(v)]
+    if intervalo is None and not len(v):
+        return Histograma(np.zeros(0, dtype=np.int64), np.zeros(0))
+    lo, hi = intervalo if intervalo is not None else (float(v.min()), float(v.max()))
+    largura = _largura_redonda((hi - lo) / nbins) if hi > lo else 1.0
+    inicio = np.floor(lo / largura) * largura
+    if intervalo is not None:
+        n = max(1, int(np.ceil((hi - inicio) / largura - 1e-9)))
+    else:
+        # faixas fechadas à esquerda: o máximo precisa de uma faixa depois dele
+        n = int(np.floor((hi - inicio) / largura)) + 1
+    bordas = inicio + largura * np.arange(n + 1)
+    if intervalo is None:
+        bordas[0], bordas[-1] = min(bordas[0], lo), max(bordas[-1], hi)
+    contagens, _ = np.histogram(v, bins=bordas)
+    return Histograma(contagens, bordas)
+
+
+def agregados_dashboard(df: pd.DataFrame) -> dict:
+    """Indicadores e contagens da página Dashboard para um DataFrame já filtrado."""
+    renda = df["renda_per_capita_num"] if "renda_per_capita_num" in df.columns else pd.Series(dtype=float)
+    membros = (
+        df["numero_membros_familia_num"] if "numero_membros_familia_num" in df.columns else pd.Series(dtype=float)
+    )
+    projetos = contagem_projetos(df)
+    return {
+        "n_total": len(df),
+        # média em float64 mesmo com a renda guardada em float32 (``utils.memoria``)
+        "renda_media": float(renda.astype("float64").mean()) if renda.notna().any() else None,
+        "n_sem_renda": int(renda.isna().sum()),
+        "soma_membros": int(membros.sum(skipna=True)) if membros.notna().any() else None,
+        "n_projetos": sum(1 for p in projetos.index if p != LABEL_NULO),
+        "contagens": {c: contagem_ordenada(df[c]) for c in COLUNAS_CONTAGEM if c in df.columns},
+        "projetos": projetos,
+    }
+
+
+class CuboDashboard(NamedTuple):
+    """Contagens e somas da página Dashboard pré-agregadas por grupo de filtro."""
+
+    valores: dict[str, dict[str, int]]  # dimensão de filtro -> valor -> código
+    chaves: dict[str, np.ndarray]  # dimensão de filtro -> código de cada grupo
+    indice: IndiceProjetos | None
+    celula: np.ndarray | None  # linha do índice de projetos de cada grupo
+    primeira: np.ndarray  # primeira linha de cada grupo
+    n: np.ndarray
+    somas: dict[str, tuple[np.ndarray, np.ndarray]]  # coluna numérica -> (soma, linhas com valor)
+    rotulos: dict[str, pd.Index]
+    contagens: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]  # col -> (grupo, valor, n)
+
+
+def cubo_dashboard(df: pd.DataFrame, label_nulo: str = LABEL_NULO) -> CuboDashboard:
+    """Monta o cubo de ``df`` (uma passada por coluna; feito uma vez por quadro)."""
+    codigos: dict[str, np.ndarray] = {}
+    valores: dict[str, dict[str, int]] = {}
+    for chave, col in FILTROS_DASHBOARD.items():
+        if col in df.columns:
+            codigos[chave], rotulos = _codigos(df[col])
+            valores[chave] = {v: k for k, v in enumerate(rotulos)}
+    indice = None
+    if "projeto_acao" in df.columns:
+        indice, codigos["projetos"] = _indice_linhas(df, "projeto_acao", label_nulo)
+    if codigos:
+        # código -1 (NA) vira 0
+        deslocados = tuple(c.astype(np.int64) + 1 for c in codigos.values())
+        chave_linha = np.ravel_multi_index(deslocados, tuple(int(c.max(initial=0)) + 1 for c in deslocados))
+    else:
+        chave_linha = np.zeros(len(df), dtype=np.int64)
+    _, primeira, grupo = np.unique(chave_linha, return_index=True, return_inverse=True)
+    # renumera os grupos na ordem da primeira linha
+    ordem = np.argsort(primeira, kind="stable")
+    posto = np.empty_like(ordem)
+    posto[ordem] = np.arange(len(ordem))
+    grupo, primeira = posto[grupo.ravel()], primeira[ordem]
+    n_grupos = len(primeira)
+
+    somas = {}
+    for col in ("renda_per_capita_num", "numero_membros_familia_num"):
+        if col in df.columns:
+            v = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+            ok = ~np.isnan(v)
+            somas[col] = (
+                np.bincount(grupo, weights=np.where(ok, v, 0.0), minlength=n_grupos),
+                np.bincount(grupo[ok], minlength=n_grupos),
+            )
+
+    rotulos, contagens = {}, {}
+    for col in COLUNAS_CONTAGEM:
+        if col not in df.columns:
+            continue
+        cod, rotulos[col] = _codigos(df[col])
+        linhas = np.flatnonzero(cod >= 0)
+        n_valores = max(len(rotulos[col]), 1)
+        par = grupo[linhas].astype(np.int64) * n_valores + cod[linhas]
+        pares, primeira_par, inverso = np.unique(par, return_index=True, return_inverse=True)
+        ordem = np.argsort(linhas[primeira_par], kind="stable")
+        contagens[col] = (
+            (pares // n_valores)[ordem],
+            (pares % n_valores)[ordem],
+            np.bincount(inverso.ravel(), minlength=len(pares))[ordem],
+        )
+
+    return CuboDashboard(
+        valores=valores,
+        chaves={k: c[primeira] for k, c in codigos.items() if k != "projetos"},
+        indice=indice,
+        celula=codigos["projetos"][primeira] if indice is not None else None,
+        primeira=primeira,
+        n=np.bincount(grupo, minlength=n_grupos),
+        somas=somas,
+        rotulos=rotulos,
+        contagens=contagens,
+    )
+
+
+def agregados_cubo(
+    cubo: CuboDashboard,
+    *,
+    projetos: list[str] | None = None,
+    bairros: list[str] | None = None,
+    sexos: list[str] | None = None,
+    tipos_residencia: list[str] | None = None,
+    categorias_hanseniase: list[str] | None = None,
+) -> dict:
+    """``agregados_dashboard(apply_dashboard_filtros(df, ...))`` a partir do cubo de ``df``."""
+    filtros = {
+        "projetos": projetos,
+        "bairros": bairros,
+        "sexos": sexos,
+        "tipos_residencia": tipos_residencia,
+        "categorias_hanseniase": categorias_hanseniase,
+    }
+    sel = np.ones(len(cubo.n), dtype=bool)
+    for chave, escolhidos in filtros.items():
+        if not escolhidos:
+            continue
+        if chave == "projetos":
+            if cubo.indice is None:
+                sel[:] = False
+                continue
+            escolhidos = set(escolhidos)
+            colunas = [j for j, p in enumerate(cubo.indice.projetos) if p in escolhidos]
+            sel &= cubo.indice.citado[:, colunas].any(axis=1)[cubo.celula]
+        elif chave in cubo.chaves:
+            posicoes = cubo.valores[chave]
+            aceito = np.zeros(len(posicoes) + 1, dtype=bool)  # última posição: código -1 (NA)
+            aceito[[posicoes[v] for v in set(escolhidos) if v in posicoes]] = True
+            sel &= aceito[cubo.chaves[chave]]
+
+    grupos = np.flatnonzero(sel)
+    n_total = int(cubo.n[grupos].sum())
+    renda_soma, renda_n, membros_soma, membros_n = 0.0, 0, 0.0, 0
+    if "renda_per_capita_num" in cubo.somas:
+        renda_soma, renda_n = (a[grupos].sum() for a in cubo.somas["renda_per_capita_num"])
+    if "numero_membros_familia_num" in cubo.somas:
+        membros_soma, membros_n = (a[grupos].sum() for a in cubo.somas["numero_membros_familia_num"])
+
+    contagens = {}
+    for col, (grupo, valor, n) in cubo.contagens.items():
+        escolhidos = sel[grupo]
+        valor = valor[escolhidos]
+        # valores na ordem da primeira linha em que aparecem
+        presentes = pd.unique(valor)
+        total = np.bincount(valor, weights=n[escolhidos], minlength=len(cubo.rotulos[col]))
+        contagens[col] = _ordenar_contagens(
+            [cubo.rotulos[col][v] for v in presentes],
+            total[presentes].astype(np.int64),
+            np.arange(len(presentes)),
+            col,
+        )
+
+    if cubo.indice is not None and n_total:
+        celulas = cubo.celula[grupos]
+        presentes, primeira = np.unique(celulas, return_index=True)
+        por_celula = np.bincount(celulas, weights=cubo.n[grupos])[presentes].astype(np.int64)
+        por_projeto = _contagem_celulas(cubo.indice, presentes, por_celula, cubo.primeira[grupos][primeira])
+    else:
+        por_projeto = contagem_ordenada(pd.Series(dtype=object))
+
+    tem_renda = "renda_per_capita_num" in cubo.somas
+    return {
+        "n_total": n_total,
+        "renda_media": float(renda_soma / renda_n) if renda_n else None,
+        "n_sem_renda": int(n_total - renda_n) if tem_renda else 0,
+        "soma_membros": int(membros_soma) if membros_n else None,
+        "n_projetos": sum(1 for p in por_projeto.index if p != LABEL_NULO),
+        "contagens": contagens,
+        "projetos": por_projeto,
+    }
+
+
+def filtrar_e_agregar(
+    df: pd.DataFrame,
+    *,
+    engine: str | None = None,
+    **filtros,
+) -> tuple[pd.DataFrame, dict]:
+    """Filtra e agrega para o dashboard: ``(df_filtrado, agregados_dashboard(df_filtrado))``."""
+    motor = engine or DASHBOARD_ENGINE
+    padrao = filtros.get("label_nulo", LABEL_NULO) == LABEL_NULO and df is not None and not df.empty
+    if motor == "duckdb" and padrao:
+        from utils import dashboard_duckdb
+
+        if dashboard_duckdb.disponivel():
+            return dashboard_duckdb.filtrar_e_agregar(df, **filtros)
+    df_vis = apply_dashboard_filtros(df, **filtros)
+    if motor == "cubo" and padrao:
+        filtros.pop("label_nulo", None)
+        return df_vis, agregados_cubo(_do_quadro("cubo", df, LABEL_NULO, cubo_dashboard), **filtros)
+    return df_vis, agregados_dashboard(df_vis)
 
 
 def ordenar_faixas_etarias(index_like: pd.Index) -> list:
-    ordem = {k: i for i, k in enumerate(ORDEM_FAIXA_ETARIA)}
-    return sorted(index_like, key=lambda x: ordem.get(str(x), 999))
+    """Faixas presentes em ``index_like`` na ordem de ``ORDEM_FAIXA_ETARIA``; rótulos desconhecidos no fim."""
+    presentes = {str(x) for x in index_like}
+    conhecidas = [f for f in ORDEM_FAIXA_ETARIA if f in presentes]
+    return conhecidas + [x for x in index_like if str(x) not in ORDEM_FAIXA_ETARIA]
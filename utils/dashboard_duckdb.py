@@ -0,0 +1,190 @@
+"""Agregados da página Dashboard calculados no DuckDB (``AJUSTA_DASHBOARD_ENGINE=duckdb``)."""
+
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+    import pyarrow as pa
+except ImportError:  # motor opcional
+    duckdb = None
+    pa = None
+
+from utils.dashboard_data import COLUNAS_CONTAGEM, FILTROS_DASHBOARD, LABEL_NULO
+
+_TABELA = "dados"
+
+# Espaços removidos por ``str.strip`` nas partes de ``projeto_acao`` (``split_projetos_celula``)
+_ESPACOS = " \t\n\r\x0b\x0c"
+
+_COLUNAS_NUMERICAS = ("renda_per_capita_num", "numero_membros_familia_num")
+
+# Uma conexão por processo; as consultas são serializadas (a conexão não é thread-safe).
+_lock = threading.Lock()
+_registrado: tuple[pd.DataFrame, object] | None = None
+
+
+def disponivel() -> bool:
+    return duckdb is not None and pa is not None
+
+
+def _conexao(df: pd.DataFrame):
+    """Conexão com ``df`` registrado como ``dados``; refeita quando o DataFrame muda. Chamar com ``_lock``."""
+    global _registrado
+    if _registrado is not None and _registrado[0] is df:
+        return _registrado[1]
+    colunas = [
+        c for c in (*COLUNAS_CONTAGEM, "projeto_acao", *_COLUNAS_NUMERICAS) if c in df.columns
+    ]
+    tabela = pa.Table.from_pandas(df, columns=colunas, preserve_index=False)
+    tabela = tabela.append_column("_linha", pa.array(np.arange(len(df), dtype=np.int64)))
+    con = duckdb.connect()
+    con.register(_TABELA, tabela)
+    if "projeto_acao" in colunas:
+        _criar_projetos_celula(con)
+    _registrado = (df, con)
+    return con
+
+
+def _criar_projetos_celula(con) -> None:
+    """
+    Tabela ``projetos_celula``: os projetos citados em cada valor distinto de
+    ``projeto_acao``.
+    """
+    esp = _ESPACOS
+    con.execute(
+        f"""
+        CREATE TEMP TABLE projetos_celula AS
+        WITH celulas AS (
+            SELECT DISTINCT projeto_acao AS celula FROM {_TABELA}
+        ),
+        partes AS (
+            SELECT celula, len(s) AS n_partes, trim(unnest(s), '{esp}') AS projeto,
+                   generate_subscripts(s, 1) AS pos
+            FROM (SELECT celula, string_split(celula, ',') AS s FROM celulas)
+        ),
+        citados AS (
+            SELECT celula, projeto, true AS citado, pos FROM partes
+            WHERE projeto <> '' AND NOT (n_partes = 1 AND projeto IN ($nulo, '<NA>'))
+        )
+        SELECT * FROM citados
+        UNION ALL
+        SELECT celula, $nulo, false, 0 FROM celulas ANTI JOIN citados USING (celula)
+        """,
+        {"nulo": LABEL_NULO},
+    )
+
+
+def _where(colunas: set[str], filtros: dict) -> tuple[str, list]:
+    condicoes, params = [], []
+    projetos = filtros.get("projetos")
+    if projetos:
+        if "projeto_acao" in colunas:
+            condicoes.append(
+                "projeto_acao IN (SELECT celula FROM projetos_celula "
+                "WHERE citado AND list_contains(?::VARCHAR[], projeto))"
+            )
+            params.append(list(projetos))
+        else:
+            condicoes.append("FALSE")
+    for chave, coluna in FILTROS_DASHBOARD.items():
+        valores = filtros.get(chave)
+        if valores and coluna in colunas:
+            condicoes.append(f"list_contains(?::VARCHAR[], CAST({coluna} AS VARCHAR))")
+            params.append(list(valores))
+    return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), params
+
+
+def _serie(linhas: pd.DataFrame, nome_indice: str | None) -> pd.Series:
+    """Contagens ordenadas como ``contagem_ordenada`` (decrescente, empate pela primeira ocorrência)."""
+    linhas = linhas.sort_values(["n", "primeira"], ascending=[False, True], kind="stable")
+    indice = pd.Index(linhas["valor"].astype(object).tolist(), dtype=object, name=nome_indice)
+    return pd.Series(linhas["n"].to_numpy(dtype=np.int64), index=indice, name="count")
+
+
+def filtrar_e_agregar(
+    df: pd.DataFrame,
+    *,
+    projetos: list[str] | None = None,
+    bairros: list[str] | None = None,
+    sexos: list[str] | None = None,
+    tipos_residencia: list[str] | None = None,
+    categorias_hanseniase: list[str] | None = None,
+) -> tuple[pd.DataFrame, dict]:
+    """Mesmo contrato de ``dashboard_data.filtrar_e_agregar``, calculado no DuckDB."""
+    filtros = {
+        "projetos": projetos,
+        "bairros": bairros,
+        "sexos": sexos,
+        "tipos_residencia": tipos_residencia,
+        "categorias_hanseniase": categorias_hanseniase,
+    }
+    colunas = set(df.columns)
+    where, params = _where(colunas, filtros)
+    contadas = [c for c in COLUNAS_CONTAGEM if c in colunas]
+    renda = "renda_per_capita_num" if "renda_per_capita_num" in colunas else "NULL::DOUBLE"
+    membros = "numero_membros_familia_num" if "numero_membros_familia_num" in colunas else "NULL::DOUBLE"
+
+    with _lock:
+        con = _conexao(df)
+        linhas = None
+        if where:
+            # semi-joins não preservam a ordem; ordenar no numpy sai mais barato que ORDER BY
+            linhas = np.sort(con.execute(f"SELECT _linha FROM {_TABELA}{where}", params).fetchnumpy()["_linha"])
+        n_total, renda_media, n_renda, soma_membros, n_membros = con.execute(
+            f"SELECT count(*), avg({renda}), count({renda}), sum({membros}), count({membros}) "
+            f"FROM {_TABELA}{where}",
+            params,
+        ).fetchone()
+        categorias = pd.DataFrame(columns=["coluna", "valor", "n", "primeira"])
+        if contadas:
+            coluna = " ".join(f"WHEN grouping({c}) = 0 THEN '{c}'" for c in contadas)
+            valor = " ".join(f"WHEN grouping({c}) = 0 THEN CAST({c} AS VARCHAR)" for c in contadas)
+            conjuntos = ", ".join(f"({c})" for c in contadas)
+            categorias = con.execute(
+                f"""
+                SELECT * FROM (
+                    SELECT CASE {coluna} END AS coluna, CASE {valor} END AS valor,
+                           count(*) AS n, min(_linha) AS primeira
+                    FROM {_TABELA}{where}
+                    GROUP BY GROUPING SETS ({conjuntos})
+                )
+                WHERE valor IS NOT NULL
+                """,
+                params,
+            ).df()
+        por_projeto = pd.DataFrame(columns=["valor", "n", "primeira"])
+        if "projeto_acao" in colunas:
+            por_projeto = con.execute(
+                f"""
+                WITH por_celula AS (
+                    SELECT projeto_acao AS celula, count(*) AS n, min(_linha) AS primeira
+                    FROM {_TABELA}{where}
+                    GROUP BY projeto_acao
+                )
+                -- ordem da Series explodida: linha, depois posição na célula
+                SELECT p.projeto AS valor, sum(c.n)::BIGINT AS n,
+                       min(c.primeira * 4294967296 + p.pos) AS primeira
+                FROM por_celula AS c
+                JOIN projetos_celula AS p ON c.celula IS NOT DISTINCT FROM p.celula
+                GROUP BY p.projeto
+                """,
+                params,
+            ).df()
+
+    df_vis = df if linhas is None else df.iloc[linhas]
+    contagens = {c: _serie(categorias[categorias["coluna"] == c], c) for c in contadas}
+    projetos_serie = _serie(por_projeto, "projeto" if n_total else None)
+    return df_vis, {
+        "n_total": int(n_total),
+        "renda_media": float(renda_media) if n_renda else None,
+        "n_sem_renda": int(n_total - n_renda),
+        "soma_membros": int(soma_membros) if n_membros else None,
+        "n_projetos": sum(1 for p in projetos_serie.index if p != LABEL_NULO),
+        "contagens": contagens,
+        "projetos": projetos_serie,
+    }
@@ -1,10 +1,24 @@
 from collections import defaultdict
+import contextlib
+import functools
+import logging
 import math
 import numbers
+import os
+import re
+import threading
+import time
 
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+from gspread_dataframe import get_as_dataframe
+import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
+
+from utils import fake_sheets, sheets_client, snapshot, storage
+
+_LOGGER = logging.getLogger(__name__)
 
 
 def _display_str_cell(v):
@@ -32,6 +46,70 @@ def _display_str_cell(v):
     return str(v).strip()
 
 
+def _display_str_float(values, index):
+    """``_display_str_cell`` para um array float."""
+    na = np.isnan(values)
+    # acima de 2**53 nem todo float inteiro cabe em int64 sem perda: fica no caminho escalar
+    pequeno = np.abs(np.where(na, 0.0, values)) < 2.0 ** 53
+    inteiro = ~na & pequeno & (values == np.floor(np.where(na, 0.0, values)))
+    out = np.full(len(values), pd.NA, dtype=object)
+    out[inteiro] = values[inteiro].astype(np.int64).astype(str)
+    fracao = ~na & pequeno & ~inteiro
+    out[fracao] = values[fracao].astype(str)
+    grande = ~na & ~pequeno
+    if grande.any():
+        out[grande] = [_display_str_cell(v) for v in values[grande].tolist()]
+    return pd.Series(out, index=index, dtype="string")
+
+
+def _display_str_text(s):
+    """``_display_str_cell`` para uma coluna só de textos, pelos valores distintos."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    limpos = [u.strip() or pd.NA for u in uniques.tolist()]
+    # código -1 (NA) pega o último elemento
+    out = np.array(limpos + [pd.NA], dtype=object)[codes]
+    return pd.Series(out, index=s.index, dtype="string")
+
+
+def _display_str_series(s):
+    """Mesmo resultado de ``s.map(_display_str_cell).astype("string")``, vetorizado."""
+    dtype = s.dtype
+    if isinstance(dtype, pd.StringDtype):
+        return _display_str_text(s)
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return s.astype("string")
+    if dtype == np.float64 or isinstance(dtype, pd.Float64Dtype):
+        return _display_str_float(s.to_numpy(dtype="float64", na_value=np.nan), s.index)
+    if dtype != object:
+        return s.map(_display_str_cell).astype("string")
+
+    inferido = pd.api.types.infer_dtype(s, skipna=True)
+    if inferido == "empty":
+        return pd.Series(pd.NA, index=s.index, dtype="string")
+    if inferido == "string":
+        return _display_str_text(s)
+    if inferido not in ("mixed", "mixed-integer"):
+        convertido = s.infer_objects()
+        if convertido.dtype == object:
+            return s.map(_display_str_cell).astype("string")
+        return _display_str_series(convertido)
+
+    # Texto misturado com números (ex.: ``endereco``): strings de um lado, o resto por tipo.
+    valores = s.to_numpy()
+    e_texto = np.array([isinstance(v, str) for v in valores], dtype=bool)
+    out = np.full(len(valores), pd.NA, dtype=object)
+    out[e_texto] = _display_str_text(s[e_texto]).to_numpy(dtype=object)
+    resto = ~e_texto & s.notna().to_numpy()
+    if resto.any():
+        convertido = s[resto].infer_objects()
+        if convertido.dtype == object:
+            convertido = convertido.map(_display_str_cell).astype("string")
+        else:
+            convertido = _display_str_series(convertido)
+        out[resto] = convertido.to_numpy(dtype=object)
+    return pd.Series(out, index=s.index, dtype="string")
+
+
 # Colunas de texto na aba Dados (cadastro); evita Arrow misturando int/str sem forçar numéricas para string.
 _DADOS_COERCE_TO_STRING = frozenset({
     "nome_completo", "cpf", "rg", "data_nascimento", "sexo", "genero",
@@ -58,65 +136,894 @@ def normalize_sheet_columns(df, worksheet):
         for name in list(out.columns):
             key = str(name).lower()
             if key in _DADOS_COERCE_TO_STRING:
-                out[name] = out[name].map(_display_str_cell).astype("string")
+                out[name] = _display_str_series(out[name])
     else:
         for name in list(out.columns):
             if str(name).lower() == "cpf":
-                out[name] = out[name].map(_display_str_cell).astype("string")
+                out[name] = _display_str_series(out[name])
     return out
 
 
+# ``gsheets`` (padrão) ou ``fake`` (planilha em memória de ``utils/fake_sheets.py``).
+SHEETS_BACKEND = os.environ.get("AJUSTA_SHEETS_BACKEND", "gsheets")
+
+_spreadsheet_override = None
+_worksheets = {}
+_worksheets_lock = threading.Lock()
+
+
+def use_spreadsheet(spreadsheet):
+    """Direciona leituras e escritas para outra planilha (ex.: ``FakeSpreadsheet`` nos benchmarks)."""
+    global _spreadsheet_override
+    _spreadsheet_override = spreadsheet
+    with _worksheets_lock:
+        _worksheets.clear()
+
+
+def _get_spreadsheet():
+    if _spreadsheet_override is not None:
+        return _spreadsheet_override
+    if SHEETS_BACKEND == "fake":
+        return fake_sheets.get_fake_spreadsheet()
+    return sheets_client.get_spreadsheet()
+
+
+def _get_worksheet(worksheet, refresh=False):
+    """Aba gspread (ou ``FakeWorksheet``) em cache; ``refresh`` busca de novo."""
+    spreadsheet = _get_spreadsheet()
+    if spreadsheet is None:
+        return None
+    key = (id(spreadsheet), worksheet)
+    with _worksheets_lock:
+        ws = None if refresh else _worksheets.get(key)
+    if ws is None:
+        ws = spreadsheet.worksheet(worksheet)
+        with _worksheets_lock:
+            _worksheets[key] = ws
+    return ws
+
+
+def _read_remote(ws, worksheet):
+    """Lê a aba direto do Google Sheets, sem ``st.cache_data``."""
+    if ws is not None:
+        df = get_as_dataframe(ws, evaluate_formulas=True)
+    else:
+        # Planilha pública (somente leitura): não há cliente gspread exposto.
+        sheets_client.record_call("GET export")
+        df = sheets_client.get_connection().read(worksheet=worksheet, ttl=0)
+    return normalize_sheet_columns(df, worksheet)
+
+
+def _sheet_cell(v):
+    """Valor de célula como o ``set_with_dataframe`` envia (vazio para NA, números como números)."""
+    if v is None:
+        return ""
+    try:
+        if pd.isna(v):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, numbers.Integral):
+        return int(v)
+    if isinstance(v, numbers.Real):
+        return float(v)
+    s = str(v)
+    # mesmo escape padrão do gspread_dataframe para textos que começam com apóstrofo
+    return f"'{s}" if s.startswith("'") else s
+
+
+def _sheet_rows(df, header):
+    """Linhas de ``df`` na ordem das colunas ``header`` (colunas ausentes ficam vazias)."""
+    cols = [df[h].tolist() if h in df.columns else None for h in header]
+    return [
+        [_sheet_cell(c[i]) if c is not None else "" for c in cols]
+        for i in range(len(df))
+    ]
+
+
+def _as_sheet_frame(df):
+    """DataFrame que uma releitura da aba devolveria depois de gravar ``df``."""
+    header = [str(c) for c in df.columns]
+    rows = [[_sheet_cell(v) for v in row] for row in df.itertuples(index=False, name=None)]
+    if not rows:
+        return pd.DataFrame(columns=header)
+    parsed = TextParser([header] + rows).read()
+    parsed.index = df.index
+    return parsed.dropna(how="all", axis=0)
+
+
+def _storage_frame(tabela, worksheet):
+    """DataFrame de uma aba local (``utils/storage.py``), como uma leitura do Sheets o devolveria."""
+    if tabela is None:
+        return pd.DataFrame()
+    if not tabela.valores:
+        return normalize_sheet_columns(pd.DataFrame(columns=tabela.header), worksheet)
+    rows = [["" if v is None else v for v in row] for row in tabela.valores]
+    df = TextParser([tabela.header] + rows).read()
+    df.index = pd.Index(tabela.linhas)
+    return normalize_sheet_columns(df.dropna(how="all", axis=0), worksheet)
+
+
+def _read_storage(worksheet):
+    return _storage_frame(storage.backend_for(worksheet).read(worksheet), worksheet)
+
+
+def _store_snapshot(worksheet, df):
+    """Grava o snapshot; se não for possível, descarta o antigo para não servir dado velho."""
+    if not snapshot.write_snapshot(worksheet, df):
+        snapshot.delete_snapshot(worksheet)
+
+
+def _snapshot_after_write(worksheet, df):
+    """Atualiza o snapshot com o conteúdo recém-gravado na aba (write-through)."""
+    try:
+        _store_snapshot(worksheet, normalize_sheet_columns(_as_sheet_frame(df), worksheet))
+    except Exception:
+        snapshot.delete_snapshot(worksheet)
+
+
+def _snapshot_after_diff(worksheet, base, df, changed_rows):
+    """Atualiza o snapshot após uma gravação por diferença, reprocessando só as linhas alteradas."""
+    try:
+        alteradas = df.index[df.index.isin(changed_rows)]
+        manter = base.drop(index=base.index.difference(df.index).union(alteradas))
+        novas = normalize_sheet_columns(_as_sheet_frame(df.loc[alteradas]), worksheet)
+        _store_snapshot(worksheet, pd.concat([manter, novas]).sort_index())
+    except Exception:
+        snapshot.delete_snapshot(worksheet)
+
+
+def _snapshot_after_append(worksheet, new_rows, first_row):
+    """Acrescenta ao snapshot as linhas anexadas a partir da linha ``first_row`` da planilha."""
+    try:
+        base = snapshot.read_snapshot(worksheet)
+        if base is None:
+            return
+        novas = normalize_sheet_columns(_as_sheet_frame(new_rows), worksheet)
+        novas.index = pd.RangeIndex(first_row - 2, first_row - 2 + len(novas))
+        _store_snapshot(worksheet, pd.concat([base, novas]))
+    except Exception:
+        snapshot.delete_snapshot(worksheet)
+
+
+# Abas com sincronização incremental -> coluna com a versão da linha (epoch em ms), que
+# as escritas do app carimbam em toda linha nova ou alterada.
+SYNC_COLUMNS = {"Dados": "atualizado_em"}
+
+# Intervalo (s) entre leituras completas das abas sincronizadas: pegam edições feitas
+# direto na planilha, que não atualizam a coluna de versão.
+SYNC_FULL_INTERVAL = 3600
+
+# Mesmas opções de leitura do ``get_as_dataframe(evaluate_formulas=True)``.
+_VALUE_RENDER = {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "FORMATTED_STRING"}
+
+_ultima_leitura_completa = {}
+
+
+def _row_stamp():
+    return int(time.time() * 1000)
+
+
+def _stamp_new_rows(worksheet, new_data):
+    """Linhas a anexar com a coluna de versão preenchida (abas de ``SYNC_COLUMNS``)."""
+    col = SYNC_COLUMNS.get(worksheet)
+    if col is None:
+        return new_data
+    new_data = new_data.copy()
+    new_data[col] = _row_stamp()
+    return new_data
+
+
+def _stamp_changed_rows(worksheet, base, df, ranges):
+    """Carimba a coluna de versão nas linhas alteradas; retorna ``(ranges, df)``."""
+    col = SYNC_COLUMNS.get(worksheet)
+    if col is None or col not in df.columns:
+        return ranges, df
+    stamp = _row_stamp()
+    df = df.copy()
+    if ranges is None:
+        df[col] = stamp
+        return None, df
+    j = [str(c) for c in base.columns].index(col)
+    rows = sorted({a1_to_rowcol(r["range"].split(":")[0])[0] - 2 for r in ranges}.intersection(df.index))
+    if not rows:
+        return ranges, df
+    df.loc[rows, col] = stamp
+    celulas = [
+        {"range": f"{rowcol_to_a1(r + 2, j + 1)}:{rowcol_to_a1(r + 2, j + 1)}", "values": [[stamp]]}
+        for r in rows
+    ]
+    return ranges + celulas, df
+
+
+def _quote_title(title):
+    return "'" + title.replace("'", "''") + "'"
+
+
+def _col_letter(col):
+    return re.sub(r"\d", "", rowcol_to_a1(1, col))
+
+
+def _blocos_contiguos(indices):
+    """``[3, 4, 5, 9]`` -> ``[(3, 5), (9, 9)]``."""
+    indices = np.asarray(sorted(indices))
+    quebras = np.flatnonzero(np.diff(indices) > 1) + 1
+    return [(int(b[0]), int(b[-1])) for b in np.split(indices, quebras) if len(b)]
+
+
+def _sync_incremental(ws, worksheet):
+    """Releitura só das linhas cuja versão mudou; ``(None, True)`` se for preciso ler a aba toda."""
+    col = SYNC_COLUMNS.get(worksheet)
+    if col is None or ws is None:
+        return None, True
+    if time.time() - _ultima_leitura_completa.get(worksheet, 0.0) > SYNC_FULL_INTERVAL:
+        return None, True
+    base = snapshot.read_snapshot(worksheet)
+    if (
+        base is None or col not in base.columns or not base.index.is_unique
+        or not pd.api.types.is_integer_dtype(base.index)
+    ):
+        return None, True
+
+    header = [str(c) for c in base.columns]
+    titulo = _quote_title(ws.title)
+    letra = _col_letter(header.index(col) + 1)
+    faixas = ws.spreadsheet.values_batch_get(
+        [f"{titulo}!1:1", f"{titulo}!{letra}2:{letra}"], params=_VALUE_RENDER
+    ).get("valueRanges", [])
+    header_atual = [str(h) for h in ((faixas[0].get("values") or [[]])[0] if faixas else [])]
+    if header_atual != header:
+        return None, True
+
+    valores = faixas[1].get("values", []) if len(faixas) > 1 else []
+    atual = pd.to_numeric(pd.Series([v[0] if v else None for v in valores], dtype=object), errors="coerce")
+    anterior = pd.to_numeric(base[col], errors="coerce")
+    linhas = anterior.index.union(atual.index)
+    a, b = anterior.reindex(linhas), atual.reindex(linhas)
+    mudou = ~((a == b) | (a.isna() & b.isna())).to_numpy()
+    alteradas = linhas[mudou]
+    if len(alteradas) == 0:
+        return base, False
+    if len(alteradas) > max(len(base) // 2, 1):
+        return None, True
+
+    blocos = _blocos_contiguos(alteradas)
+    ultima = _col_letter(len(header))
+    faixas = ws.spreadsheet.values_batch_get(
+        [f"{titulo}!A{i0 + 2}:{ultima}{i1 + 2}" for i0, i1 in blocos], params=_VALUE_RENDER
+    ).get("valueRanges", [])
+    rows, idx = [], []
+    for (i0, i1), faixa in zip(blocos, faixas):
+        valores = faixa.get("values", [])
+        for k in range(i1 - i0 + 1):
+            linha = list(valores[k]) if k < len(valores) else []
+            rows.append(linha + [""] * (len(header) - len(linha)))
+            idx.append(i0 + k)
+
+    # mesmo parser do ``get_as_dataframe``; linhas que ficaram vazias saem do snapshot
+    novas = TextParser([header] + rows).read()
+    novas.index = pd.Index(idx)
+    novas = normalize_sheet_columns(novas.dropna(how="all"), worksheet)
+    manter = base.drop(index=base.index.intersection(alteradas))
+    return pd.concat([manter, novas]).sort_index(), True
+
+
+def _read_sheet(ws, worksheet):
+    """Lê a aba (incremental quando possível); retorna ``(df, mudou)``."""
+    try:
+        df, mudou = _sync_incremental(ws, worksheet)
+    except Exception as e:
+        _LOGGER.warning("Sincronização incremental de %r falhou, lendo a aba inteira: %s", worksheet, e)
+        df, mudou = None, True
+    if df is None:
+        df = _read_remote(ws, worksheet)
+        if worksheet in SYNC_COLUMNS:
+            _ultima_leitura_completa[worksheet] = time.time()
+    return df, mudou
+
+
+def _refresh_sheet(ws, worksheet):
+    """Releitura em segundo plano: o DataFrame novo, ou ``None`` se a aba não mudou."""
+    df, mudou = _read_sheet(ws, worksheet)
+    return df if mudou else None
+
+
+def fetch_sheet_data(worksheet):
+    """Lê a aba do Google Sheets (sem cache) e atualiza o snapshot local."""
+    if storage.backend_for(worksheet) is not None:
+        return _read_storage(worksheet)
+    df, mudou = _read_sheet(_get_worksheet(worksheet), worksheet)
+    if mudou:
+        _store_snapshot(worksheet, df)
+    else:
+        snapshot.mark_fresh(worksheet)
+    return df
+
+
 @st.cache_data(ttl=300)
+def _load_sheet_remote(worksheet):
+    return fetch_sheet_data(worksheet)
+
+
+@st.cache_data(max_entries=16)
+def _load_snapshot(worksheet, version):
+    return snapshot.read_snapshot(worksheet)
+
+
+@st.cache_data(max_entries=16)
+def _load_storage(worksheet, version):
+    return _read_storage(worksheet)
+
+
 def load_sheet_data(worksheet, force_refresh=False):
-    """Carrega dados de uma planilha específica"""
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(worksheet=worksheet)
-    return normalize_sheet_columns(df, worksheet)
+    """Carrega dados de uma planilha específica (``force_refresh`` lê direto do Sheets)"""
+    backend = storage.backend_for(worksheet)
+    if backend is not None:
+        version = backend.version(worksheet)
+        if force_refresh or version is None:
+            return _read_storage(worksheet)
+        return _load_storage(worksheet, version)
+
+    if force_refresh:
+        return fetch_sheet_data(worksheet)
+
+    version = snapshot.snapshot_version(worksheet)
+    if version is None:
+        return _load_sheet_remote(worksheet)
+
+    if snapshot.snapshot_is_stale(worksheet):
+        ws = _get_worksheet(worksheet)
+        snapshot.refresh_in_background(worksheet, lambda: _refresh_sheet(ws, worksheet))
 
-def clear_data_cache():
-    """Remove entradas do ``st.cache_data`` (ex.: leituras de planilha). Não atualiza a UI sozinha."""
-    st.cache_data.clear()
+    df = _load_snapshot(worksheet, version)
+    if df is None:
+        return _load_sheet_remote(worksheet)
+    return df
+
+def load_sheet_rows(worksheet, linhas):
+    """Só as linhas ``linhas`` (índices de ``load_sheet_data``) da aba."""
+    backend = storage.backend_for(worksheet)
+    if backend is not None:
+        return _storage_frame(backend.read_rows(worksheet, linhas), worksheet)
+    df = load_sheet_data(worksheet)
+    return df.loc[df.index.intersection(pd.Index(linhas))]
+
+
+def copy_sheet_to_storage(worksheet, backend=None):
+    """Copia a aba do Google Sheets para um backend local; retorna o número de linhas copiadas."""
+    backend = backend or storage.backend_for(worksheet)
+    if backend is None:
+        raise ValueError(f"Nenhum backend local configurado para {worksheet!r}.")
+    df = _read_remote(_get_worksheet(worksheet), worksheet).rename(columns=str)
+    header = list(df.columns)
+    with backend.transaction() as tx:
+        tx.replace(worksheet, header, _sheet_rows(df, header), linhas=df.index.tolist())
+    invalidate_sheet(worksheet)
+    return len(df)
+
+
+def invalidate_sheet(worksheet):
+    """Descarta a leitura em cache de uma aba, sem tocar nas demais."""
+    _load_sheet_remote.clear(worksheet)
+
+
+def clear_data_cache(worksheet=None):
+    """Remove leituras de planilha do ``st.cache_data``. Não atualiza a UI sozinha."""
+    if worksheet is not None:
+        invalidate_sheet(worksheet)
+        return
+    _load_sheet_remote.clear()
+    _load_snapshot.clear()
+    _load_storage.clear()
+
+
+def sheet_version(worksheet):
+    """Versão atual da aba (muda a cada escrita e releitura); ``None`` se não houver snapshot."""
+    backend = storage.backend_for(worksheet)
+    if backend is not None:
+        return backend.version(worksheet)
+    version = snapshot.snapshot_version(worksheet)
+    if version is None:
+        load_sheet_data(worksheet)
+        version = snapshot.snapshot_version(worksheet)
+    return version
+
+
+def depends_on_sheets(*worksheets, max_entries=4):
+    """Memoiza uma função derivada das abas ``worksheets``, com a versão de cada aba na chave."""
+    def decorator(fn):
+        def por_versao(versoes, *args, **kwargs):
+            return fn(*args, **kwargs)
+
+        # chave do cache do Streamlit = módulo + nome qualificado + código-fonte
+        por_versao.__module__ = fn.__module__
+        por_versao.__qualname__ = f"{fn.__qualname__}.por_versao"
+        cached = st.cache_data(max_entries=max_entries, show_spinner=False)(por_versao)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            versoes = tuple(sheet_version(w) for w in worksheets)
+            if None in versoes:
+                return fn(*args, **kwargs)
+            return cached(versoes, *args, **kwargs)
+
+        wrapper.clear = cached.clear
+        wrapper.worksheets = worksheets
+        return wrapper
+
+    return decorator
 
 
 def refresh_after_sheet_mutation(*, toast_message=None):
     """
-    Limpa o cache de leitura das planilhas e executa ``st.rerun()`` para a interface
-    refletir inserções, atualizações ou exclusões.
+    Executa ``st.rerun()`` para a interface refletir inserções, atualizações ou exclusões.
 
-    Use após mutações bem-sucedidas no Google Sheets. Em páginas com ``@st.dialog``,
-    chame esta função **dentro** do fluxo que grava na planilha: após o primeiro clique
-    no botão que abre o modal, ``if st.button(...)`` deixa de ser verdadeiro nos runs
-    seguintes, então ``st.rerun()`` colocado só no final desse ``if`` nunca dispara.
+    Use após mutações bem-sucedidas no Google Sheets. Em páginas com ``@st.dialog``, chame
+    esta função **dentro** do fluxo que grava na planilha: após o primeiro clique no botão que
+    abre o modal, ``if st.button(...)`` deixa de ser verdadeiro nos runs seguintes, então
+    ``st.rerun()`` colocado só no final desse ``if`` nunca dispara.
     """
     if toast_message:
         st.toast(toast_message)
-    clear_data_cache()
     st.rerun()
 
+
+def append_sheet_rows(worksheet, new_data):
+    """Anexa ``new_data`` ao fim da aba com ``append_rows``. Levanta exceção em caso de erro."""
+    backend = storage.backend_for(worksheet)
+    if backend is not None:
+        with backend.transaction() as tx:
+            primeira = _storage_append(tx, worksheet, new_data.rename(columns=str))
+        return {"updates": {"firstRow": primeira + 2, "updatedRows": len(new_data)}}
+
+    ws = _get_worksheet(worksheet)
+    if ws is None:
+        raise RuntimeError("Escrita indisponível: a conexão não usa conta de serviço.")
+
+    new_data = _stamp_new_rows(worksheet, new_data)
+    header = [str(h) for h in ws.row_values(1)]
+    novas = [str(c) for c in new_data.columns if str(c) not in header]
+    if novas:
+        header = header + novas
+        ws.update(f"A1:{rowcol_to_a1(1, len(header))}", [header], value_input_option="RAW")
+
+    resp = ws.append_rows(
+        _sheet_rows(new_data.rename(columns=str), header),
+        value_input_option="USER_ENTERED",
+        insert_data_option="INSERT_ROWS",
+        table_range="A1",
+    )
+    faixa = resp.get("updates", {}).get("updatedRange", "")
+    first_row = a1_to_rowcol(faixa.split("!")[-1].split(":")[0].replace("'", ""))[0] if faixa else None
+    if first_row:
+        _snapshot_after_append(worksheet, new_data.rename(columns=str).reindex(columns=header), first_row)
+    else:
+        snapshot.delete_snapshot(worksheet)
+    invalidate_sheet(worksheet)
+    return resp
+
+
 def update_sheet_data(worksheet, new_data):
     """Anexa as linhas de ``new_data`` ao final da aba. Para regravar a aba inteira, use ``overwrite_sheet_data``."""
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        df = load_sheet_data(worksheet)
-        updated_df = pd.concat([df, new_data], ignore_index=True)
-        conn.update(data=updated_df, worksheet=worksheet)
+        append_sheet_rows(worksheet, new_data)
         return True
     except Exception as e:
         st.error(f"Erro ao atualizar planilha: {str(e)}")
         return False
 
 
+def _changed_cells(a, b):
+    """Máscara booleana das posições em que ``a`` e ``b`` (alinhadas) gravariam células diferentes."""
+    try:
+        eq = (a == b).fillna(False).to_numpy(dtype=bool)
+    except (TypeError, ValueError):
+        eq = np.zeros(len(a), dtype=bool)
+    changed = ~(eq | (a.isna() & b.isna()).to_numpy(dtype=bool))
+    pos = np.flatnonzero(changed)
+    if len(pos):
+        # Confirma pelo valor enviado à planilha (ex.: 3 == 3.0, NaN == "").
+        av, bv = a.iloc[pos].tolist(), b.iloc[pos].tolist()
+        changed[pos] = [_sheet_cell(x) != _sheet_cell(y) for x, y in zip(av, bv)]
+    return changed
+
+
+def _compare_frames(base, df):
+    """
+    Alinha ``df`` a ``base``: ``(linhas, df_alinhado, mudou)``, ou ``None`` se não
+    comparáveis.
+    """
+    header = [str(c) for c in base.columns]
+    df = df.rename(columns=str)
+    if list(df.columns) != header and set(df.columns) != set(header):
+        return None
+    for idx in (base.index, df.index):
+        if not idx.is_unique or not pd.api.types.is_integer_dtype(idx) or (len(idx) and idx.min() < 0):
+            return None
+
+    linhas = base.index.union(df.index)
+    base_al = base.reindex(linhas)
+    novo_al = df.reindex(index=linhas, columns=header)
+    mudou = np.zeros((len(linhas), len(header)), dtype=bool)
+    for j, col in enumerate(header):
+        mudou[:, j] = _changed_cells(base_al[col], novo_al[col])
+    return linhas, novo_al, mudou
+
+
+def diff_sheet_ranges(base, df):
+    """
+    Faixas A1 mínimas que levam a aba lida como ``base`` a ``df``; ``None`` se não
+    comparáveis.
+    """
+    comparacao = _compare_frames(base, df)
+    if comparacao is None:
+        return None
+    linhas, novo_al, mudou = comparacao
+    em_df = linhas.isin(df.index)
+
+    ranges = []
+    for i in np.flatnonzero(mudou.any(axis=1)):
+        cols = np.flatnonzero(mudou[i])
+        row = int(linhas[i]) + 2
+        # agrupa colunas contíguas em uma única faixa
+        quebras = np.flatnonzero(np.diff(cols) > 1) + 1
+        for bloco in np.split(cols, quebras):
+            c0, c1 = int(bloco[0]), int(bloco[-1])
+            if em_df[i]:
+                valores = [_sheet_cell(v) for v in novo_al.iloc[i, c0 : c1 + 1].tolist()]
+            else:
+                valores = [""] * (c1 - c0 + 1)
+            ranges.append({
+                "range": f"{rowcol_to_a1(row, c0 + 1)}:{rowcol_to_a1(row, c1 + 1)}",
+                "values": [valores],
+            })
+    return ranges
+
+
+def _ranges_or_rewrite(base, df):
+    """Faixas de ``diff_sheet_ranges``, ou ``None`` quando compensa regravar a aba inteira."""
+    ranges = diff_sheet_ranges(base, df) if base is not None else None
+    if ranges is None or len(ranges) > max(len(base), len(df)) // 2 + 1:
+        return None
+    return ranges
+
+
+def _conferir_base(ws, worksheet, base, ranges):
+    """``RuntimeError`` se a aba ganhou ou perdeu linhas ou colunas desde ``base``."""
+    header = [str(c) for c in base.columns]
+    titulo = _quote_title(ws.title)
+    faixas = ws.spreadsheet.values_batch_get(
+        [f"{titulo}!1:1", f"{titulo}!A2:A"], params=_VALUE_RENDER
+    ).get("valueRanges", [])
+    header_atual = [str(h) for h in ((faixas[0].get("values") or [[]])[0] if faixas else [])]
+    valores = faixas[1].get("values", []) if len(faixas) > 1 else []
+
+    ultima = max([int(base.index.max()) if len(base) else -1]
+                 + [a1_to_rowcol(r["range"].split(":")[0])[0] - 2 for r in ranges])
+    linhas = pd.RangeIndex(ultima + 1)
+    atual = pd.Series([v[0] if v else "" for v in valores[: ultima + 1]], dtype=object).reindex(linhas)
+    atual, esperado = _display_str_series(atual), _display_str_series(base.iloc[:, 0].reindex(linhas))
+    iguais = (atual == esperado).fillna(False) | (atual.isna() & esperado.isna())
+    if header_atual != header or not iguais.all():
+        snapshot.delete_snapshot(worksheet)
+        invalidate_sheet(worksheet)
+        raise RuntimeError(
+            f"A aba {worksheet!r} foi alterada na planilha depois da última leitura "
+            "(linhas ou colunas incluídas ou removidas). Recarregue a página e refaça a alteração."
+        )
+
+
+def _storage_append(tx, worksheet, new_data):
+    """Anexa ``new_data`` (colunas ``str``) na transação ``tx``; retorna a posição da primeira linha."""
+    header = tx.header(worksheet) or []
+    novas = [c for c in new_data.columns if c not in header]
+    if novas or tx.header(worksheet) is None:
+        header = header + novas
+        tx.set_header(worksheet, header)
+    return tx.append(worksheet, _sheet_rows(new_data, header))
+
+
+def _storage_overwrite(tx, worksheet, df, base):
+    """Grava em ``tx`` só as linhas de ``df`` que diferem de ``base``; retorna quantas foram."""
+    df = df.rename(columns=str)
+    comparacao = _compare_frames(base, df) if base is not None and tx.header(worksheet) else None
+    if comparacao is None:
+        header = list(df.columns)
+        tx.replace(worksheet, header, _sheet_rows(df, header))
+        return len(df)
+    linhas, novo_al, mudou = comparacao
+    alteradas = linhas[mudou.any(axis=1)]
+    gravar = alteradas[alteradas.isin(df.index)]
+    remover = alteradas[~alteradas.isin(df.index)]
+    header = tx.header(worksheet)
+    if len(remover):
+        tx.delete_rows(worksheet, remover.tolist())
+    if len(gravar):
+        tx.put_rows(worksheet, gravar.tolist(), _sheet_rows(novo_al.loc[gravar], header))
+    return len(alteradas)
+
+
+def _usa_conexao_streamlit():
+    return _spreadsheet_override is None and SHEETS_BACKEND != "fake"
+
+
+def _rewrite_worksheet(worksheet, df):
+    """Regrava a aba inteira (cabeçalho + linhas), como antes do writer por diferença."""
+    if _usa_conexao_streamlit():
+        sheets_client.get_connection().update(data=df, worksheet=worksheet)
+        return
+    ws = _get_worksheet(worksheet)
+    header = [str(c) for c in df.columns]
+    ws.clear()
+    ws.update("A1", [header] + _sheet_rows(df.rename(columns=str), header), value_input_option="USER_ENTERED")
+
+
+def write_sheet_diff(worksheet, df, base=None):
+    """
+    Grava só as células em que ``df`` difere de ``base`` (padrão: o snapshot); exceção se
+    falhar.
+    """
+    backend = storage.backend_for(worksheet)
+    if backend is not None:
+        if base is None:
+            base = load_sheet_data(worksheet)
+        with backend.transaction() as tx:
+            return _storage_overwrite(tx, worksheet, df, base)
+
+    if base is None:
+        base = snapshot.read_snapshot(worksheet)
+    ranges, df = _stamp_changed_rows(worksheet, base, df, _ranges_or_rewrite(base, df))
+
+    if ranges is None:
+        _rewrite_worksheet(worksheet, df)
+        _snapshot_after_write(worksheet, df.reset_index(drop=True))
+        invalidate_sheet(worksheet)
+        return (len(df) + 1) * len(df.columns)
+
+    if ranges:
+        ws = _get_worksheet(worksheet)
+        if ws is None:
+            raise RuntimeError("Escrita indisponível: a conexão não usa conta de serviço.")
+        _conferir_base(ws, worksheet, base, ranges)
+        ws.batch_update(ranges, value_input_option="USER_ENTERED")
+    changed_rows = {a1_to_rowcol(r["range"].split(":")[0])[0] - 2 for r in ranges}
+    df = df.rename(columns=str).reindex(columns=[str(c) for c in base.columns])
+    _snapshot_after_diff(worksheet, base, df, changed_rows)
+    invalidate_sheet(worksheet)
+    return sum(len(r["values"][0]) for r in ranges)
+
+
 def overwrite_sheet_data(worksheet, df):
     """Substitui todo o conteúdo da aba pelo DataFrame (sem concatenar linhas)."""
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        conn.update(data=df, worksheet=worksheet)
+        write_sheet_diff(worksheet, df)
+        return True
+    except Exception as e:
+        st.error(f"Erro ao gravar planilha: {str(e)}")
+        return False
+
+
+def _cell_data(v):
+    """``CellData`` da API do Sheets para um valor já convertido por ``_sheet_cell``."""
+    if isinstance(v, bool):
+        return {"userEnteredValue": {"boolValue": v}}
+    if isinstance(v, (int, float)):
+        return {"userEnteredValue": {"numberValue": v}}
+    if v == "":
+        return {}
+    if v.startswith("="):
+        return {"userEnteredValue": {"formulaValue": v}}
+    # ``_sheet_cell`` escapa o apóstrofo inicial para USER_ENTERED; aqui o texto vai literal
+    return {"userEnteredValue": {"stringValue": v[1:] if v.startswith("'") else v}}
+
+
+def _row_data(values):
+    return {"values": [_cell_data(v) for v in values]}
+
+
+def _grid_requests(worksheet, grades, rows, cols):
+    """``appendDimension`` para a grade da aba comportar ``rows`` x ``cols``."""
+    ws = _get_worksheet(worksheet)
+    if worksheet not in grades:
+        if rows > ws.row_count or cols > ws.col_count:
+            ws = _get_worksheet(worksheet, refresh=True)
+        grades[worksheet] = [ws.row_count, ws.col_count]
+    grade = grades[worksheet]
+    reqs = []
+    for i, (dimension, alvo) in enumerate((("ROWS", rows), ("COLUMNS", cols))):
+        if alvo > grade[i]:
+            reqs.append({"appendDimension": {"sheetId": ws.id, "dimension": dimension, "length": alvo - grade[i]}})
+            grade[i] = alvo
+    return reqs
+
+
+class SheetMutationJournal:
+    """
+    Junta as escritas de uma ação em um único ``batchUpdate`` (tudo ou nada)::
+
+        journal = SheetMutationJournal()
+        journal.append("Dados", novo_beneficiario)
+        journal.overwrite("Projetos", df_projetos)
+        if commit_sheet_mutations(journal):
+            refresh_after_sheet_mutation()
+    """
+
+    def __init__(self):
+        self._ops = []
+
+    def __len__(self):
+        return len(self._ops)
+
+    def append(self, worksheet, new_data):
+        """Registra linhas a anexar ao fim da aba."""
+        self._ops.append(("append", worksheet, new_data.rename(columns=str)))
+
+    def overwrite(self, worksheet, df):
+        """Registra o novo conteúdo completo da aba (índice = posição na aba)."""
+        self._ops.append(("overwrite", worksheet, df.rename(columns=str)))
+
+    def _header(self, ws, worksheet, estado):
+        if estado is not None:
+            return list(estado["header"])
+        base = snapshot.read_snapshot(worksheet)
+        if base is not None:
+            return [str(c) for c in base.columns]
+        return [str(h) for h in ws.row_values(1)]
+
+    def commit(self):
+        """Envia as escritas registradas; em caso de erro levanta exceção e nenhuma aba muda."""
+        if not self._ops:
+            return 0
+        locais = [op for op in self._ops if storage.backend_for(op[1]) is not None]
+        remotas = [op for op in self._ops if storage.backend_for(op[1]) is None]
+        with contextlib.ExitStack() as transacoes:
+            self._stage_storage(locais, transacoes)
+            n = self._commit_sheets(remotas)
+        self._ops.clear()
+        for worksheet in {op[1] for op in locais}:
+            invalidate_sheet(worksheet)
+        return n
+
+    @staticmethod
+    def _stage_storage(ops, transacoes):
+        """Aplica ``ops`` em transações abertas dos backends locais (uma por backend)."""
+        # bases lidas antes de abrir as transações: dentro delas a leitura já veria o lote
+        bases = {w: load_sheet_data(w) for tipo, w, _ in ops if tipo == "overwrite"}
+        abertas = {}
+        for tipo, worksheet, df in ops:
+            backend = storage.backend_for(worksheet)
+            if id(backend) not in abertas:
+                abertas[id(backend)] = transacoes.enter_context(backend.transaction())
+            tx = abertas[id(backend)]
+            if tipo == "append":
+                _storage_append(tx, worksheet, df)
+            else:
+                _storage_overwrite(tx, worksheet, df, bases[worksheet])
+                bases[worksheet] = df
+
+    def _commit_sheets(self, ops):
+        if not ops:
+            return 0
+        spreadsheet = _get_spreadsheet()
+        if spreadsheet is None:
+            raise RuntimeError("Escrita indisponível: a conexão não usa conta de serviço.")
+
+        requests = []
+        # estado final de cada aba após o lote, para atualizar o snapshot sem reler
+        estados = {}
+        grades = {}
+        # abas gravadas por posição a partir do snapshot: conferidas antes do envio
+        conferir = {}
+        for tipo, worksheet, df in ops:
+            ws = _get_worksheet(worksheet)
+            estado = estados.get(worksheet)
+
+            if tipo == "append":
+                df = _stamp_new_rows(worksheet, df)
+                header = self._header(ws, worksheet, estado)
+                novas = [c for c in df.columns if c not in header]
+                if novas:
+                    header = header + novas
+                    requests += _grid_requests(worksheet, grades, 1, len(header))
+                    requests.append({"updateCells": {
+                        "start": {"sheetId": ws.id, "rowIndex": 0, "columnIndex": 0},
+                        "rows": [_row_data(header)],
+                        "fields": "userEnteredValue",
+                    }})
+                requests.append({"appendCells": {
+                    "sheetId": ws.id,
+                    "rows": [_row_data(r) for r in _sheet_rows(df, header)],
+                    "fields": "userEnteredValue",
+                }})
+                # ``appendCells`` não informa em que linha gravou: o snapshot é sincronizado
+                # depois do envio (incremental nas abas de ``SYNC_COLUMNS``) ou descartado.
+                estados[worksheet] = {"tipo": "append", "header": header}
+                continue
+
+            if estado is None:
+                base = snapshot.read_snapshot(worksheet)
+            else:
+                base = estado.get("df")
+            ranges, df = _stamp_changed_rows(worksheet, base, df, _ranges_or_rewrite(base, df))
+
+            if ranges is None:
+                header = list(df.columns)
+                linhas = [header] + _sheet_rows(df, header)
+                requests += _grid_requests(worksheet, grades, len(linhas), len(header))
+                # ``range`` só com ``sheetId`` cobre a aba toda: células fora de ``rows`` são limpas
+                requests.append({"updateCells": {
+                    "range": {"sheetId": ws.id},
+                    "rows": [_row_data(linha) for linha in linhas],
+                    "fields": "userEnteredValue",
+                }})
+                estados[worksheet] = {"tipo": "rewrite", "header": header, "df": df.reset_index(drop=True)}
+                continue
+
+            header = [str(c) for c in base.columns]
+            df = df.reindex(columns=header)
+            inicios = [a1_to_rowcol(r["range"].split(":")[0]) for r in ranges]
+            requests += _grid_requests(worksheet, grades, max((row for row, _ in inicios), default=0), len(header))
+            for (row, col), r in zip(inicios, ranges):
+                requests.append({"updateCells": {
+                    "start": {"sheetId": ws.id, "rowIndex": row - 1, "columnIndex": col - 1},
+                    "rows": [_row_data(v) for v in r["values"]],
+                    "fields": "userEnteredValue",
+                }})
+            changed_rows = {row - 2 for row, _ in inicios}
+            if estado is None:
+                estado = {"tipo": "diff", "base": base, "rows": set()}
+                conferir[worksheet] = (ws, base, [])
+            if worksheet in conferir:
+                conferir[worksheet][2].extend(ranges)
+            if estado["tipo"] == "diff":
+                estados[worksheet] = {
+                    "tipo": "diff", "header": header, "df": df,
+                    "base": estado["base"], "rows": estado["rows"] | changed_rows,
+                }
+            else:
+                estados[worksheet] = {"tipo": "rewrite", "header": header, "df": df}
+
+        for worksheet, (ws, base, ranges) in conferir.items():
+            if ranges:
+                _conferir_base(ws, worksheet, base, ranges)
+        if requests:
+            spreadsheet.batch_update({"requests": requests})
+
+        for worksheet, estado in estados.items():
+            if estado["tipo"] == "append":
+                _snapshot_after_journal_append(worksheet)
+            elif estado["tipo"] == "rewrite":
+                _snapshot_after_write(worksheet, estado["df"])
+            else:
+                _snapshot_after_diff(worksheet, estado["base"], estado["df"], estado["rows"])
+            invalidate_sheet(worksheet)
+        return len(requests)
+
+
+def _snapshot_after_journal_append(worksheet):
+    """Traz as linhas anexadas para o snapshot (sincronização incremental) ou o descarta."""
+    if worksheet in SYNC_COLUMNS:
+        try:
+            fetch_sheet_data(worksheet)
+            return
+        except Exception as e:
+            _LOGGER.warning("Não foi possível sincronizar %r após gravar: %s", worksheet, e)
+    snapshot.delete_snapshot(worksheet)
+
+
+def commit_sheet_mutations(journal):
+    """Envia as escritas de ``journal`` (tudo ou nada). Em caso de erro mostra ``st.error`` e retorna ``False``."""
+    try:
+        journal.commit()
         return True
     except Exception as e:
         st.error(f"Erro ao gravar planilha: {str(e)}")
         return False
 
 
+@depends_on_sheets("Dados")
 def get_beneficiarios_por_projeto():
     """
     Lê a aba ``Dados`` e retorna ``dict`` nome_do_projeto -> lista de ``nome_completo``.
@@ -0,0 +1,273 @@
+"""Backend em memória que imita a parte da API do gspread usada pelo app."""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol, rowcol_to_a1
+
+from utils import sheets_client
+
+_NUMERO = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def _cell_value(cell: dict):
+    """Valor de um ``CellData`` de ``spreadsheets.batchUpdate`` (``{}`` = célula vazia)."""
+    valor = cell.get("userEnteredValue") or {}
+    for chave in ("numberValue", "stringValue", "boolValue", "formulaValue"):
+        if chave in valor:
+            return valor[chave]
+    return ""
+
+
+def _user_entered(v):
+    """Converte como ``value_input_option="USER_ENTERED"``: texto numérico vira número."""
+    if isinstance(v, str) and _NUMERO.match(v.strip()):
+        s = v.strip()
+        return float(s) if "." in s else int(s)
+    return v
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, sheet_id: int, values=None, rows=0, cols=0):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self._rows: list[list] = [list(r) for r in (values or [])]
+        # tamanho real da grade e o que o gspread guardaria nas propriedades da aba
+        self._grade = [max(rows, len(self._rows)), max(cols, self._largura())]
+        self._propriedades = list(self._grade)
+
+    @property
+    def row_count(self) -> int:
+        return self._propriedades[0]
+
+    @property
+    def col_count(self) -> int:
+        return self._propriedades[1]
+
+    def _largura(self) -> int:
+        return max((len(r) for r in self._rows), default=0)
+
+    def _conferir_grade(self, row: int, col: int) -> None:
+        """Como ``updateCells`` na API real: erro se a célula está fora da grade."""
+        if row > self._grade[0] or col > self._grade[1]:
+            raise ValueError(
+                f"Range ({self.title}!{rowcol_to_a1(row, col)}) exceeds grid limits. "
+                f"Max rows: {self._grade[0]}, max columns: {self._grade[1]}"
+            )
+
+    def _set(self, row: int, col: int, value) -> None:
+        self._grade = [max(self._grade[0], row), max(self._grade[1], col)]
+        while len(self._rows) < row:
+            self._rows.append([])
+        linha = self._rows[row - 1]
+        while len(linha) < col:
+            linha.append("")
+        linha[col - 1] = value
+
+    def _last_table_row(self) -> int:
+        n = len(self._rows)
+        while n and not any(v not in ("", None) for v in self._rows[n - 1]):
+            n -= 1
+        return n
+
+    def row_values(self, row: int, **kwargs) -> list:
+        self.spreadsheet._register("row_values", received=self._largura())
+        if row > len(self._rows):
+            return []
+        linha = list(self._rows[row - 1])
+        while linha and linha[-1] in ("", None):
+            linha.pop()
+        return linha
+
+    def get_all_values(self, **kwargs) -> list[list]:
+        self.spreadsheet._register("get_all_values", received=sum(len(r) for r in self._rows))
+        return [list(r) for r in self._rows]
+
+    def append_rows(self, values, value_input_option="RAW", insert_data_option=None, table_range=None, **kwargs) -> dict:
+        self.spreadsheet._register("append_rows", sent=sum(len(r) for r in values))
+        inicio = self._last_table_row() + 1
+        for i, linha in enumerate(values):
+            for j, v in enumerate(linha):
+                self._set(inicio + i, j + 1, _user_entered(v) if value_input_option == "USER_ENTERED" else v)
+        fim_col = max((len(r) for r in values), default=1)
+        faixa = f"{rowcol_to_a1(inicio, 1)}:{rowcol_to_a1(inicio + len(values) - 1, fim_col)}"
+        return {"updates": {"updatedRange": f"'{self.title}'!{faixa}", "updatedRows": len(values)}}
+
+    def update(self, range_name, values=None, value_input_option="RAW", **kwargs) -> dict:
+        self.spreadsheet._register("update", sent=sum(len(r) for r in values or []))
+        self._write_range(range_name, values or [], value_input_option)
+        return {"updatedRange": f"'{self.title}'!{range_name}"}
+
+    def batch_update(self, data, value_input_option="RAW", **kwargs) -> dict:
+        self.spreadsheet._register("batch_update", sent=sum(len(r) for d in data for r in d["values"]))
+        for d in data:
+            self._write_range(d["range"], d["values"], value_input_option)
+        return {"totalUpdatedCells": sum(len(r) for d in data for r in d["values"])}
+
+    def insert_row(self, values, index: int = 1, value_input_option="RAW", **kwargs) -> dict:
+        """Como ``Worksheet.insert_row``: as linhas a partir de ``index`` descem uma posição."""
+        self.spreadsheet._register("insert_row", sent=len(values))
+        linha = [_user_entered(v) if value_input_option == "USER_ENTERED" else v for v in values]
+        self._rows.insert(index - 1, linha)
+        self._grade = [self._grade[0] + 1, max(self._grade[1], len(linha))]
+        return {}
+
+    def delete_rows(self, start_index: int, end_index: int | None = None) -> dict:
+        """Como ``Worksheet.delete_rows``: remove as linhas ``start_index..end_index`` (1-based)."""
+        self.spreadsheet._register("delete_rows")
+        fim = end_index or start_index
+        del self._rows[start_index - 1 : fim]
+        self._grade[0] -= fim - start_index + 1
+        return {}
+
+    def clear(self) -> dict:
+        self.spreadsheet._register("clear")
+        self._rows = []
+        return {}
+
+    def _write_range(self, range_name: str, values, value_input_option: str) -> None:
+        inicio = range_name.split("!")[-1].split(":")[0].replace("'", "")
+        row, col = a1_to_rowcol(inicio)
+        for i, linha in enumerate(values):
+            for j, v in enumerate(linha):
+                self._set(row + i, col + j, _user_entered(v) if value_input_option == "USER_ENTERED" else v)
+
+
+class FakeSpreadsheet:
+    """Planilha em memória com contadores de chamadas e células trafegadas."""
+
+    def __init__(self, *, latency_s: float = 0.0, seconds_per_cell: float = 0.0):
+        self.latency_s = latency_s
+        self.seconds_per_cell = seconds_per_cell
+        self._sheets: dict[str, FakeWorksheet] = {}
+        self.calls: Counter = Counter()
+        self.cells_sent = 0
+        self.cells_received = 0
+
+    def _register(self, op: str, *, sent: int = 0, received: int = 0) -> None:
+        self.calls[op] += 1
+        sheets_client.record_call(op)
+        self.cells_sent += sent
+        self.cells_received += received
+        custo = self.latency_s + (sent + received) * self.seconds_per_cell
+        if custo:
+            time.sleep(custo)
+
+    def reset_stats(self) -> None:
+        self.calls.clear()
+        self.cells_sent = 0
+        self.cells_received = 0
+
+    def add_worksheet(self, title: str, rows: int = 0, cols: int = 0, values=None) -> FakeWorksheet:
+        ws = FakeWorksheet(self, title, len(self._sheets), values, rows, cols)
+        self._sheets[title] = ws
+        return ws
+
+    def _aba(self, title: str) -> FakeWorksheet:
+        if title not in self._sheets:
+            raise KeyError(f"Aba não encontrada: {title}")
+        return self._sheets[title]
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        """A aba, com ``row_count``/``col_count`` relidos (como buscar o ``Worksheet`` de novo)."""
+        ws = self._aba(title)
+        ws._propriedades = list(ws._grade)
+        return ws
+
+    def worksheets(self) -> list[FakeWorksheet]:
+        return list(self._sheets.values())
+
+    def batch_update(self, body: dict) -> dict:
+        """
+        ``spreadsheets.batchUpdate`` atômico com ``appendCells``, ``updateCells`` e
+        ``appendDimension``.
+        """
+        requests = body.get("requests", [])
+        enviadas = sum(
+            len(row.get("values", []))
+            for req in requests
+            for op in req.values()
+            for row in op.get("rows", [])
+        )
+        self._register("spreadsheet_batch_update", sent=enviadas)
+        por_id = {ws.id: ws for ws in self._sheets.values()}
+        copia = {ws.id: ([list(r) for r in ws._rows], list(ws._grade)) for ws in self._sheets.values()}
+        try:
+            for req in requests:
+                (tipo, op), = req.items()
+                sheet_id = op.get("sheetId", op.get("start", op.get("range", {})).get("sheetId"))
+                if sheet_id not in por_id:
+                    raise ValueError(f"Aba inexistente: sheetId={sheet_id}")
+                ws = por_id[sheet_id]
+                linhas = [[_cell_value(c) for c in row.get("values", [])] for row in op.get("rows", [])]
+                if tipo == "appendCells":
+                    inicio = ws._last_table_row() + 1
+                    for i, linha in enumerate(linhas):
+                        for j, v in enumerate(linha):
+                            ws._set(inicio + i, j + 1, v)
+                elif tipo == "updateCells" and "start" in op:
+                    row0, col0 = op["start"].get("rowIndex", 0) + 1, op["start"].get("columnIndex", 0) + 1
+                    ws._conferir_grade(row0 + len(linhas) - 1, col0 + max(map(len, linhas), default=1) - 1)
+                    for i, linha in enumerate(linhas):
+                        for j, v in enumerate(linha):
+                            ws._set(row0 + i, col0 + j, v)
+                elif tipo == "updateCells":
+                    if set(op["range"]) != {"sheetId"}:
+                        raise NotImplementedError("updateCells com range parcial")
+                    ws._conferir_grade(len(linhas), max(map(len, linhas), default=1))
+                    ws._rows = [list(linha) for linha in linhas]
+                elif tipo == "appendDimension":
+                    ws._grade[0 if op["dimension"] == "ROWS" else 1] += op["length"]
+                else:
+                    raise NotImplementedError(tipo)
+        except Exception:
+            for sheet_id, (rows, grade) in copia.items():
+                por_id[sheet_id]._rows, por_id[sheet_id]._grade = rows, grade
+            raise
+        return {"replies": [{} for _ in requests]}
+
+    def values_batch_get(self, ranges, params=None) -> dict:
+        """Como ``values:batchGet``: células vazias no fim de linhas e linhas vazias no fim são omitidas."""
+        value_ranges = []
+        recebidas = 0
+        for range_name in ranges:
+            title, a1 = range_name.rsplit("!", 1)
+            ws = self._aba(title.strip("'").replace("''", "'"))
+            grid = a1_range_to_grid_range(a1)
+            r0, r1 = grid.get("startRowIndex", 0), grid.get("endRowIndex", len(ws._rows))
+            c0, c1 = grid.get("startColumnIndex", 0), grid.get("endColumnIndex", ws._largura())
+            values = []
+            for row in ws._rows[r0:r1]:
+                linha = list(row[c0:c1])
+                while linha and linha[-1] in ("", None):
+                    linha.pop()
+                values.append(linha)
+            while values and not values[-1]:
+                values.pop()
+            recebidas += sum(len(v) for v in values)
+            value_ranges.append({"range": range_name, "majorDimension": "ROWS", "values": values})
+        self._register("values_batch_get", received=recebidas)
+        return {"valueRanges": value_ranges}
+
+    def values_get(self, range_name: str, params=None) -> dict:
+        title = range_name.split("!")[0].strip("'").replace("''", "'")
+        ws = self._aba(title)
+        self._register("values_get", received=sum(len(r) for r in ws._rows))
+        return {"values": [list(r) for r in ws._rows]}
+
+
+_shared: FakeSpreadsheet | None = None
+
+
+def get_fake_spreadsheet() -> FakeSpreadsheet:
+    """Instância compartilhada pelo processo (usada com ``AJUSTA_SHEETS_BACKEND=fake``)."""
+    global _shared
+    if _shared is None:
+        _shared = FakeSpreadsheet()
+        for title in ("Dados", "Projetos", "Autenticação"):
+            _shared.add_worksheet(title)
+    return _shared
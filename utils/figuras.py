@@ -0,0 +1,111 @@
+"""Cache LRU das figuras Plotly do dashboard, guardadas como JSON (``AJUSTA_FIGURAS_CACHE_MB``)."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import plotly.graph_objects as go
+
+from utils.dashboard_data import Histograma
+
+FIGURAS_CACHE_BYTES = int(float(os.environ.get("AJUSTA_FIGURAS_CACHE_MB", "64")) * 1024 * 1024)
+
+_lock = threading.Lock()
+_figuras: OrderedDict[tuple, str] = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "descartes": 0, "bytes": 0}
+
+
+def chave_filtros(**filtros) -> tuple:
+    """Filtros ativos em forma canônica: sem os vazios, valores sem repetição e ordenados."""
+    return tuple(
+        (nome, tuple(sorted({str(v) for v in valores})))
+        for nome, valores in sorted(filtros.items())
+        if valores
+    )
+
+
+def _guardar(chave: tuple, spec: str, limite: int) -> None:
+    tamanho = len(spec.encode("utf-8"))
+    if tamanho > limite:
+        return
+    with _lock:
+        anterior = _figuras.pop(chave, None)
+        if anterior is not None:
+            _stats["bytes"] -= len(anterior.encode("utf-8"))
+        _figuras[chave] = spec
+        _stats["bytes"] += tamanho
+        while _stats["bytes"] > limite:
+            _, descartada = _figuras.popitem(last=False)
+            _stats["bytes"] -= len(descartada.encode("utf-8"))
+            _stats["descartes"] += 1
+
+
+def figura(
+    chave: tuple | None,
+    construir: Callable[[], go.Figure],
+    *,
+    limite: int | None = None,
+) -> go.Figure:
+    """
+    Figura de ``chave``, montada por ``construir`` só fora do cache; ``chave`` ``None`` não
+    usa o cache.
+    """
+    if chave is None:
+        return construir()
+    with _lock:
+        spec = _figuras.get(chave)
+        if spec is not None:
+            _figuras.move_to_end(chave)
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+    if spec is None:
+        spec = construir().to_json()
+        _guardar(chave, spec, FIGURAS_CACHE_BYTES if limite is None else limite)
+    # a especificação saiu de uma figura já validada: remontar sem validar de novo
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+def figura_histograma(
+    hist: Histograma,
+    *,
+    title: str,
+    x_label: str,
+    y_label: str = "Quantidade",
+    formato: str = ",.2f",
+    cor: str | None = None,
+) -> go.Figure:
+    """Barras encostadas, uma por faixa de ``hist``, com o intervalo da faixa no hover."""
+    bordas = hist.bordas
+    fig = go.Figure(
+        go.Bar(
+            x=(bordas[:-1] + bordas[1:]) / 2,
+            y=hist.contagens,
+            width=np.diff(bordas),
+            customdata=np.column_stack([bordas[:-1], bordas[1:]]),
+            marker_color=cor,
+            hovertemplate=(
+                f"{x_label}: %{{customdata[0]:{formato}}} a %{{customdata[1]:{formato}}}"
+                f"<br>{y_label}: %{{y}}<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, bargap=0)
+    return fig
+
+
+def figuras_cache_stats() -> dict:
+    """Acertos, faltas, descartes por tamanho, entradas e bytes em uso desde o início do processo."""
+    with _lock:
+        return {**_stats, "entradas": len(_figuras), "limite": FIGURAS_CACHE_BYTES}
+
+
+def limpar_figuras() -> None:
+    with _lock:
+        _figuras.clear()
+        _stats["bytes"] = 0
@@ -0,0 +1,124 @@
+"""Plano de dtypes compacto para os quadros só de leitura da aba Dados e relatório de memória."""
+
+from __future__ import annotations
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+CATEGORIA = "category"
+INTEIRO = "inteiro"
+FLOAT32 = "float32"
+TEXTO = "texto"
+
+PLANO_DADOS = {
+    **dict.fromkeys(
+        (
+            "sexo", "genero", "cor_raca_etnia", "escolaridade", "ocupacao", "bairro",
+            "tipo_residencia", "acesso_agua", "acesso_esgoto", "acesso_energia", "estado_civil",
+            "ja_teve_hanseniase", "classificacao_operacional", "forma_clinica", "numero_lesoes",
+            "nervos_afetados", "grau_incapacidade", "projeto_acao",
+        ),
+        CATEGORIA,
+    ),
+    **dict.fromkeys(
+        ("anos_residencia", "numero_filhos", "numero_membros_familia", "ano_diagnostico_hanseniase"),
+        INTEIRO,
+    ),
+    **dict.fromkeys(("renda_bruta_total", "renda_per_capita", "renda_per_capita_num"), FLOAT32),
+    **dict.fromkeys(
+        (
+            "nome_completo", "cpf", "rg", "data_nascimento", "endereco", "telefone",
+            "situacao_hanseniase", "responsavel_preenchimento", "responsavel_entrevista",
+        ),
+        TEXTO,
+    ),
+}
+
+_INTEIROS = ("Int8", "Int16", "Int32")
+
+
+def _numerica(serie: pd.Series) -> pd.Series | None:
+    """``serie`` como número, ou ``None`` se algum valor não for numérico."""
+    valores = pd.to_numeric(serie, errors="coerce")
+    if (valores.notna() != serie.notna()).any():
+        return None
+    return valores
+
+
+def _inteiro_compacto(serie: pd.Series) -> pd.Series:
+    valores = _numerica(serie)
+    if valores is None:
+        return serie
+    presentes = valores.dropna().to_numpy(dtype=float)
+    if (presentes != np.floor(presentes)).any():
+        return serie
+    lo, hi = (presentes.min(), presentes.max()) if len(presentes) else (0, 0)
+    for dtype in _INTEIROS:
+        info = np.iinfo(dtype.lower())
+        if info.min <= lo and hi <= info.max:
+            return valores.astype(dtype)
+    return serie
+
+
+def _converter(serie: pd.Series, tipo: str) -> pd.Series:
+    if tipo == CATEGORIA:
+        return serie if isinstance(serie.dtype, pd.CategoricalDtype) else serie.astype("category")
+    if tipo == INTEIRO:
+        return _inteiro_compacto(serie)
+    if tipo == FLOAT32:
+        valores = _numerica(serie)
+        return serie if valores is None else valores.astype("float32")
+    if tipo == TEXTO:
+        if isinstance(serie.dtype, pd.StringDtype) and serie.dtype.storage == "pyarrow":
+            return serie
+        if not (pd.api.types.is_string_dtype(serie.dtype) or serie.dtype == object):
+            return serie
+        return serie.astype("string[pyarrow]")
+    raise ValueError(f"tipo desconhecido no plano de dtypes: {tipo!r}")
+
+
+def aplicar_plano_dtypes(df: pd.DataFrame, plano: dict[str, str] = PLANO_DADOS) -> pd.DataFrame:
+    """Novo DataFrame com as colunas de ``plano`` convertidas; os dados das demais são compartilhados."""
+    if df is None or df.empty:
+        return df
+    out = df.copy(deep=False)
+    for col, tipo in plano.items():
+        if col in out.columns:
+            out[col] = _converter(out[col], tipo)
+    return out
+
+
+def memoria_colunas(df: pd.DataFrame) -> pd.Series:
+    """Bytes ocupados por coluna (``memory_usage(deep=True)``, sem o índice)."""
+    return df.memory_usage(deep=True, index=False)
+
+
+def relatorio_memoria(quadros: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Memória (MB) de cada quadro em ``quadros``, por coluna, com a linha ``total`` no fim."""
+    mb = 1024 * 1024
+    tabela = pd.DataFrame({nome: memoria_colunas(df) / mb for nome, df in quadros.items()})
+    totais = {nome: df.memory_usage(deep=True, index=True).sum() / mb for nome, df in quadros.items()}
+    tabela.loc["total"] = pd.Series(totais)
+    return tabela.round(2)
+
+
+def memoria_processo() -> dict[str, float | None]:
+    """Memória residente do processo (MB): ``rss``, ``anonima``, ``arquivos`` e ``pico``."""
+    campos = {"VmRSS": "rss", "RssAnon": "anonima", "RssFile": "arquivos", "VmHWM": "pico"}
+    out: dict[str, float | None] = dict.fromkeys(campos.values())
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for linha in f:
+                nome, _, valor = linha.partition(":")
+                if nome in campos:
+                    out[campos[nome]] = int(valor.split()[0]) / 1024  # kB
+    except OSError:
+        try:
+            import resource  # só existe em sistemas Unix
+        except ImportError:
+            return out
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        out["pico"] = pico / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return out
@@ -0,0 +1,331 @@
+"""Modelo de risco clínico exportado para arrays numpy."""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+_LOGGER = logging.getLogger(__name__)
+
+MODELOS_DIR = Path(
+    os.environ.get(
+        "AJUSTA_MODELOS_DIR",
+        Path(__file__).resolve().parents[1] / ".cache" / "modelos",
+    )
+)
+
+# Muda quando o conteúdo da exportação muda: exportações antigas são refeitas.
+FORMATO = 3
+
+# Linhas processadas por vez (cada bloco usa linhas × árvores máscaras).
+BLOCO_LINHAS = 4096
+
+# Variáveis de entrada dividem uma tabela enquanto o produto dos estados não passa disto.
+MAX_ESTADOS_TABELA = 4096
+
+
+class ModeloNumpy(NamedTuple):
+    numericas: tuple[str, ...]
+    medianas: np.ndarray  # float64, uma por variável numérica
+    categoricas: tuple[str, ...]
+    modas: tuple  # valor de imputação de cada categórica
+    categorias: tuple[np.ndarray, ...]  # categorias ordenadas do OneHotEncoder
+    limiares: tuple[np.ndarray, ...]  # limiares distintos (ordenados) de cada numérica nas árvores
+    grupos: tuple[tuple[int, ...], ...]  # entradas (numéricas, depois categóricas) de cada tabela
+    tabelas: tuple[np.ndarray, ...]  # (estados do grupo × árvores × palavras): folhas ainda alcançáveis
+    folhas: np.ndarray  # (árvores × folhas) probabilidade da classe 1, folhas da esquerda p/ direita
+
+    def n_estados(self, entrada: int) -> int:
+        """Numérica: uma faixa a mais que os limiares; categórica: uma a mais (fora do treino)."""
+        if entrada < len(self.numericas):
+            return len(self.limiares[entrada]) + 1
+        return len(self.categorias[entrada - len(self.numericas)]) + 1
+
+
+def _conferir_pipeline(pipeline):
+    """Passos do pipeline; ``ValueError`` se a estrutura não for a suportada."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    def falha(motivo: str):
+        raise ValueError(f"Pipeline não suportado pela exportação: {motivo}")
+
+    if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+        falha("esperado Pipeline(pré-processamento, modelo)")
+    prep, rf = pipeline.steps[0][1], pipeline.steps[-1][1]
+    if not isinstance(prep, ColumnTransformer) or not isinstance(rf, RandomForestClassifier):
+        falha("esperado ColumnTransformer + RandomForestClassifier")
+    if list(rf.classes_) != [0, 1] or rf.n_outputs_ != 1:
+        falha("esperada classificação binária (classes 0 e 1)")
+    passos = {nome: (t, cols) for nome, t, cols in prep.transformers_ if nome != "remainder"}
+    if set(passos) != {"num", "cat"} or prep.remainder != "drop":
+        falha("esperados só os blocos 'num' e 'cat'")
+    num, num_cols = passos["num"]
+    cat, cat_cols = passos["cat"]
+    if not (isinstance(num, SimpleImputer) and num.strategy == "median"):
+        falha("bloco 'num' deve ser SimpleImputer(strategy='median')")
+    if not (isinstance(cat, Pipeline) and [type(s) for _, s in cat.steps] == [SimpleImputer, OneHotEncoder]):
+        falha("bloco 'cat' deve ser SimpleImputer + OneHotEncoder")
+    imputer, onehot = cat.steps[0][1], cat.steps[1][1]
+    if imputer.strategy != "most_frequent" or onehot.drop_idx_ is not None or onehot._infrequent_enabled:
+        falha("OneHotEncoder com drop/categorias raras ou imputação diferente de moda")
+    if onehot.handle_unknown != "ignore":
+        falha("OneHotEncoder deve usar handle_unknown='ignore'")
+    for t in (num, imputer):
+        if not (isinstance(t.missing_values, float) and np.isnan(t.missing_values)) or t.add_indicator:
+            falha("imputação deve tratar só NaN, sem indicador")
+    if prep.output_indices_["num"] != slice(0, len(num_cols)):
+        falha("bloco 'num' deve vir antes do 'cat'")
+    return list(num_cols), num, list(cat_cols), imputer, onehot, rf
+
+
+def _como_array(valores) -> np.ndarray:
+    """Categorias numéricas em ``float64``; as demais como strings (o .npy dispensa pickle)."""
+    valores = list(valores)
+    if all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in valores):
+        return np.asarray(valores, dtype=np.float64)
+    return np.asarray([str(v) for v in valores])
+
+
+def _percorrer(tree):
+    """
+    Folhas da árvore (probabilidade da classe 1) e, por nó interno, as folhas da subárvore
+    esquerda.
+    """
+    probs, nos = [], []
+
+    def visitar(no: int) -> None:
+        esquerda = tree.children_left[no]
+        if esquerda == -1:
+            # DecisionTreeClassifier.predict_proba devolve ``value`` da folha (já em frações)
+            probs.append(tree.value[no, 0, 1])
+            return
+        inicio = len(probs)
+        visitar(esquerda)
+        nos.append((int(tree.feature[no]), float(tree.threshold[no]), inicio, len(probs)))
+        visitar(tree.children_right[no])
+
+    visitar(0)
+    return probs, nos
+
+
+def _agrupar(tabelas: list[np.ndarray], limite: int) -> tuple[list[tuple[int, ...]], list[np.ndarray]]:
+    """Junta as tabelas menores, duas a duas, enquanto o produto dos estados cabe em ``limite``."""
+    grupos = [((i,), t) for i, t in enumerate(tabelas)]
+    grupos.sort(key=lambda g: len(g[1]))
+    while len(grupos) > 1 and len(grupos[0][1]) * len(grupos[1][1]) <= limite:
+        (ea, ta), (eb, tb) = grupos[0], grupos[1]
+        junta = (ta[:, None] & tb[None, :]).reshape(len(ta) * len(tb), *ta.shape[1:])
+        grupos = sorted([*grupos[2:], (ea + eb, junta)], key=lambda g: len(g[1]))
+    return [g[0] for g in grupos], [g[1] for g in grupos]
+
+
+def exportar(pipeline) -> ModeloNumpy:
+    """Converte o pipeline scikit-learn em ``ModeloNumpy`` (``ValueError`` se não suportado)."""
+    num_cols, num, cat_cols, imputer, onehot, rf = _conferir_pipeline(pipeline)
+    categorias = tuple(_como_array(c) for c in onehot.categories_)
+    modas = tuple(_como_array([m])[0] for m in imputer.statistics_)
+
+    arvores = [_percorrer(e.tree_) for e in rf.estimators_]
+    max_folhas = max(len(probs) for probs, _ in arvores)
+    dtype = np.uint32 if max_folhas <= 32 else np.uint64
+    bits_palavra = np.iinfo(dtype).bits
+    palavras = -(-max_folhas // bits_palavra)
+    todas = int(np.iinfo(dtype).max)
+    folhas = np.full((len(arvores), max_folhas), np.nan)
+    for k, (probs, _) in enumerate(arvores):
+        folhas[k, : len(probs)] = probs
+
+    # variável do ColumnTransformer → (entrada, categoria do one-hot ou None)
+    origem = [(j, None) for j in range(len(num_cols))]
+    for c, cats in enumerate(categorias):
+        origem += [(len(num_cols) + c, i) for i in range(len(cats))]
+    limiares = tuple(
+        np.unique([t for _, nos in arvores for f, t, _, _ in nos if f == j]).astype(np.float64)
+        for j in range(len(num_cols))
+    )
+    n_estados = [len(l) + 1 for l in limiares] + [len(c) + 1 for c in categorias]
+    tabelas = [np.full((n, len(arvores), palavras), todas, dtype=dtype) for n in n_estados]
+    for k, (_, nos) in enumerate(arvores):
+        for f, t, inicio, fim in nos:
+            entrada, categoria = origem[f]
+            if categoria is None:
+                # estado e = faixa com ``e`` limiares abaixo do valor: o nó é falso (valor > t)
+                falso = np.arange(n_estados[entrada]) > np.searchsorted(limiares[entrada], t)
+            else:
+                valor = (np.arange(n_estados[entrada]) == categoria).astype(np.float32)
+                falso = valor > t
+            # nó falso: a linha vai para a direita e as folhas da esquerda saem do alcance
+            bits = ((1 << (fim - inicio)) - 1) << inicio
+            for p in range(inicio // bits_palavra, (fim - 1) // bits_palavra + 1):
+                tabelas[entrada][falso, k, p] &= dtype(~(bits >> (p * bits_palavra)) & todas)
+    grupos, tabelas = _agrupar(tabelas, MAX_ESTADOS_TABELA)
+    return ModeloNumpy(
+        numericas=tuple(num_cols),
+        medianas=np.asarray(num.statistics_, dtype=np.float64),
+        categoricas=tuple(cat_cols),
+        modas=modas,
+        categorias=categorias,
+        limiares=limiares,
+        grupos=tuple(grupos),
+        tabelas=tuple(tabelas),
+        folhas=folhas,
+    )
+
+
+def _estados(modelo: ModeloNumpy, X: pd.DataFrame) -> list[np.ndarray]:
+    """Estado de cada entrada, linha a linha, depois da imputação do ``ColumnTransformer``."""
+    estados = []
+    for col, mediana, limiares in zip(modelo.numericas, modelo.medianas, modelo.limiares):
+        v = X[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        # as árvores comparam a variável em float32
+        v = np.where(np.isnan(v), mediana, v).astype(np.float32).astype(np.float64)
+        estados.append(np.searchsorted(limiares, v, side="left"))
+    for col, moda, cats in zip(modelo.categoricas, modelo.modas, modelo.categorias):
+        s = X[col]
+        if cats.dtype.kind == "f":
+            v = s.to_numpy(dtype=np.float64, na_value=np.nan)
+            v = np.where(np.isnan(v), moda, v)
+        else:
+            v = s.astype(object).where(s.notna(), moda).to_numpy().astype(str)
+        i = np.minimum(np.searchsorted(cats, v), len(cats) - 1)
+        # categoria fora do treino: one-hot todo zerado (handle_unknown="ignore")
+        estados.append(np.where(cats[i] == v, i, len(cats)))
+    return estados
+
+
+def prever_proba(modelo: ModeloNumpy, X: pd.DataFrame) -> np.ndarray:
+    """Probabilidade da classe 1 para cada linha de ``X`` (mesmo que ``predict_proba(X)[:, 1]``)."""
+    estados = _estados(modelo, X)
+    indices = []
+    for grupo in modelo.grupos:
+        idx = np.zeros(len(X), dtype=np.intp)
+        for entrada in grupo:
+            idx = idx * modelo.n_estados(entrada) + estados[entrada]
+        indices.append(idx)
+    n_arvores, max_folhas = modelo.folhas.shape
+    base = np.arange(n_arvores) * max_folhas
+    folhas = modelo.folhas.ravel()
+    palavras = modelo.tabelas[0].shape[2]
+    bits_palavra = modelo.tabelas[0].itemsize * 8
+    # com uma palavra (o caso comum), tabelas 2D: mesma leitura de antes, sem o eixo extra
+    tabelas = [t[..., 0] for t in modelo.tabelas] if palavras == 1 else modelo.tabelas
+    out = np.empty(len(X), dtype=np.float64)
+    for ini in range(0, len(X), BLOCO_LINHAS):
+        fim = min(ini + BLOCO_LINHAS, len(X))
+        alcance = tabelas[0][indices[0][ini:fim]]
+        for tabela, idx in zip(tabelas[1:], indices[1:]):
+            alcance &= tabela[idx[ini:fim]]
+        if palavras > 1:
+            # primeira palavra com algum bit; nela fica o bit mais baixo
+            palavra = np.argmax(alcance != 0, axis=2)
+            alcance = np.take_along_axis(alcance, palavra[..., None], axis=2)[..., 0]
+        # folha da linha: o bit mais baixo que sobrou (isolado e convertido pelo expoente)
+        menor = alcance & (~alcance + alcance.dtype.type(1))
+        folha = np.frexp(menor.astype(np.float64))[1] - 1
+        if palavras > 1:
+            folha += palavra * bits_palavra
+        # soma sequencial na ordem das árvores, como o acumulador do RandomForest
+        out[ini:fim] = np.cumsum(folhas[base + folha], axis=1)[:, -1] / n_arvores
+    return out
+
+
+def salvar_arrays(arrays: dict[str, np.ndarray], path: Path) -> None:
+    """Grava cada array como ``<nome>.npy`` na pasta ``path``, de forma atômica."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.mkdir(parents=True)
+    try:
+        for nome, arr in arrays.items():
+            np.save(tmp / f"{nome}.npy", arr, allow_pickle=False)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            if not path.is_dir():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def carregar_arrays(path: Path) -> dict[str, np.ndarray]:
+    """Arrays da pasta ``path`` mapeados em memória, somente leitura (``FileNotFoundError`` se não existe)."""
+    if not path.is_dir():
+        raise FileNotFoundError(path)
+    # ``asarray`` troca o ``np.memmap`` por um ``ndarray`` comum sobre o mesmo mapeamento
+    return {p.stem: np.asarray(np.load(p, mmap_mode="r", allow_pickle=False)) for p in path.glob("*.npy")}
+
+
+def modelo_path(versao_modelo: str) -> Path:
+    return MODELOS_DIR / f"{versao_modelo}-v{FORMATO}"
+
+
+def salvar(modelo: ModeloNumpy, path: Path) -> None:
+    """Grava a exportação na pasta ``path`` (``salvar_arrays``)."""
+    arrays = {
+        "numericas": np.asarray(modelo.numericas),
+        "medianas": modelo.medianas,
+        "categoricas": np.asarray(modelo.categoricas),
+        "folhas": modelo.folhas,
+    }
+    for i, (moda, cats) in enumerate(zip(modelo.modas, modelo.categorias)):
+        arrays[f"moda_{i}"] = np.asarray(moda)
+        arrays[f"categorias_{i}"] = cats
+    for j, limiares in enumerate(modelo.limiares):
+        arrays[f"limiares_{j}"] = limiares
+    for g, (grupo, tabela) in enumerate(zip(modelo.grupos, modelo.tabelas)):
+        arrays[f"grupo_{g}"] = np.asarray(grupo, dtype=np.int64)
+        arrays[f"tabela_{g}"] = tabela
+    path.parent.mkdir(parents=True, exist_ok=True)
+    salvar_arrays(arrays, path)
+
+
+def carregar(path: Path) -> ModeloNumpy:
+    """Exportação gravada por ``salvar``; tabelas e folhas ficam mapeadas do disco."""
+    z = carregar_arrays(path)
+    numericas = tuple(str(c) for c in z["numericas"])
+    categoricas = tuple(str(c) for c in z["categoricas"])
+    n_grupos = sum(1 for nome in z if nome.startswith("grupo_"))
+    return ModeloNumpy(
+        numericas=numericas,
+        medianas=z["medianas"],
+        categoricas=categoricas,
+        modas=tuple(z[f"moda_{i}"][()] for i in range(len(categoricas))),
+        categorias=tuple(z[f"categorias_{i}"] for i in range(len(categoricas))),
+        limiares=tuple(z[f"limiares_{j}"] for j in range(len(numericas))),
+        grupos=tuple(tuple(int(e) for e in z[f"grupo_{g}"]) for g in range(n_grupos)),
+        tabelas=tuple(z[f"tabela_{g}"] for g in range(n_grupos)),
+        folhas=z["folhas"],
+    )
+
+
+def carregar_ou_exportar(versao_modelo: str, carregar_pipeline: Callable[[], object]) -> ModeloNumpy | None:
+    """
+    Exportação de ``versao_modelo`` lida do disco ou feita e gravada; ``None`` se não
+    exportável.
+    """
+    path = modelo_path(versao_modelo)
+    try:
+        return carregar(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:  # arquivo truncado, formato antigo etc.: exporta de novo
+        _LOGGER.warning("Exportação do modelo ilegível (%s): %s", path, e)
+    try:
+        modelo = exportar(carregar_pipeline())
+    except ValueError as e:
+        _LOGGER.warning("%s; usando o scikit-learn", e)
+        return None
+    try:
+        salvar(modelo, path)
+    except OSError as e:
+        _LOGGER.warning("Não foi possível gravar a exportação do modelo (%s): %s", path, e)
+    return modelo
@@ -10,6 +10,11 @@ NERVOSAFET: contagem aproximada de nervos afetados (0, 2, 5 para faixas do formu
 
 from __future__ import annotations
 
+import hashlib
+import logging
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
@@ -17,6 +22,11 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
+from utils.memoria import memoria_processo
+from utils.modelo_numpy import carregar_ou_exportar, prever_proba
+from utils.score_cache import precarregar_scores, scores_em_cache
+from utils.tabela_scores import SCORE_TABELA, TIPOS, carregar_ou_montar, consultar
+
 # Colunas exigidas pelo pickle (RandomForest + ColumnTransformer)
 FEATURE_COLS = [
     "NU_IDADE_N",
@@ -31,6 +41,8 @@ FEATURE_COLS = [
 
 MODEL_REL_PATH = Path("ml_models") / "model_16d63f02.pkl"
 
+_LOGGER = logging.getLogger(__name__)
+
 # Classificação sugerida em contexts/implement_model.md
 def classificar_risco(score: float) -> str:
     if score < 0.3:
@@ -40,6 +52,12 @@ def classificar_risco(score: float) -> str:
     return "Alto"
 
 
+def classificar_riscos(scores) -> np.ndarray:
+    """``classificar_risco`` de um vetor de scores de uma vez (array ``object``)."""
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.select([scores < 0.3, scores < 0.7], ["Baixo", "Médio"], "Alto").astype(object)
+
+
 def _norm_label(val) -> str:
     if val is None or (isinstance(val, float) and np.isnan(val)):
         return ""
@@ -187,66 +205,138 @@ def label_cs_sexo(val) -> str:
     return str(val)
 
 
-@st.cache_resource
+def _model_path() -> Path:
+    path = Path(__file__).resolve().parents[1] / MODEL_REL_PATH
+    if not path.is_file():
+        raise FileNotFoundError(f"Modelo não encontrado: {path}")
+    return path
+
+
+# ``show_spinner=False``: a pré-carga chama estas funções fora de uma execução de página
+@st.cache_resource(show_spinner=False)
 def get_clinical_risk_pipeline():
     """Carrega o joblib uma vez por sessão (sklearn==1.6.1)."""
     import joblib  # import tardio: evita falha ao importar o módulo se joblib/sklearn atrasarem no deploy
 
-    root = Path(__file__).resolve().parents[1]
-    path = root / MODEL_REL_PATH
-    if not path.is_file():
-        raise FileNotFoundError(f"Modelo não encontrado: {path}")
-    return joblib.load(path)
+    return joblib.load(_model_path())
 
 
-def _idade_anos_series(s_data_nasc: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(s_data_nasc, format="%d/%m/%Y", errors="coerce")
-    hoje = datetime.now()
-    dias = (hoje - dt).dt.days
-    idade = (dias / 365.25).round().astype("Int64")
-    return idade
+@lru_cache(maxsize=4)
+def _digest_modelo(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return f"{Path(path).stem}-{h.hexdigest()[:12]}"
 
 
-def _build_feature_row_series(df: pd.DataFrame) -> pd.DataFrame:
-    """Retorna DataFrame com colunas FEATURE_COLS (object/float mistos)."""
-    out = pd.DataFrame(index=df.index)
+def versao_modelo() -> str:
+    """Nome e hash do conteúdo do pickle: trocar o arquivo invalida o cache de scores."""
+    path = _model_path()
+    info = path.stat()
+    return _digest_modelo(str(path), info.st_mtime_ns, info.st_size)
+
 
-    out["NU_IDADE_N"] = _idade_anos_series(df["data_nascimento"])
+@st.cache_resource(show_spinner=False)
+def get_modelo_numpy():
+    """
+    Pipeline exportado para arrays numpy (``utils.modelo_numpy``); ``None`` se não for
+    exportável.
+    """
+    return carregar_ou_exportar(versao_modelo(), get_clinical_risk_pipeline)
+
+
+def _prever_modelo(X: pd.DataFrame) -> np.ndarray:
+    """Score (classe 1) de cada linha: igual ao ``predict_proba`` do pipeline, sem o scikit-learn."""
+    modelo = get_modelo_numpy()
+    if modelo is None:
+        return get_clinical_risk_pipeline().predict_proba(X)[:, 1]
+    return prever_proba(modelo, X)
+
+
+def eixos_dominio() -> list[np.ndarray]:
+    """Valores possíveis de cada variável (ordem de ``FEATURE_COLS``): idade 0–120 e os vocabulários."""
+    eixos = [np.arange(0, 121, dtype=np.float64)]
+    for col in FEATURE_COLS[1:]:
+        valores = sorted(set(_ORIGEM_FEATURES[col][1].values()))
+        eixos.append(np.asarray(valores, dtype=str if col == "CS_SEXO" else np.float64))
+    return eixos
+
+
+@st.cache_resource(show_spinner=False)
+def get_tabela_scores():
+    """Tabela de scores do domínio inteiro no tipo de ``AJUSTA_SCORE_TABELA`` (``utils.tabela_scores``)."""
+    return carregar_ou_montar(versao_modelo(), FEATURE_COLS, eixos_dominio(), _prever_modelo, SCORE_TABELA)
+
+
+def _prever(X: pd.DataFrame) -> np.ndarray:
+    """Scores pelo modelo ou, com ``AJUSTA_SCORE_TABELA``, pela tabela (modelo só fora do domínio)."""
+    if SCORE_TABELA not in TIPOS:
+        return _prever_modelo(X)
+    scores, dentro = consultar(get_tabela_scores(), X)
+    if not dentro.all():
+        scores[~dentro] = _prever_modelo(X.loc[~dentro])
+    return scores
+
+
+def versao_scores() -> str:
+    """Versão dos scores guardados no cache: a do modelo, mais o tipo quando vêm da tabela."""
+    if SCORE_TABELA in TIPOS:
+        return f"{versao_modelo()}-tabela-{SCORE_TABELA}"
+    return versao_modelo()
+
+
+# Variável do modelo → (coluna do cadastro, mapa do rótulo normalizado para o código)
+_ORIGEM_FEATURES = {
+    "CS_SEXO": ("sexo", _MAP_SEXO),
+    "CS_RACA": ("cor_raca_etnia", _MAP_RACA),
+    "CS_ESCOL_N": ("escolaridade", _MAP_ESCOL),
+    "NU_LESOES": ("numero_lesoes", _MAP_LESOES),
+    "NERVOSAFET": ("nervos_afetados", _MAP_NERVOS),
+    "CLASSOPERA": ("classificacao_operacional", _MAP_CLASSOPERA),
+    "FORMACLINI": ("forma_clinica", _MAP_FORMA),
+}
 
-    sexo_raw = df["sexo"].map(_norm_label)
-    out["CS_SEXO"] = sexo_raw.map(_MAP_SEXO)
 
-    raca_raw = df["cor_raca_etnia"].map(_norm_label)
-    out["CS_RACA"] = raca_raw.map(lambda x: _MAP_RACA.get(x) if x else None)
+def _norm_labels(valores) -> pd.Index:
+    """``_norm_label`` de strings não nulas, com operações de string vetorizadas."""
+    return (
+        pd.Index(valores, dtype=object)
+        .str.strip()
+        .str.replace("\u2013", "-", regex=False)
+        .str.replace("\u2014", "-", regex=False)
+    )
 
-    esc_raw = df["escolaridade"].map(_norm_label)
-    out["CS_ESCOL_N"] = esc_raw.map(lambda x: _MAP_ESCOL.get(x) if x else None)
 
-    le_raw = df["numero_lesoes"].map(_norm_label)
-    out["NU_LESOES"] = le_raw.map(lambda x: _MAP_LESOES.get(x) if x else None)
+def _mapear_codigos(s: pd.Series, mapa: dict, dtype=np.float64) -> np.ndarray:
+    """Cada célula normalizada como ``_norm_label`` e traduzida por ``mapa`` (``NaN`` fora dele)."""
+    # ``string`` converte cada célula com ``str`` antes de agrupar (1 e 1.0 são rótulos distintos)
+    codigos, unicos = pd.factorize(s.astype("string"))
+    traduzidos = _norm_labels(unicos).map(mapa)
+    # código -1 (célula nula) cai na última posição: NaN
+    return np.append(np.asarray(traduzidos, dtype=dtype), np.nan)[codigos]
 
-    nv_raw = df["nervos_afetados"].map(_norm_label)
-    out["NERVOSAFET"] = nv_raw.map(lambda x: _MAP_NERVOS.get(x) if x else None)
 
-    co_raw = df["classificacao_operacional"].map(_norm_label)
-    out["CLASSOPERA"] = co_raw.map(lambda x: _MAP_CLASSOPERA.get(x) if x else None)
+def _idade_anos_series(s_data_nasc: pd.Series) -> np.ndarray:
+    """Idade em anos (``float64``, ``NaN`` sem data válida), convertendo cada data distinta uma vez."""
+    codigos, unicos = pd.factorize(s_data_nasc)
+    dt = pd.to_datetime(pd.Index(unicos, dtype=object), format="%d/%m/%Y", errors="coerce")
+    dias = (datetime.now() - dt).days.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.append(np.round(dias / 365.25), np.nan)[codigos]
 
-    fc_raw = df["forma_clinica"].map(_norm_label)
-    out["FORMACLINI"] = fc_raw.map(lambda x: _MAP_FORMA.get(x) if x else None)
 
-    return out
+def _build_feature_row_series(df: pd.DataFrame) -> pd.DataFrame:
+    """Retorna DataFrame com colunas FEATURE_COLS: ``CS_SEXO`` ('M'/'F'), as demais ``float64``."""
+    colunas = {"NU_IDADE_N": _idade_anos_series(df["data_nascimento"])}
+    for col, (origem, mapa) in _ORIGEM_FEATURES.items():
+        colunas[col] = _mapear_codigos(df[origem], mapa, object if col == "CS_SEXO" else np.float64)
+    # as sete colunas numéricas ficam em um único bloco float64 (a matriz do modelo)
+    return pd.DataFrame(colunas, index=df.index, columns=FEATURE_COLS)
 
 
 def _elegivel_mask(features: pd.DataFrame) -> pd.Series:
-    ok_idade = features["NU_IDADE_N"].notna() & (features["NU_IDADE_N"] >= 0) & (
-        features["NU_IDADE_N"] <= 120
-    )
-    ok_rest = pd.Series(True, index=features.index)
-    for c in FEATURE_COLS:
-        if c == "NU_IDADE_N":
-            continue
-        ok_rest &= features[c].notna()
-    return ok_idade & ok_rest
+    ok_idade = features["NU_IDADE_N"].between(0, 120)
+    return ok_idade & features.drop(columns="NU_IDADE_N").notna().all(axis=1)
 
 
 def beneficiarios_com_score(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
@@ -282,31 +372,77 @@ def beneficiarios_com_score(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
     elig = _elegivel_mask(feats)
     stats["elegiveis"] = int(elig.sum())
 
-    out["score_risco_clinico"] = np.nan
-    out["categoria_risco"] = pd.Series(pd.NA, index=out.index, dtype="string")
+    score = np.full(len(out), np.nan)
+    categoria = np.full(len(out), None, dtype=object)
+    if elig.any():
+        X = feats.loc[elig]
+        proba = scores_em_cache(X, versao_scores(), _prever)
+        score[elig.to_numpy()] = proba
+        categoria[elig.to_numpy()] = classificar_riscos(proba)
+        stats["com_score"] = int(elig.sum())
+
+    out["score_risco_clinico"] = score
+    out["categoria_risco"] = pd.array(categoria, dtype="string")
     for c in FEATURE_COLS:
         if c == "CS_SEXO":
-            out[c] = pd.Series(pd.NA, index=out.index, dtype=object)
+            out[c] = feats[c].astype(object).where(elig, pd.NA)
         else:
-            out[c] = np.nan
+            out[c] = feats[c].where(elig)
 
-    if not elig.any():
-        return out, stats
+    return out, stats
 
-    pipeline = get_clinical_risk_pipeline()
-    X = feats.loc[elig, FEATURE_COLS].copy()
-    # Garantir dtypes esperados pelo sklearn
-    X["NU_IDADE_N"] = X["NU_IDADE_N"].astype(float)
-    X["NU_LESOES"] = X["NU_LESOES"].astype(float)
-    X["NERVOSAFET"] = X["NERVOSAFET"].astype(float)
-    for c in ("CLASSOPERA", "CS_ESCOL_N", "FORMACLINI", "CS_RACA"):
-        X[c] = X[c].astype(float)
-
-    proba = pipeline.predict_proba(X)[:, 1]
-    out.loc[elig, "score_risco_clinico"] = proba
-    out.loc[elig, "categoria_risco"] = [classificar_risco(float(s)) for s in proba]
-    for c in FEATURE_COLS:
-        out.loc[elig, c] = feats.loc[elig, c].values
-    stats["com_score"] = int(elig.sum())
 
-    return out, stats
+_precarga_lock = threading.Lock()
+_precarga = {"estado": "não iniciada", "origem": None, "etapas": {}, "memoria": {}, "erro": None}
+
+
+def _linha_exemplo() -> pd.DataFrame:
+    return pd.DataFrame({col: eixo[:1] for col, eixo in zip(FEATURE_COLS, eixos_dominio())})
+
+
+def precarregar_modelo() -> bool:
+    """
+    Carrega o modelo de risco clínico em uma thread daemon, uma vez por processo; ``True`` se
+    iniciou agora.
+    """
+    with _precarga_lock:
+        if _precarga["estado"] != "não iniciada":
+            return False
+        _precarga.update(estado="carregando", memoria={"antes": memoria_processo()})
+
+    def etapa(nome: str, fn) -> None:
+        t0 = time.perf_counter()
+        fn()
+        with _precarga_lock:
+            _precarga["etapas"][nome] = time.perf_counter() - t0
+
+    def _run() -> None:
+        estado, origem, erro = "pronto", None, None
+        try:
+            etapa("versão do modelo", versao_modelo)
+            etapa("modelo", get_modelo_numpy)
+            if SCORE_TABELA in TIPOS:
+                etapa("tabela de scores", get_tabela_scores)
+            etapa("scores guardados", lambda: precarregar_scores(versao_scores()))
+            # sem exportação numpy, é aqui que o pickle é lido
+            etapa("primeiro score", lambda: _prever(_linha_exemplo()))
+            origem = "numpy (mmap)" if get_modelo_numpy() is not None else "scikit-learn (pickle)"
+        except Exception as e:
+            _LOGGER.warning("Falha na pré-carga do modelo de risco clínico: %s", e)
+            estado, erro = "falhou", str(e)
+        with _precarga_lock:
+            _precarga.update(estado=estado, origem=origem, erro=erro)
+            _precarga["memoria"]["depois"] = memoria_processo()
+
+    threading.Thread(target=_run, name="precarga-risco-clinico", daemon=True).start()
+    return True
+
+
+def precarga_stats() -> dict:
+    """
+    Estado da pré-carga do modelo, segundos de cada etapa e memória do processo antes e
+    depois.
+    """
+    with _precarga_lock:
+        return {**_precarga, "etapas": dict(_precarga["etapas"]), "memoria": dict(_precarga["memoria"])}
+
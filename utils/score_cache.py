@@ -0,0 +1,152 @@
+"""Cache persistente dos scores de risco clínico, por combinação de variáveis do modelo."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+_LOGGER = logging.getLogger(__name__)
+
+SCORES_DIR = Path(
+    os.environ.get(
+        "AJUSTA_SCORES_DIR",
+        Path(__file__).resolve().parents[1] / ".cache" / "scores",
+    )
+)
+
+
+class _Tabela(NamedTuple):
+    chaves: np.ndarray  # uint64, ordenadas
+    scores: np.ndarray  # float64, na ordem de ``chaves``
+    mtime_ns: int | None  # versão do arquivo já incorporada
+
+
+_VAZIA = _Tabela(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.float64), None)
+
+_lock = threading.Lock()
+_tabelas: dict[str, _Tabela] = {}
+_stats = {"acertos": 0, "calculados": 0, "chamadas_modelo": 0}
+
+
+def scores_path(versao_modelo: str) -> Path:
+    return SCORES_DIR / f"scores-{versao_modelo}.parquet"
+
+
+def chaves_features(X: pd.DataFrame) -> np.ndarray:
+    """Hash (``uint64``) de cada linha de ``X``; linhas com os mesmos valores e dtypes dão a mesma chave."""
+    return pd.util.hash_pandas_object(X, index=False).to_numpy()
+
+
+def _mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _juntar(tabela: _Tabela, chaves: np.ndarray, scores: np.ndarray, mtime_ns: int | None) -> _Tabela:
+    """Une as entradas novas à tabela; numa chave repetida vale a que já estava."""
+    todas = np.concatenate([tabela.chaves, chaves])
+    valores = np.concatenate([tabela.scores, scores])
+    todas, primeira = np.unique(todas, return_index=True)
+    return _Tabela(todas, valores[primeira], mtime_ns)
+
+
+def _ler(path: Path, tabela: _Tabela, mtime_ns: int) -> _Tabela:
+    try:
+        disco = pd.read_parquet(path)
+    except Exception as e:  # arquivo truncado, gravação concorrente de outro processo etc.
+        _LOGGER.warning("Cache de scores ilegível (%s): %s", path, e)
+        return tabela
+    return _juntar(
+        tabela,
+        disco["chave"].to_numpy(dtype=np.uint64),
+        disco["score"].to_numpy(dtype=np.float64),
+        mtime_ns,
+    )
+
+
+def _tabela(versao_modelo: str) -> _Tabela:
+    """Tabela em memória, relendo o arquivo se outro processo o regravou. Chamar com ``_lock``."""
+    tabela = _tabelas.get(versao_modelo, _VAZIA)
+    path = scores_path(versao_modelo)
+    mtime_ns = _mtime(path)
+    if mtime_ns is not None and mtime_ns != tabela.mtime_ns:
+        tabela = _ler(path, tabela, mtime_ns)
+        _tabelas[versao_modelo] = tabela
+    return tabela
+
+
+def _gravar(versao_modelo: str, tabela: _Tabela) -> _Tabela:
+    """Grava a tabela de forma atômica (como ``write_snapshot``). Chamar com ``_lock``."""
+    path = scores_path(versao_modelo)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({"chave": tabela.chaves, "score": tabela.scores}).to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        return tabela._replace(mtime_ns=_mtime(path))
+    except Exception as e:  # disco cheio, pasta sem permissão etc.: segue só em memória
+        _LOGGER.warning("Não foi possível gravar o cache de scores (%s): %s", path, e)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return tabela
+
+
+def scores_em_cache(
+    X: pd.DataFrame,
+    versao_modelo: str,
+    prever: Callable[[pd.DataFrame], np.ndarray],
+) -> np.ndarray:
+    """Score de cada linha de ``X``; ``prever`` recebe só as combinações ausentes do cache."""
+    chaves = chaves_features(X)
+    with _lock:
+        tabela = _tabela(versao_modelo)
+    pos = np.searchsorted(tabela.chaves, chaves)
+    pos[pos == len(tabela.chaves)] = 0
+    achou = tabela.chaves[pos] == chaves if len(tabela.chaves) else np.zeros(len(chaves), dtype=bool)
+    scores = np.empty(len(chaves), dtype=np.float64)
+    scores[achou] = tabela.scores[pos[achou]]
+
+    faltam = np.flatnonzero(~achou)
+    if len(faltam):
+        novas, primeira, inversa = np.unique(chaves[faltam], return_index=True, return_inverse=True)
+        calculados = np.asarray(prever(X.iloc[faltam[primeira]]), dtype=np.float64)
+        scores[faltam] = calculados[inversa]
+        with _lock:
+            tabela = _juntar(_tabela(versao_modelo), novas, calculados, None)
+            _tabelas[versao_modelo] = _gravar(versao_modelo, tabela)
+            _stats["calculados"] += len(novas)
+            _stats["chamadas_modelo"] += 1
+    with _lock:
+        _stats["acertos"] += int(achou.sum())
+    return scores
+
+
+def precarregar_scores(versao_modelo: str) -> int:
+    """Lê para a memória os scores guardados de ``versao_modelo``; devolve quantas combinações são."""
+    with _lock:
+        return len(_tabela(versao_modelo).chaves)
+
+
+def score_cache_stats() -> dict:
+    """
+    Acertos do cache, combinações e chamadas ao modelo no processo, e combinações guardadas
+    por versão.
+    """
+    with _lock:
+        return {**_stats, "entradas": {v: len(t.chaves) for v, t in _tabelas.items()}}
+
+
+def limpar_scores_memoria() -> None:
+    """Esquece as tabelas em memória; a próxima consulta relê os arquivos."""
+    with _lock:
+        _tabelas.clear()
@@ -0,0 +1,133 @@
+"""Cliente único do Google Sheets para o processo."""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlparse
+
+import gspread
+import pandas as pd
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit_gsheets import GSheetsConnection
+
+CONNECTION_NAME = "gsheets"
+
+# Conexões HTTP mantidas abertas para a API (o padrão do requests é 10).
+POOL_MAXSIZE = 32
+
+# Chamadas feitas fora de uma execução de página (thread de releitura do snapshot).
+PAGINA_SEGUNDO_PLANO = "(segundo plano)"
+
+_ACOES = frozenset({"append", "batchUpdate", "batchGet", "batchClear", "clear", "copyTo"})
+
+_stats_lock = threading.Lock()
+_calls: Counter = Counter()
+_runs: Counter = Counter()
+
+
+def get_connection() -> GSheetsConnection:
+    """Conexão ``st.connection`` do app (o Streamlit a mantém única por processo)."""
+    return st.connection(CONNECTION_NAME, type=GSheetsConnection)
+
+
+def _config_conexao() -> dict:
+    """``[connections.gsheets]`` de ``secrets.toml`` (o mesmo bloco lido por ``st.connection``)."""
+    connections = st.secrets.get("connections", {})
+    return dict(connections.get(CONNECTION_NAME, {}))
+
+
+@st.cache_resource
+def get_spreadsheet():
+    """
+    Planilha gspread, aberta uma vez por processo; ``None`` se a conexão não usar conta de
+    serviço.
+    """
+    config = _config_conexao()
+    if config.get("type") != "service_account":
+        return None
+    spreadsheet = config.pop("spreadsheet")
+    config.pop("worksheet", None)
+    client = gspread.service_account_from_dict(config)
+    _instrument_session(client.session)
+    if urlparse(spreadsheet).scheme in ("http", "https"):
+        return client.open_by_url(spreadsheet)
+    return client.open(spreadsheet)
+
+
+def _instrument_session(session) -> None:
+    """Aumenta o pool de conexões da sessão e registra cada resposta em ``_calls``."""
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_on_response)
+
+
+def _on_response(response, *args, **kwargs):
+    record_call(_operacao(response.request.method, response.request.url))
+
+
+def _operacao(method: str, url: str) -> str:
+    """Rótulo curto da chamada: ``GET values``, ``POST values:append``, ``POST batchUpdate``..."""
+    path = urlparse(url).path
+    if "/spreadsheets/" not in path:
+        return f"{method} {path.rstrip('/').rsplit('/', 1)[-1] or 'auth'}"
+    partes = path.split("/spreadsheets/", 1)[1].split("/")
+    # ``:acao`` no fim da URL (as faixas A1 também têm ``:``, por isso a lista fechada)
+    acao = partes[-1].rsplit(":", 1)[-1] if ":" in partes[-1] else ""
+    acao = acao if acao in _ACOES else ""
+    recurso = partes[1].split(":", 1)[0] if len(partes) > 1 else ""
+    rotulo = ":".join(p for p in (recurso, acao) if p) or "spreadsheet"
+    return f"{method} {rotulo}"
+
+
+def _pagina_atual() -> str:
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return PAGINA_SEGUNDO_PLANO
+    try:
+        manager = ctx.pages_manager
+        page = manager.get_pages().get(manager.current_page_script_hash) or {}
+        return page.get("page_name") or Path(page.get("script_path") or ctx.main_script_path).stem
+    except Exception:
+        return Path(ctx.main_script_path).stem
+
+
+def record_call(operacao: str) -> None:
+    """Conta uma chamada à API para a página em execução."""
+    pagina = _pagina_atual()
+    with _stats_lock:
+        _calls[(pagina, operacao)] += 1
+
+
+def record_page_run() -> None:
+    """Conta uma execução da página atual (chamado por ``auth.check_auth``)."""
+    pagina = _pagina_atual()
+    with _stats_lock:
+        _runs[pagina] += 1
+
+
+def call_stats() -> pd.DataFrame:
+    """Chamadas ao Google Sheets desde o início do processo, por página e por operação."""
+    with _stats_lock:
+        calls = dict(_calls)
+        runs = dict(_runs)
+    if not calls:
+        return pd.DataFrame(columns=["total", "execucoes", "chamadas_por_execucao"])
+    s = pd.Series(calls)
+    s.index = s.index.set_names(["pagina", "operacao"])
+    tabela = s.unstack("operacao", fill_value=0)
+    tabela["total"] = tabela.sum(axis=1)
+    tabela["execucoes"] = pd.Series(runs).reindex(tabela.index).fillna(0).astype(int)
+    tabela["chamadas_por_execucao"] = (
+        tabela["total"] / tabela["execucoes"].where(tabela["execucoes"] > 0)
+    ).round(2)
+    return tabela.sort_values("total", ascending=False)
+
+
+def reset_call_stats() -> None:
+    with _stats_lock:
+        _calls.clear()
+        _runs.clear()
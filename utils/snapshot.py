@@ -0,0 +1,143 @@
+"""Snapshots locais (Parquet) das abas da planilha, servidos antes da releitura em segundo plano."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+_LOGGER = logging.getLogger(__name__)
+
+# Idade (s) a partir da qual o snapshot é servido, mas relido em segundo plano.
+SNAPSHOT_MAX_AGE = 300
+
+SNAPSHOT_DIR = Path(
+    os.environ.get(
+        "AJUSTA_SNAPSHOT_DIR",
+        Path(__file__).resolve().parents[1] / ".cache" / "snapshots",
+    )
+)
+
+_refresh_lock = threading.Lock()
+_refresh_em_andamento: set[str] = set()
+
+
+def snapshot_path(worksheet: str) -> Path:
+    """Arquivo do snapshot da aba (nome ASCII estável, mesmo para ``Autenticação``)."""
+    slug = unicodedata.normalize("NFKD", worksheet).encode("ascii", "ignore").decode()
+    slug = re.sub(r"[^a-z0-9]+", "_", slug.lower()).strip("_") or "aba"
+    digest = hashlib.sha1(worksheet.encode("utf-8")).hexdigest()[:8]
+    return SNAPSHOT_DIR / f"{slug}-{digest}.parquet"
+
+
+def snapshot_version(worksheet: str) -> int | None:
+    """``mtime`` (ns) do snapshot, usado como versão; ``None`` se não houver arquivo."""
+    try:
+        return snapshot_path(worksheet).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _marker_path(worksheet: str) -> Path:
+    path = snapshot_path(worksheet)
+    return path.with_name(f"{path.name}.checked")
+
+
+def mark_fresh(worksheet: str) -> None:
+    """Registra que a aba foi conferida no Sheets e não mudou, sem regravar o snapshot."""
+    marker = _marker_path(worksheet)
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+    except OSError:
+        pass
+
+
+def snapshot_is_stale(worksheet: str, max_age: float = SNAPSHOT_MAX_AGE) -> bool:
+    version = snapshot_version(worksheet)
+    if version is None:
+        return True
+    try:
+        version = max(version, _marker_path(worksheet).stat().st_mtime_ns)
+    except OSError:
+        pass
+    return (time.time() - version / 1e9) > max_age
+
+
+def read_snapshot(worksheet: str) -> pd.DataFrame | None:
+    """Lê o snapshot da aba; ``None`` se não existir ou estiver ilegível."""
+    path = snapshot_path(worksheet)
+    try:
+        return pd.read_parquet(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # arquivo truncado, versão de pyarrow incompatível etc.
+        _LOGGER.warning("Snapshot ilegível para %r (%s): %s", worksheet, path, e)
+        return None
+
+
+def write_snapshot(worksheet: str, df: pd.DataFrame) -> bool:
+    """Grava o snapshot de forma atômica (arquivo temporário + ``os.replace``)."""
+    if df is None:
+        return False
+    path = snapshot_path(worksheet)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp, index=True)
+        os.replace(tmp, path)
+        return True
+    except Exception as e:  # colunas object com tipos mistos, disco cheio etc.
+        _LOGGER.warning("Não foi possível gravar snapshot de %r: %s", worksheet, e)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def delete_snapshot(worksheet: str) -> None:
+    for path in (snapshot_path(worksheet), _marker_path(worksheet)):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def refresh_in_background(worksheet: str, fetch: Callable[[], pd.DataFrame]) -> bool:
+    """
+    Grava ``fetch()`` como novo snapshot em uma thread daemon (uma por aba); ``True`` se
+    iniciou agora.
+    """
+    with _refresh_lock:
+        if worksheet in _refresh_em_andamento:
+            return False
+        _refresh_em_andamento.add(worksheet)
+
+    versao_inicial = snapshot_version(worksheet)
+
+    def _run() -> None:
+        try:
+            df = fetch()
+            if snapshot_version(worksheet) != versao_inicial:
+                return
+            if df is None:
+                mark_fresh(worksheet)
+            else:
+                write_snapshot(worksheet, df)
+        except Exception as e:
+            _LOGGER.warning("Falha ao atualizar snapshot de %r em segundo plano: %s", worksheet, e)
+        finally:
+            with _refresh_lock:
+                _refresh_em_andamento.discard(worksheet)
+
+    threading.Thread(target=_run, name=f"snapshot-{worksheet}", daemon=True).start()
+    return True
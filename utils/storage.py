@@ -0,0 +1,477 @@
+"""Backends locais (SQLite ou Parquet) para as abas indicadas em ``AJUSTA_STORAGE_BACKEND``."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # só o backend parquet precisa
+    pa = pc = pq = None
+
+STORAGE_DIR = Path(
+    os.environ.get(
+        "AJUSTA_STORAGE_DIR",
+        Path(__file__).resolve().parents[1] / ".storage",
+    )
+)
+
+# Linhas por fragmento no backend parquet.
+FRAGMENT_ROWS = 10_000
+
+# Parâmetros por comando ``IN (...)`` no SQLite (o limite padrão é 999 em versões antigas).
+_SQLITE_LOTE = 900
+
+
+class Tabela(NamedTuple):
+    """Conteúdo de uma aba: cabeçalho, posição de cada linha e valores (``None`` = vazio)."""
+
+    header: list
+    linhas: list
+    valores: list
+
+
+def _nova_versao(anterior):
+    """Versões crescem sempre, mesmo se o arquivo for recriado (base em ``time_ns``)."""
+    return max(time.time_ns(), (anterior or 0) + 1)
+
+
+def _lotes(itens, tamanho):
+    for i in range(0, len(itens), tamanho):
+        yield itens[i : i + tamanho]
+
+
+class StorageBackend(ABC):
+    """Interface dos backends: leituras avulsas e escritas só dentro de ``transaction()``."""
+
+    nome = ""
+
+    @abstractmethod
+    def version(self, worksheet):
+        """Versão atual da aba (muda a cada transação que a altera); ``None`` se ela não existir."""
+
+    @abstractmethod
+    def read(self, worksheet):
+        """``Tabela`` com todas as linhas, em ordem de posição; ``None`` se a aba não existir."""
+
+    @abstractmethod
+    def read_rows(self, worksheet, linhas):
+        """``Tabela`` só com as ``linhas`` pedidas que existirem; ``None`` se a aba não existir."""
+
+    @abstractmethod
+    def transaction(self):
+        """Context manager com a transação; as escritas só são aplicadas se o bloco terminar sem erro."""
+
+
+# --- SQLite -----------------------------------------------------------------
+
+
+def _ident(nome):
+    return '"' + nome.replace('"', '""') + '"'
+
+
+class SQLiteBackend(StorageBackend):
+    """Um arquivo SQLite, com uma tabela ``aba_<n>`` por aba e a posição da linha como chave."""
+
+    nome = "sqlite"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._con = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS _abas ("
+            "aba TEXT PRIMARY KEY, tabela TEXT NOT NULL, header TEXT NOT NULL, versao INTEGER NOT NULL)"
+        )
+
+    def _aba(self, worksheet):
+        row = self._con.execute(
+            "SELECT tabela, header, versao FROM _abas WHERE aba = ?", (worksheet,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def version(self, worksheet):
+        with self._lock:
+            aba = self._aba(worksheet)
+        return aba[2] if aba else None
+
+    def _tabela(self, header, rows):
+        n = len(header)
+        linhas = [r[0] for r in rows]
+        valores = [list(r[1 : n + 1]) + [None] * (n - len(r) + 1) for r in rows]
+        return Tabela(list(header), linhas, valores)
+
+    def read(self, worksheet):
+        with self._lock:
+            aba = self._aba(worksheet)
+            if aba is None:
+                return None
+            tabela, header, _ = aba
+            rows = self._con.execute(f"SELECT * FROM {_ident(tabela)} ORDER BY _linha").fetchall()
+        return self._tabela(header, rows)
+
+    def read_rows(self, worksheet, linhas):
+        linhas = sorted({int(i) for i in linhas})
+        with self._lock:
+            aba = self._aba(worksheet)
+            if aba is None:
+                return None
+            tabela, header, _ = aba
+            rows = []
+            for lote in _lotes(linhas, _SQLITE_LOTE):
+                marcas = ", ".join("?" * len(lote))
+                rows += self._con.execute(
+                    f"SELECT * FROM {_ident(tabela)} WHERE _linha IN ({marcas}) ORDER BY _linha", lote
+                ).fetchall()
+        return self._tabela(header, rows)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._lock:
+            self._con.execute("BEGIN IMMEDIATE")
+            tx = _SQLiteTransaction(self)
+            try:
+                yield tx
+                for worksheet in tx.alteradas:
+                    self._con.execute(
+                        "UPDATE _abas SET versao = ? WHERE aba = ?",
+                        (_nova_versao(self._aba(worksheet)[2]), worksheet),
+                    )
+                self._con.execute("COMMIT")
+            except BaseException:
+                self._con.execute("ROLLBACK")
+                raise
+
+
+class _SQLiteTransaction:
+    def __init__(self, backend):
+        self._backend = backend
+        self._con = backend._con
+        self.alteradas = set()
+
+    def header(self, worksheet):
+        aba = self._backend._aba(worksheet)
+        return list(aba[1]) if aba else None
+
+    def _criar(self, worksheet, header):
+        cur = self._con.execute(
+            "INSERT INTO _abas (aba, tabela, header, versao) VALUES (?, '', ?, ?)",
+            (worksheet, json.dumps(header), _nova_versao(None)),
+        )
+        tabela = f"aba_{cur.lastrowid}"
+        self._con.execute("UPDATE _abas SET tabela = ? WHERE aba = ?", (tabela, worksheet))
+        colunas = "".join(f", c{i}" for i in range(len(header)))
+        self._con.execute(f"CREATE TABLE {_ident(tabela)} (_linha INTEGER PRIMARY KEY{colunas})")
+
+    def set_header(self, worksheet, header):
+        """Cria a aba ou acrescenta colunas ao fim do cabeçalho (colunas não são removidas)."""
+        header = [str(h) for h in header]
+        aba = self._backend._aba(worksheet)
+        self.alteradas.add(worksheet)
+        if aba is None:
+            self._criar(worksheet, header)
+            return
+        tabela, atual, _ = aba
+        if header[: len(atual)] != atual:
+            raise ValueError(f"Cabeçalho de {worksheet!r} só pode ganhar colunas no fim.")
+        for i in range(len(atual), len(header)):
+            self._con.execute(f"ALTER TABLE {_ident(tabela)} ADD COLUMN c{i}")
+        self._con.execute("UPDATE _abas SET header = ? WHERE aba = ?", (json.dumps(header), worksheet))
+
+    def _insert(self, tabela, n, linhas, rows, verbo="INSERT"):
+        colunas = ", ".join(["_linha"] + [f"c{i}" for i in range(n)])
+        marcas = ", ".join("?" * (n + 1))
+        self._con.executemany(
+            f"{verbo} INTO {_ident(tabela)} ({colunas}) VALUES ({marcas})",
+            (
+                [int(i)] + [None if v == "" else v for v in list(r)[:n]] + [None] * (n - len(r))
+                for i, r in zip(linhas, rows)
+            ),
+        )
+
+    def append(self, worksheet, rows):
+        """Anexa ``rows`` depois da última linha; retorna a posição da primeira."""
+        tabela, header, _ = self._backend._aba(worksheet)
+        (ultima,) = self._con.execute(f"SELECT max(_linha) FROM {_ident(tabela)}").fetchone()
+        primeira = 0 if ultima is None else ultima + 1
+        self._insert(tabela, len(header), range(primeira, primeira + len(rows)), rows)
+        self.alteradas.add(worksheet)
+        return primeira
+
+    def put_rows(self, worksheet, linhas, rows):
+        """Grava (insere ou substitui) as linhas nas posições ``linhas``."""
+        tabela, header, _ = self._backend._aba(worksheet)
+        self._insert(tabela, len(header), linhas, rows, verbo="INSERT OR REPLACE")
+        self.alteradas.add(worksheet)
+
+    def delete_rows(self, worksheet, linhas):
+        tabela, _, _ = self._backend._aba(worksheet)
+        self._con.executemany(f"DELETE FROM {_ident(tabela)} WHERE _linha = ?", ((int(i),) for i in linhas))
+        self.alteradas.add(worksheet)
+
+    def replace(self, worksheet, header, rows, linhas=None):
+        """Substitui a aba inteira; sem ``linhas``, as posições são 0..n-1."""
+        aba = self._backend._aba(worksheet)
+        if aba is not None:
+            self._con.execute(f"DROP TABLE {_ident(aba[0])}")
+            self._con.execute("DELETE FROM _abas WHERE aba = ?", (worksheet,))
+        header = [str(h) for h in header]
+        self._criar(worksheet, header)
+        tabela = self._backend._aba(worksheet)[0]
+        self._insert(tabela, len(header), linhas if linhas is not None else range(len(rows)), rows)
+        self.alteradas.add(worksheet)
+
+
+# --- Parquet ----------------------------------------------------------------
+
+
+class ParquetBackend(StorageBackend):
+    """Uma pasta com ``manifesto.json`` e fragmentos Parquet de ``FRAGMENT_ROWS`` linhas por aba."""
+
+    nome = "parquet"
+
+    def __init__(self, root, fragment_rows=FRAGMENT_ROWS):
+        if pq is None:
+            raise RuntimeError("O backend parquet precisa do pacote pyarrow.")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.fragment_rows = fragment_rows
+        self._lock = threading.RLock()
+        self._manifesto_cache = None
+
+    @property
+    def _manifesto_path(self):
+        return self.root / "manifesto.json"
+
+    def _manifesto(self):
+        """Manifesto atual (relido só quando o arquivo muda)."""
+        try:
+            mtime = self._manifesto_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {"abas": {}}
+        if self._manifesto_cache is None or self._manifesto_cache[0] != mtime:
+            self._manifesto_cache = (mtime, json.loads(self._manifesto_path.read_text(encoding="utf-8")))
+        return self._manifesto_cache[1]
+
+    def version(self, worksheet):
+        with self._lock:
+            aba = self._manifesto()["abas"].get(worksheet)
+        return aba["versao"] if aba else None
+
+    def _ler_fragmento(self, arquivo, n, linhas=None):
+        tabela = pq.read_table(self.root / arquivo)
+        if linhas is not None:
+            tabela = tabela.filter(pc.is_in(tabela["_linha"], value_set=pa.array(linhas, pa.int64())))
+        colunas = [
+            tabela[f"c{i}"].to_pylist() if f"c{i}" in tabela.column_names else [None] * tabela.num_rows
+            for i in range(n)
+        ]
+        return tabela["_linha"].to_pylist(), [list(r) for r in zip(*colunas)] if n else [[]] * tabela.num_rows
+
+    def _ler(self, worksheet, linhas=None):
+        with self._lock:
+            aba = self._manifesto()["abas"].get(worksheet)
+            if aba is None:
+                return None
+            aba = json.loads(json.dumps(aba))
+        header, fragmentos = aba["header"], aba["fragmentos"]
+        if linhas is not None:
+            pedidos = {}
+            for i in sorted({int(i) for i in linhas}):
+                pedidos.setdefault(str(i // self.fragment_rows), []).append(i)
+        todas, valores = [], []
+        for k in sorted(fragmentos, key=int):
+            if linhas is not None and k not in pedidos:
+                continue
+            ls, vs = self._ler_fragmento(fragmentos[k], len(header), None if linhas is None else pedidos[k])
+            todas += ls
+            valores += vs
+        return Tabela(list(header), todas, valores)
+
+    def read(self, worksheet):
+        return self._ler(worksheet)
+
+    def read_rows(self, worksheet, linhas):
+        return self._ler(worksheet, linhas)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._lock:
+            tx = _ParquetTransaction(self, json.loads(json.dumps(self._manifesto())))
+            yield tx
+            tx._gravar()
+
+
+def _texto(v):
+    if v is None or v == "":
+        return None
+    return v if isinstance(v, str) else str(v)
+
+
+class _ParquetTransaction:
+    def __init__(self, backend, manifesto):
+        self._backend = backend
+        self._manifesto = manifesto
+        # (aba, fragmento) -> {linha: valores | None (removida)}
+        self._fragmentos = {}
+        self.alteradas = set()
+
+    def _aba(self, worksheet):
+        return self._manifesto["abas"].get(worksheet)
+
+    def header(self, worksheet):
+        aba = self._aba(worksheet)
+        return list(aba["header"]) if aba else None
+
+    def set_header(self, worksheet, header):
+        header = [str(h) for h in header]
+        aba = self._aba(worksheet)
+        self.alteradas.add(worksheet)
+        if aba is None:
+            self._manifesto["abas"][worksheet] = {"header": header, "versao": 0, "fragmentos": {}, "proxima": 0}
+            return
+        if header[: len(aba["header"])] != aba["header"]:
+            raise ValueError(f"Cabeçalho de {worksheet!r} só pode ganhar colunas no fim.")
+        aba["header"] = header
+
+    def _fragmento(self, worksheet, k):
+        chave = (worksheet, k)
+        if chave not in self._fragmentos:
+            arquivo = self._aba(worksheet)["fragmentos"].get(str(k))
+            linhas = {}
+            if arquivo:
+                ls, vs = self._backend._ler_fragmento(arquivo, len(self._aba(worksheet)["header"]))
+                linhas = dict(zip(ls, vs))
+            self._fragmentos[chave] = linhas
+        return self._fragmentos[chave]
+
+    def put_rows(self, worksheet, linhas, rows):
+        aba = self._aba(worksheet)
+        n = self._backend.fragment_rows
+        for i, r in zip(linhas, rows):
+            i = int(i)
+            self._fragmento(worksheet, i // n)[i] = [_texto(v) for v in r]
+            aba["proxima"] = max(aba["proxima"], i + 1)
+        self.alteradas.add(worksheet)
+
+    def append(self, worksheet, rows):
+        primeira = self._aba(worksheet)["proxima"]
+        self.put_rows(worksheet, range(primeira, primeira + len(rows)), rows)
+        return primeira
+
+    def delete_rows(self, worksheet, linhas):
+        n = self._backend.fragment_rows
+        for i in linhas:
+            i = int(i)
+            self._fragmento(worksheet, i // n)[i] = None
+        self.alteradas.add(worksheet)
+
+    def replace(self, worksheet, header, rows, linhas=None):
+        self._manifesto["abas"].pop(worksheet, None)
+        self._fragmentos = {c: v for c, v in self._fragmentos.items() if c[0] != worksheet}
+        # aba recriada sem fragmentos: os antigos são apagados depois de trocar o manifesto
+        self.set_header(worksheet, header)
+        self.put_rows(worksheet, linhas if linhas is not None else range(len(rows)), rows)
+
+    def _gravar(self):
+        backend = self._backend
+        antigos = {
+            arquivo for aba in backend._manifesto()["abas"].values() for arquivo in aba["fragmentos"].values()
+        }
+        for worksheet in self.alteradas:
+            aba = self._aba(worksheet)
+            aba["versao"] = _nova_versao(aba["versao"])
+        prefixos = {w: hashlib.sha1(w.encode("utf-8")).hexdigest()[:10] for w in self.alteradas}
+        for (worksheet, k), linhas in self._fragmentos.items():
+            aba = self._aba(worksheet)
+            vivas = sorted(i for i, v in linhas.items() if v is not None)
+            if not vivas:
+                aba["fragmentos"].pop(str(k), None)
+                continue
+            n = len(aba["header"])
+            colunas = {"_linha": pa.array(vivas, pa.int64())}
+            for j in range(n):
+                colunas[f"c{j}"] = pa.array(
+                    [linhas[i][j] if j < len(linhas[i]) else None for i in vivas], pa.string()
+                )
+            arquivo = f"{prefixos[worksheet]}-{k:06d}-{aba['versao']}.parquet"
+            pq.write_table(pa.table(colunas), backend.root / arquivo)
+            aba["fragmentos"][str(k)] = arquivo
+        tmp = backend._manifesto_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._manifesto, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, backend._manifesto_path)
+        em_uso = {arquivo for aba in self._manifesto["abas"].values() for arquivo in aba["fragmentos"].values()}
+        for arquivo in antigos - em_uso:
+            with contextlib.suppress(OSError):
+                (backend.root / arquivo).unlink()
+
+
+# --- Seleção por aba --------------------------------------------------------
+
+_BACKENDS = {
+    "sqlite": lambda: SQLiteBackend(STORAGE_DIR / "ajusta.sqlite"),
+    "parquet": lambda: ParquetBackend(STORAGE_DIR / "parquet"),
+}
+
+_instancias = {}
+_instancias_lock = threading.Lock()
+_override = None
+
+
+def _parse_config(valor):
+    """``"sqlite"`` -> ``("sqlite", {})``; ``"Dados=sqlite,Projetos=parquet"`` -> ``("", {...})``."""
+    padrao, por_aba = "", {}
+    for parte in (p.strip() for p in (valor or "").split(",")):
+        if not parte:
+            continue
+        if "=" in parte:
+            aba, nome = (x.strip() for x in parte.split("=", 1))
+            por_aba[aba] = nome
+        else:
+            padrao = parte
+    return padrao, por_aba
+
+
+_PADRAO, _POR_ABA = _parse_config(os.environ.get("AJUSTA_STORAGE_BACKEND", ""))
+
+
+def get_backend(nome):
+    """Instância do backend ``nome`` (``sqlite`` ou ``parquet``), única por processo."""
+    if nome not in _BACKENDS:
+        raise ValueError(f"Backend de armazenamento desconhecido: {nome!r}")
+    with _instancias_lock:
+        if nome not in _instancias:
+            _instancias[nome] = _BACKENDS[nome]()
+        return _instancias[nome]
+
+
+def use_storage(backend, worksheets=None):
+    """Direciona as abas ``worksheets`` (todas, se ``None``) para ``backend``; ``None`` desfaz."""
+    global _override
+    _override = None if backend is None else (backend, None if worksheets is None else set(worksheets))
+
+
+def backend_for(worksheet):
+    """Backend local da aba, ou ``None`` se ela continua no Google Sheets."""
+    if _override is not None:
+        backend, abas = _override
+        return backend if abas is None or worksheet in abas else None
+    nome = _POR_ABA.get(worksheet, _PADRAO)
+    if not nome or nome == "sheets":
+        return None
+    return get_backend(nome)
@@ -0,0 +1,108 @@
+"""Tabela opcional com o score de todas as combinações das variáveis do modelo."""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from utils.modelo_numpy import MODELOS_DIR, carregar_arrays, salvar_arrays
+
+_LOGGER = logging.getLogger(__name__)
+
+TIPOS = {"float32": np.float32, "float16": np.float16}
+
+SCORE_TABELA = os.environ.get("AJUSTA_SCORE_TABELA", "")
+
+
+class TabelaScores(NamedTuple):
+    colunas: tuple[str, ...]
+    eixos: tuple[np.ndarray, ...]  # valores possíveis de cada coluna, ordenados
+    scores: np.ndarray  # um score por combinação, na ordem C dos eixos
+
+
+def combinacoes(colunas, eixos) -> pd.DataFrame:
+    """Todas as combinações dos eixos, uma por linha, na ordem da tabela."""
+    grade = np.indices([len(e) for e in eixos]).reshape(len(eixos), -1)
+    return pd.DataFrame({col: eixo[i] for col, eixo, i in zip(colunas, eixos, grade)})
+
+
+def montar(colunas, eixos, prever: Callable[[pd.DataFrame], np.ndarray], dtype=np.float32) -> TabelaScores:
+    """Pontua todas as combinações com ``prever`` e guarda os scores em ``dtype``."""
+    eixos = tuple(np.asarray(e) for e in eixos)
+    scores = np.asarray(prever(combinacoes(colunas, eixos)), dtype=np.float64)
+    return TabelaScores(tuple(colunas), eixos, scores.astype(dtype))
+
+
+def consultar(tabela: TabelaScores, X: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """``(scores, dentro)`` das linhas de ``X``; linhas com valor fora dos eixos ficam ``NaN``."""
+    idx = np.zeros(len(X), dtype=np.intp)
+    dentro = np.ones(len(X), dtype=bool)
+    for col, eixo in zip(tabela.colunas, tabela.eixos):
+        if eixo.dtype.kind == "f":
+            v = X[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            v = X[col].astype(object).to_numpy().astype(str)
+        i = np.minimum(np.searchsorted(eixo, v), len(eixo) - 1)
+        dentro &= eixo[i] == v
+        idx = idx * len(eixo) + i
+    scores = tabela.scores[idx].astype(np.float64)
+    scores[~dentro] = np.nan
+    return scores, dentro
+
+
+def tabela_path(versao_modelo: str, tipo: str) -> Path:
+    return MODELOS_DIR / f"{versao_modelo}-tabela-{tipo}"
+
+
+def salvar(tabela: TabelaScores, path: Path) -> None:
+    """Grava a tabela na pasta ``path`` (``utils.modelo_numpy.salvar_arrays``)."""
+    arrays = {"colunas": np.asarray(tabela.colunas), "scores": tabela.scores}
+    arrays.update({f"eixo_{i}": eixo for i, eixo in enumerate(tabela.eixos)})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    salvar_arrays(arrays, path)
+
+
+def carregar(path: Path) -> TabelaScores:
+    """Tabela gravada por ``salvar``; os scores ficam mapeados do disco."""
+    z = carregar_arrays(path)
+    colunas = tuple(str(c) for c in z["colunas"])
+    return TabelaScores(colunas, tuple(z[f"eixo_{i}"] for i in range(len(colunas))), z["scores"])
+
+
+def _mesmos_eixos(tabela: TabelaScores, colunas, eixos) -> bool:
+    return tabela.colunas == tuple(colunas) and all(
+        np.array_equal(a, np.asarray(b)) for a, b in zip(tabela.eixos, eixos)
+    )
+
+
+def carregar_ou_montar(
+    versao_modelo: str,
+    colunas,
+    eixos,
+    prever: Callable[[pd.DataFrame], np.ndarray],
+    tipo: str = "float32",
+) -> TabelaScores:
+    """
+    Tabela de ``versao_modelo`` lida do disco ou montada e gravada (de novo se os eixos
+    mudaram).
+    """
+    path = tabela_path(versao_modelo, tipo)
+    try:
+        tabela = carregar(path)
+        if _mesmos_eixos(tabela, colunas, eixos) and tabela.scores.dtype == TIPOS[tipo]:
+            return tabela
+    except FileNotFoundError:
+        pass
+    except Exception as e:  # arquivo truncado, formato antigo etc.: monta de novo
+        _LOGGER.warning("Tabela de scores ilegível (%s): %s", path, e)
+    tabela = montar(colunas, eixos, prever, TIPOS[tipo])
+    try:
+        salvar(tabela, path)
+    except OSError as e:
+        _LOGGER.warning("Não foi possível gravar a tabela de scores (%s): %s", path, e)
+    return tabela